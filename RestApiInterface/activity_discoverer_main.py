@@ -26,6 +26,7 @@ Transactions on Systems, Man, and Cybernetics, Part B, 2013.
 
 import arrow
 import logging
+from collections import OrderedDict
 from src.packActivityRecognition.activity_discoverer import ActivityDiscoverer
 
 
@@ -43,9 +44,11 @@ if __name__ == '__main__':
     ar = ActivityDiscoverer()
     # Extracting the user affected by EAMs
     list_user = ar.user_in_eam_extractor()
+    # The CASAS input of the users that need a new execution
+    pending_users = OrderedDict()
     # Process for each user
     for user in list_user:
-        logging.debug("Starting activity recognition for the user: ", user)
+        logging.debug("Starting activity recognition for the user: %s", user)
         # Setting some time intervals
         # TODO delete when finish
         #start_date = '2016-01-02 06:08:41.013+02'
@@ -56,9 +59,26 @@ if __name__ == '__main__':
         # After obtained the list of leas we are going to process it
         if len(data) > 0:
             # This user has LEA data stored in database with the given dates
-            res = ar.execute_casas(data)
-            if res:
-                # Executing the HARSS algoritmh
-                ar.execute_hars(p_user_in_role=user)
-            else:
-                raise Exception('The casas algorithm is failing, check the logs')
+            casas_input = ar.build_casas_input(data)
+            fingerprint = ar.casas_fingerprint(user, casas_input)
+            if ar.is_unchanged(user, fingerprint):
+                # Nothing changed since the last run, the stored results are still valid
+                logging.info("Skipping the user %s: the CASAS input has not changed since the last run", user)
+                continue
+            ar.prepare_casas(user, casas_input)
+            pending_users[user] = (casas_input, fingerprint)
+    # Executing CASAS for all the pending users in a bounded pool
+    failed_users = []
+    for result in ar.run_casas(pending_users.keys()):
+        user = result['user_in_role']
+        casas_input, fingerprint = pending_users[user]
+        if result['returncode'] == 0 and not result['timed_out']:
+            ar.merge_casas_output(user, casas_input)
+            # Executing the HARSS algoritmh
+            ar.execute_hars(p_user_in_role=user)
+            # Storing the fingerprint with the results
+            ar.store_fingerprint(user, fingerprint)
+        else:
+            failed_users.append(user)
+    if failed_users:
+        raise Exception('The casas algorithm is failing for the users %s, check the logs' % failed_users)
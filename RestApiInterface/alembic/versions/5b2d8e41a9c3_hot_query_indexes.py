@@ -0,0 +1,49 @@
+"""hot query indexes
+
+Revision ID: 5b2d8e41a9c3
+Revises: cf3eac17c4a1
+Create Date: 2026-10-19 10:02:41.516308
+
+Indexes of the queries executed by the activity discovery and the search endpoints. The indexes are created
+concurrently, so the tables receiving LEAs are not locked while they are built.
+
+The other hot queries already have a usable index: the time range filter of executed_action uses executed_action_uq,
+which starts with execution_datetime, and the user filter of user_in_role uses user_in_role_natural1_uq, which starts
+with user_in_system_id.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+from sqlalchemy.schema import Sequence, CreateSequence, DropSequence
+
+
+# revision identifiers, used by Alembic.
+revision = '5b2d8e41a9c3'
+down_revision = 'cf3eac17c4a1'
+branch_labels = None
+depends_on = None
+
+SCHEMA = 'city4age_ar'
+
+# (index name, table name, columns). Keep them in sync with the __table_args__ of ar_tables
+INDEXES = [
+    ('executed_transformed_action_user_datetime_idx', 'executed_transformed_action',
+     ['user_in_role_id', 'transformed_execution_datetime']),
+    ('user_in_eam_user_in_role_idx', 'user_in_eam', ['user_in_role_id']),
+]
+
+
+def upgrade():
+    # CREATE INDEX CONCURRENTLY can't be executed inside a transaction block, so the migration transaction is ended.
+    # The databases created by the database generator already have these indexes.
+    op.execute('COMMIT')
+    for name, table, columns in INDEXES:
+        op.execute('CREATE INDEX CONCURRENTLY IF NOT EXISTS %s ON %s.%s (%s)' % (name, SCHEMA, table,
+                                                                                 ', '.join(columns)))
+
+
+def downgrade():
+    op.execute('COMMIT')
+    for name, table, columns in INDEXES:
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS %s.%s' % (SCHEMA, name))
@@ -0,0 +1,42 @@
+"""lea monthly partitions
+
+Revision ID: 8e4f0c27d15b
+Revises: 5b2d8e41a9c3
+Create Date: 2026-10-19 16:11:07.204581
+
+Converts executed_action, executed_transformed_action and payload_value of both schemas into tables partitioned by
+month (PostgreSQL 11 or newer). The rows are copied into the new tables inside the migration transaction, so the API
+must be stopped while it runs. The future partitions are created by 'python manage_database.py -p'.
+
+The foreign keys referencing executed_action.id are dropped, because the id isn't unique by itself in a partitioned
+table.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+from sqlalchemy.schema import Sequence, CreateSequence, DropSequence
+
+# The packORM folder is added to the path by env.py
+import ar_tables
+import sr_tables
+import partitioning
+
+
+# revision identifiers, used by Alembic.
+revision = '8e4f0c27d15b'
+down_revision = '5b2d8e41a9c3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    connection = op.get_bind()
+    for tables in (ar_tables, sr_tables):
+        partitioning.partition_tables(connection, tables)
+
+
+def downgrade():
+    connection = op.get_bind()
+    for tables in (ar_tables, sr_tables):
+        partitioning.unpartition_tables(connection, tables)
@@ -0,0 +1,47 @@
+"""daily lea rollups
+
+Revision ID: c3a97d5e2f10
+Revises: 8e4f0c27d15b
+Create Date: 2026-10-19 17:24:52.870342
+
+Creates the daily LEA rollups of the Shared Repository and the watermark of the rollup job. The rollups of the
+existing LEAs are computed by the first execution of 'python manage_database.py -r'.
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlalchemy_utils
+from sqlalchemy.schema import Sequence, CreateSequence, DropSequence
+
+
+# revision identifiers, used by Alembic.
+revision = 'c3a97d5e2f10'
+down_revision = '8e4f0c27d15b'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('daily_lea_rollup',
+    sa.Column('user_in_role_id', sa.Integer(), sa.ForeignKey('city4age_sr.user_in_role.id'), nullable=False),
+    sa.Column('day', sa.Date(), nullable=False),
+    sa.Column('cd_action_id', sa.Integer(), sa.ForeignKey('city4age_sr.cd_action.id'), nullable=False),
+    sa.Column('location_id', sa.Integer(), sa.ForeignKey('city4age_sr.location.id'), nullable=False),
+    sa.Column('lea_count', sa.Integer(), nullable=False),
+    sa.Column('first_execution_datetime', sqlalchemy_utils.types.arrow.ArrowType(timezone=True), nullable=False),
+    sa.Column('last_execution_datetime', sqlalchemy_utils.types.arrow.ArrowType(timezone=True), nullable=False),
+    sa.PrimaryKeyConstraint('user_in_role_id', 'day', 'cd_action_id', 'location_id'),
+    schema='city4age_sr'
+    )
+    op.create_table('rollup_watermark',
+    sa.Column('rollup_name', sa.String(50), nullable=False, primary_key=True),
+    sa.Column('last_executed_action_id', sa.Integer(), nullable=False),
+    sa.Column('updated', sqlalchemy_utils.types.arrow.ArrowType(timezone=True),
+              server_default=sa.text(u"TIMEZONE('utc', CURRENT_TIMESTAMP)"), nullable=False),
+    schema='city4age_sr'
+    )
+
+
+def downgrade():
+    op.drop_table('rollup_watermark', schema='city4age_sr')
+    op.drop_table('daily_lea_rollup', schema='city4age_sr')
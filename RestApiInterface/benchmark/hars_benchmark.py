@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+
+"""
+Micro-benchmarks of the HARS activity discovery pipeline.
+
+The benchmarks run over synthetic data, so they do not need a database nor the CASAS binaries. A random set of
+EAMs, an annotated CASAS file with several instances of each pattern and the matching AD log are generated with a
+fixed seed, and the following operations are timed:
+
+-> find_models_for_pattern:     Search of the best EAM combination for each pattern instance (without cache).
+-> process_patterns:            Segmentation and matching of the whole annotated file (with the pattern cache).
+-> parse_log:                   Parsing of the patterns and clusters of the AD log.
+-> store_result:                Storage of the annotated dataframe as CSV.
+-> discovered_segments:         Split of the annotated dataframe into the segments stored in the database.
+
+The results are written as JSON, one entry per benchmark with the min, median and mean time in seconds.
+
+Usage example:
+
+    python benchmark/hars_benchmark.py -e 20 -p 30 -n 40 -r 5 -o hars_benchmark.json
+
+"""
+
+import os
+import sys
+import json
+import getopt
+import random
+import shutil
+import tempfile
+import platform
+import datetime
+
+from timeit import default_timer
+
+import numpy as np
+
+# The activity recognition modules are imported directly, so the database is not initialized
+basedir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+sys.path.insert(0, os.path.join(basedir, 'src', 'packActivityRecognition'))
+
+from expert_activity_model import ExpertActivityModel
+from pattern_model_matching import PatternModelMatching
+from LogReader import LogReader
+
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+DEFAULT_PARAMETERS = {
+    'eams': 20,             # Number of EAMs of the user
+    'patterns': 30,         # Number of different patterns found by AD
+    'instances': 40,        # Number of instances (days) of each pattern in the annotated file
+    'repeat': 5,            # Number of executions of each benchmark
+    'seed': 4               # Seed of the synthetic data
+}
+
+LOCATIONS = ['kitchen', 'bathroom', 'hall', 'bedroom', 'livingroom', 'toilet', 'garden']
+
+
+class SyntheticData(object):
+
+    def __init__(self, p_parameters):
+        """
+        Generates the EAMs, the annotated CASAS file and the AD log used by the benchmarks
+
+
+        :param p_parameters: A dict with the number of 'eams', 'patterns', 'instances' and the 'seed'
+
+        :return: Instance of the class
+        """
+        self.random = random.Random(p_parameters['seed'])
+        self.actions = ['action%02d' % i for i in xrange(max(10, p_parameters['eams']))]
+        self.action_locations = dict((action, self.random.choice(LOCATIONS)) for action in self.actions)
+        self.eamlist = self.generate_eams(p_parameters['eams'])
+        self.patterns = self.generate_patterns(p_parameters['patterns'])
+        self.directory = tempfile.mkdtemp(prefix='hars_benchmark_')
+        self.annotatedfile = os.path.join(self.directory, 'casas.csv.annotated')
+        self.logfile = os.path.join(self.directory, 'casas.log')
+        self.write_annotated_file(p_parameters['instances'])
+        self.write_log_file(p_parameters['instances'])
+
+    def generate_eams(self, p_number):
+        """
+        Builds a list of random EAMs
+
+        :param p_number: The number of EAMs
+        :return: A list of ExpertActivityModel instances
+        """
+        eamlist = []
+        for i in xrange(p_number):
+            actions = self.random.sample(self.actions, self.random.randint(1, 4))
+            start_hour = self.random.randint(0, 20)
+            eamlist.append(ExpertActivityModel('activity%02d' % i, {
+                'locations': sorted(set(self.action_locations[action] for action in actions)),
+                'actions': actions,
+                'duration': self.random.choice([60, 300, 900, 1800, 3600]),
+                'start': [['%02d:00' % start_hour, '%02d:30' % (start_hour + self.random.randint(0, 3))]]
+            }))
+        return eamlist
+
+    def generate_patterns(self, p_number):
+        """
+        Builds the action sequences of the patterns, mixing the actions of one or two EAMs
+
+        :param p_number: The number of patterns
+        :return: A list of lists of actions
+        """
+        patterns = []
+        for _ in xrange(p_number):
+            actions = []
+            for eam in self.random.sample(self.eamlist, self.random.randint(1, 2)):
+                actions.extend(self.random.sample(eam.actions, self.random.randint(1, len(eam.actions))))
+            if self.random.random() < 0.3:
+                actions.append(self.random.choice(self.actions))
+            patterns.append(actions)
+        return patterns
+
+    def write_annotated_file(self, p_instances):
+        """
+        Writes the annotated CASAS file. As in real homes, each pattern happens once a day around the same time of
+        the day, and some actions outside any pattern appear between the instances
+
+        :param p_instances: The number of instances (days) of each pattern
+        :return: None
+        """
+        times = [(self.random.randint(0, 23), self.random.randint(0, 59)) for _ in self.patterns]
+        instances = []
+        for day in xrange(p_instances):
+            for number in xrange(len(self.patterns)):
+                hour, minute = times[number]
+                instances.append((datetime.datetime(2018, 1, 1 + day % 28, hour, minute) +
+                                  datetime.timedelta(days=28 * (day / 28), minutes=self.random.randint(0, 5)), number))
+        instances.sort()
+        timestamp = instances[0][0]
+        executed_action = 0
+        with open(self.annotatedfile, 'w') as annotated:
+            for start, number in instances:
+                timestamp = max(timestamp, start)
+                rows = [(action, 'Pat_%s' % number) for action in self.patterns[number]]
+                if self.random.random() < 0.5:
+                    rows.append((self.random.choice(self.actions), 'Other_Activity'))
+                for action, pattern in rows:
+                    timestamp += datetime.timedelta(seconds=self.random.randint(1, 15))
+                    executed_action += 1
+                    annotated.write('%s\t%s\t%s\t%s\tON\t%s\t%s\n' % (
+                        timestamp.strftime('%Y-%m-%d'), timestamp.strftime('%H:%M:%S'),
+                        self.action_locations[action], action, pattern, executed_action))
+
+    def write_log_file(self, p_instances):
+        """
+        Writes an AD log with one iteration per pattern and one cluster for every two patterns
+
+        :param p_instances: The number of instances of each pattern
+        :return: None
+        """
+        with open(self.logfile, 'w') as log:
+            log.write('Reading the config file...done\n\nDiscovering patterns...AD: NumIterations = -1\n')
+            # AD only reports a pattern when the next iteration starts, so an extra iteration is written
+            for number in xrange(len(self.patterns) + 1):
+                actions = self.patterns[number] if number < len(self.patterns) else self.actions[0:1]
+                log.write('------- Iteration %s, 1000 events, 1000 size -------\n\nBest discovered sequence\n\n'
+                          % number)
+                log.write('Pattern: value = %f, number of instances = %s\n' % (self.random.uniform(1, 5),
+                                                                               p_instances))
+                log.write('   meantime = 10.0, stddevtime = 5.0\n Sequence(%s):\n' % len(actions))
+                for action in actions:
+                    log.write('   event (%s) %s [1 1]\n' % (self.actions.index(action) + 1, action))
+                log.write('Marked 10 events to compress, 0 duplicates, 990 numnewevents\n\n')
+            log.write('No more compression can be achieved.\tDone.\n\nClustering patterns...\n')
+            for cluster in xrange(0, len(self.patterns), 2):
+                log.write('Cluster %s\n' % (cluster / 2))
+                for number in xrange(cluster, min(cluster + 2, len(self.patterns))):
+                    log.write('   [%s]: %s \n' % (number, ' '.join(self.patterns[number])))
+            log.write('Done.\n\nAnnotating data...Done.\n')
+
+    def matcher(self, p_cachesize=1024):
+        """
+        Builds a PatternModelMatching instance with the annotated data loaded
+
+        :param p_cachesize: The size of the pattern score cache
+        :return: A PatternModelMatching instance
+        """
+        pmd = PatternModelMatching(self.eamlist, self.annotatedfile, self.logfile, cachesize=p_cachesize)
+        pmd.load_annotated_data()
+        return pmd
+
+    def close(self):
+        """
+        Deletes the generated files
+
+        :return: None
+        """
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+
+class Silence(object):
+    """
+    Context manager to discard the output printed by the HARS modules while they are timed
+    """
+
+    def __enter__(self):
+        self.stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+
+    def __exit__(self, *args):
+        sys.stdout.close()
+        sys.stdout = self.stdout
+
+
+def run_benchmark(p_name, p_setup, p_run, p_repeat, p_operations=1, p_details=None):
+    """
+    Times a benchmark several times. The setup is executed before each run and it is not timed
+
+    :param p_name: The name of the benchmark
+    :param p_setup: A function returning the argument of p_run
+    :param p_run: The function to time
+    :param p_repeat: The number of executions
+    :param p_operations: The number of operations done by each execution, to report the time per operation
+    :param p_details: An optional function returning a dict with details of the last execution
+
+    :return: A dict with the timing of the benchmark
+    """
+    times = []
+    argument = None
+    for _ in xrange(p_repeat):
+        with Silence():
+            argument = p_setup()
+            start = default_timer()
+            p_run(argument)
+            times.append(default_timer() - start)
+    result = {
+        'name': p_name,
+        'repeat': p_repeat,
+        'operations': p_operations,
+        'min': min(times),
+        'median': float(np.median(times)),
+        'mean': float(np.mean(times)),
+        'per_operation': min(times) / p_operations
+    }
+    if p_details is not None:
+        result.update(p_details(argument))
+    return result
+
+
+def benchmark(p_parameters):
+    """
+    Runs all the benchmarks
+
+    :param p_parameters: A dict with the parameters of the benchmark (see DEFAULT_PARAMETERS)
+
+    :return: A dict with the parameters, the environment and the results of each benchmark
+    """
+    data = SyntheticData(p_parameters)
+    repeat = p_parameters['repeat']
+    try:
+        results = []
+        # Pattern instances of the annotated file, to time the search alone
+        frame = data.matcher().df
+        runs = (frame['pattern'] != frame['pattern'].shift()).cumsum()
+        instances = []
+        for _, run in frame[frame['pattern'] != 'Other_Activity'].groupby(runs):
+            instances.append((run['location'].tolist(), run['action'].tolist(), run['timestamp'].iloc[0],
+                              run['timestamp'].iloc[-1]))
+
+        def find_models(pmd):
+            for locations, actions, start, end in instances:
+                pmd.find_models_for_pattern(locations, actions, start, end)
+        results.append(run_benchmark('find_models_for_pattern', lambda: data.matcher(0), find_models, repeat,
+                                     len(instances)))
+
+        results.append(run_benchmark('process_patterns', data.matcher, lambda pmd: pmd.process_patterns(), repeat,
+                                     len(instances), lambda pmd: {'cache': pmd.cache_statistics()}))
+
+        results.append(run_benchmark('parse_log', lambda: LogReader(data.logfile),
+                                     lambda logreader: logreader.parse_log(), repeat, len(data.patterns)))
+
+        def processed():
+            pmd = data.matcher()
+            pmd.process_patterns()
+            return pmd
+        output = os.path.join(data.directory, 'result.csv')
+        results.append(run_benchmark('store_result', processed, lambda pmd: pmd.store_result(output), repeat,
+                                     len(frame)))
+        results.append(run_benchmark('discovered_segments', processed, lambda pmd: pmd.discovered_segments(),
+                                     repeat, len(frame)))
+    finally:
+        data.close()
+
+    return {
+        'benchmark': 'hars',
+        'date': datetime.datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'pandas': sys.modules['pandas'].__version__,
+        'parameters': p_parameters,
+        'actions': len(frame),
+        'pattern_instances': len(instances),
+        'results': results
+    }
+
+
+def parse_args(argv):
+    """
+    Parses the arguments from command line
+
+    :param argv: the arguments to be parsed as passed to the function
+
+    :return: A tuple with the dict of parameters and the output file name (None for the standard output)
+    """
+    usage = 'hars_benchmark.py [-e <eams>] [-p <patterns>] [-n <instances>] [-r <repeat>] [-s <seed>] ' \
+            '[-o <outputfile>]'
+    parameters = dict(DEFAULT_PARAMETERS)
+    outputfile = None
+    options = {'-e': 'eams', '-p': 'patterns', '-n': 'instances', '-r': 'repeat', '-s': 'seed'}
+    try:
+        opts, args = getopt.getopt(argv, "he:p:n:r:s:o:", ["eams=", "patterns=", "instances=", "repeat=", "seed=",
+                                                           "ofile="])
+    except getopt.GetoptError:
+        print usage
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print usage
+            sys.exit()
+        elif opt in ("-o", "--ofile"):
+            outputfile = arg
+        elif opt in options:
+            parameters[options[opt]] = int(arg)
+        elif opt.lstrip('-') in parameters:
+            parameters[opt.lstrip('-')] = int(arg)
+    return parameters, outputfile
+
+
+def main(argv):
+    """
+    Runs the benchmarks and writes the results as JSON
+
+    :param argv: the arguments as passed to the script
+
+    :return: None
+    """
+    parameters, outputfile = parse_args(argv[1:])
+    report = json.dumps(benchmark(parameters), indent=2, sort_keys=True)
+    if outputfile:
+        with open(outputfile, 'w') as output:
+            output.write(report + '\n')
+    else:
+        print report
+
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,436 @@
+# -*- coding: utf-8 -*-
+
+"""
+End-to-end throughput benchmark of the ingestion and search endpoints of the API (add_action, add_measure and search).
+
+The benchmark sends requests to each endpoint and measures the throughput, the latency percentiles of the requests
+and, when the application runs in the same process, the number of SQL statements executed per request. The batch size
+is the number of items of each request: LEAs for add_action, measures for add_measure and the limit of the returned
+rows for search.
+
+Two targets are available:
+
+-> In-process:  The Flask application is called through its test client, using the database configured in
+                conf/rest_api.cfg (a local or disposable PostgreSQL instance). The requests are sent one by one and
+                the SQL statements are counted.
+-> HTTP:        A running API (for example uWSGI with several workers) is called with the given URL. The requests
+                are sent by a pool of concurrent clients.
+
+The LEAs are built from the samples of DemoRestAPI/data (payload, rating and extra values), completed with the
+fields required by the current Common Data format: action, user, pilot, location, position, timestamp and data
+source type. Every LEA has a different timestamp, so they are never rejected as duplicated. The measures are daily
+values of some detection variables of the base data, each one in a different day. The searches ask for the LEAs of
+the benchmark user.
+
+Usage example:
+
+    python benchmark/rest_ingest_benchmark.py -b 1,10,50 -n 100 -o ingest.json
+    python benchmark/rest_ingest_benchmark.py -u http://localhost:5000 -b 1,10 -c 1,4,8 -n 200
+    python benchmark/rest_ingest_benchmark.py -e add_measure,search -b 10,100 -n 50
+
+"""
+
+import os
+import sys
+import json
+import getopt
+import random
+import platform
+import datetime
+import threading
+
+from base64 import b64encode
+from multiprocessing.pool import ThreadPool
+from timeit import default_timer
+
+import numpy as np
+
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+basedir = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+SAMPLES_FILE = os.path.join(basedir, '..', 'DemoRestAPI', 'data', 'json_data_sample.txt')
+
+ENDPOINTS = ['add_action', 'add_measure', 'search']
+
+# Detection variables of the generated measures and the range of their daily values
+MEASURE_SAMPLES = [
+    ('walk_steps', 500, 12000),
+    ('shops_visits', 0, 5),
+    ('phonecalls_placed_perc', 0, 100),
+    ('sleep_time', 14400, 36000),
+    ('heart_rate', 50, 110)
+]
+
+DEFAULT_PARAMETERS = {
+    'url': None,                                    # URL of a running API. None to use the in-process application
+    'username': 'admin',
+    'password': 'admin',
+    'token': False,                                 # Authenticate with a token obtained from login
+    'api': '0.1',
+    'user': 'eu:c4a:user:9',                        # User in role sending the LEAs and measures
+    'pilot': 'LCC',                                 # Pilot of the user
+    'action': 'eu:c4a:POI_EXIT',
+    'location': 'eu:c4a:Pharmacy:Vanilla123',
+    'endpoints': list(ENDPOINTS),                   # Measured endpoints
+    'batches': [1, 10, 50],                         # Number of items of each request
+    'concurrency': [1],                             # Number of concurrent clients (HTTP only)
+    'requests': 50,                                 # Number of requests of each configuration
+    'seed': 4
+}
+
+
+class PayloadGenerator(object):
+
+    def __init__(self, p_parameters):
+        """
+        Builds the bodies of the requests: LEAs from the samples of the demo application, measures and searches
+
+
+        :param p_parameters: A dict with the parameters of the benchmark (see DEFAULT_PARAMETERS)
+
+        :return: Instance of the class
+        """
+        self.parameters = p_parameters
+        self.random = random.Random(p_parameters['seed'])
+        with open(SAMPLES_FILE) as samples:
+            self.samples = json.load(samples)
+        # The timestamps start at the current time, so the LEAs of different executions are not duplicated
+        self.timestamp = datetime.datetime.utcnow().replace(microsecond=0)
+        # The measures are daily, starting at the current day
+        self.day = datetime.datetime.combine(self.timestamp.date(), datetime.time())
+        self.lock = threading.Lock()
+
+    def lea(self):
+        """
+        Builds a new LEA
+
+        :return: A dict with the LEA
+        """
+        sample = self.random.choice(self.samples)
+        with self.lock:
+            self.timestamp += datetime.timedelta(milliseconds=1)
+            timestamp = self.timestamp
+        return {
+            'action': self.parameters['action'],
+            'user': self.parameters['user'],
+            'pilot': self.parameters['pilot'],
+            'location': self.parameters['location'],
+            'position': '38.976908 22.724375',
+            'timestamp': timestamp.isoformat() + '+00:00',
+            'payload': sample['payload'],
+            'rating': sample['rating'],
+            'data_source_type': ['sensors'],
+            'extra': sample['extra']
+        }
+
+    def measure(self):
+        """
+        Builds a new measure with the values of a day
+
+        :return: A dict with the measure
+        """
+        with self.lock:
+            self.day += datetime.timedelta(days=1)
+            day = self.day
+        payload = {}
+        for name, minimum, maximum in MEASURE_SAMPLES:
+            payload[name.upper()] = {'value': self.random.randint(minimum, maximum),
+                                     'data_source_type': ['sensors']}
+        return {
+            'user': self.parameters['user'],
+            'pilot': self.parameters['pilot'],
+            'interval_start': day.isoformat() + '+00:00',
+            'duration': 'DAY',
+            'payload': payload
+        }
+
+    def search(self, p_limit):
+        """
+        Builds a search of the LEAs of the user
+
+        :param p_limit: The maximum number of returned rows
+        :return: A dict with the search
+        """
+        return {
+            'table': 'executed_action',
+            'criteria': {
+                'user_in_role_id': self.parameters['user']
+            },
+            'limit': p_limit,
+            'order_by': self.random.choice(['asc', 'desc'])
+        }
+
+    def batch(self, p_endpoint, p_size):
+        """
+        Builds the JSON body of a request
+
+        :param p_endpoint: The name of the endpoint
+        :param p_size: The number of items of the request
+        :return: A JSON string with a list of LEAs or measures, or with a search
+        """
+        if p_endpoint == 'add_action':
+            return json.dumps([self.lea() for _ in xrange(p_size)])
+        elif p_endpoint == 'add_measure':
+            return json.dumps([self.measure() for _ in xrange(p_size)])
+        return json.dumps(self.search(p_size))
+
+
+class InProcessClient(object):
+
+    def __init__(self):
+        """
+        Client calling the Flask application in this process. The SQL statements executed by every engine are counted
+
+
+        :return: Instance of the class
+        """
+        sys.path.insert(0, basedir)
+        from sqlalchemy import event
+        from sqlalchemy.engine import Engine
+        from src.packFlask.api import app
+        self.app = app.test_client()
+        self.statements = 0
+        event.listen(Engine, 'before_cursor_execute', self._count_statement)
+
+    def _count_statement(self, *args):
+        self.statements += 1
+
+    def get(self, p_path, p_headers):
+        response = self.app.get(p_path, headers=p_headers)
+        return response.status_code, response.data
+
+    def post(self, p_path, p_data, p_headers):
+        response = self.app.post(p_path, data=p_data, content_type='application/json', headers=p_headers)
+        return response.status_code, response.data
+
+
+class HttpClient(object):
+
+    def __init__(self, p_url):
+        """
+        Client calling a running API. Each thread uses its own HTTP session
+
+
+        :param p_url: The base URL of the API
+
+        :return: Instance of the class
+        """
+        import requests
+        self.requests = requests
+        self.url = p_url.rstrip('/')
+        self.statements = None
+        self.local = threading.local()
+
+    def _session(self):
+        if not hasattr(self.local, 'session'):
+            self.local.session = self.requests.Session()
+        return self.local.session
+
+    def get(self, p_path, p_headers):
+        response = self._session().get(self.url + p_path, headers=p_headers)
+        return response.status_code, response.content
+
+    def post(self, p_path, p_data, p_headers):
+        headers = dict(p_headers)
+        headers['Content-Type'] = 'application/json'
+        response = self._session().post(self.url + p_path, data=p_data, headers=headers)
+        return response.status_code, response.content
+
+
+def authorization(p_client, p_parameters):
+    """
+    Builds the authorization header, obtaining a token from the login endpoint if it is requested
+
+    :param p_client: The client of the API
+    :param p_parameters: A dict with the parameters of the benchmark
+
+    :return: A dict with the HTTP headers
+    """
+    credentials = "%s:%s" % (p_parameters['username'], p_parameters['password'])
+    headers = {'Authorization': 'Basic ' + b64encode(credentials)}
+    if p_parameters['token']:
+        status, data = p_client.get('/api/%s/login' % p_parameters['api'], headers)
+        if status != 200:
+            raise Exception("The login failed with the status %s" % status)
+        headers = {'Authorization': 'Basic ' + b64encode("%s:unused" % json.loads(data)['token'])}
+    return headers
+
+
+def run_configuration(p_client, p_generator, p_headers, p_parameters, p_endpoint, p_batch, p_concurrency):
+    """
+    Sends the requests of one configuration and measures them
+
+    :param p_client: The client of the API
+    :param p_generator: The PayloadGenerator instance
+    :param p_headers: The HTTP headers with the authorization
+    :param p_parameters: A dict with the parameters of the benchmark
+    :param p_endpoint: The name of the endpoint
+    :param p_batch: The number of items of each request
+    :param p_concurrency: The number of concurrent clients
+
+    :return: A dict with the results of the configuration
+    """
+    path = '/api/%s/%s' % (p_parameters['api'], p_endpoint)
+    bodies = [p_generator.batch(p_endpoint, p_batch) for _ in xrange(p_parameters['requests'])]
+
+    def send(p_body):
+        statements = p_client.statements
+        start = default_timer()
+        status, _ = p_client.post(path, p_body, p_headers)
+        latency = default_timer() - start
+        return status, latency, p_client.statements - statements if statements is not None else None
+
+    start = default_timer()
+    if p_concurrency > 1:
+        pool = ThreadPool(p_concurrency)
+        try:
+            responses = pool.map(send, bodies)
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        responses = [send(body) for body in bodies]
+    elapsed = default_timer() - start
+
+    latencies = np.array([latency for _, latency, _ in responses]) * 1000
+    statuses = {}
+    for status, _, _ in responses:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    stored = sum(p_batch for status, _, _ in responses if status == 200)
+    result = {
+        'endpoint': p_endpoint,
+        'batch': p_batch,
+        'concurrency': p_concurrency,
+        'requests': len(responses),
+        'status': statuses,
+        'elapsed': elapsed,
+        'requests_per_second': len(responses) / elapsed,
+        'items_per_second': stored / elapsed,
+        'latency_ms': {
+            'mean': float(latencies.mean()),
+            'p50': float(np.percentile(latencies, 50)),
+            'p95': float(np.percentile(latencies, 95)),
+            'p99': float(np.percentile(latencies, 99))
+        },
+        'statements_per_request': None,
+        'statements_per_item': None
+    }
+    if p_client.statements is not None:
+        statements = [count for _, _, count in responses]
+        result['statements_per_request'] = float(np.mean(statements))
+        result['statements_per_item'] = float(np.sum(statements)) / (p_batch * len(responses))
+    return result
+
+
+def benchmark(p_parameters):
+    """
+    Runs every combination of endpoint, batch size and concurrency
+
+    :param p_parameters: A dict with the parameters of the benchmark (see DEFAULT_PARAMETERS)
+
+    :return: A dict with the parameters, the environment and the results of each configuration
+    """
+    if p_parameters['url']:
+        client = HttpClient(p_parameters['url'])
+        concurrency = p_parameters['concurrency']
+    else:
+        # The application keeps the database sessions and the user in global variables
+        client = InProcessClient()
+        concurrency = [1]
+    generator = PayloadGenerator(p_parameters)
+    headers = authorization(client, p_parameters)
+    results = []
+    for endpoint in p_parameters['endpoints']:
+        for batch in p_parameters['batches']:
+            for clients in concurrency:
+                results.append(run_configuration(client, generator, headers, p_parameters, endpoint, batch, clients))
+    return {
+        'benchmark': 'rest_ingest',
+        'target': p_parameters['url'] or 'in-process',
+        'date': datetime.datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'parameters': p_parameters,
+        'results': results
+    }
+
+
+def parse_args(argv):
+    """
+    Parses the arguments from command line
+
+    :param argv: the arguments to be parsed as passed to the function
+
+    :return: A tuple with the dict of parameters and the output file name (None for the standard output)
+    """
+    usage = 'rest_ingest_benchmark.py [-u <url>] [-U <username>] [-P <password>] [-k] [-e <endpoints>] ' \
+            '[-b <batch sizes>] [-c <concurrency levels>] [-n <requests>] [-s <seed>] [-o <outputfile>]'
+    parameters = dict(DEFAULT_PARAMETERS)
+    outputfile = None
+    try:
+        opts, args = getopt.getopt(argv, "hu:U:P:ke:b:c:n:s:o:", ["url=", "username=", "password=", "token",
+                                                                   "endpoints=", "batches=", "concurrency=",
+                                                                   "requests=", "seed=", "ofile="])
+    except getopt.GetoptError:
+        print usage
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print usage
+            sys.exit()
+        elif opt in ("-u", "--url"):
+            parameters['url'] = arg
+        elif opt in ("-U", "--username"):
+            parameters['username'] = arg
+        elif opt in ("-P", "--password"):
+            parameters['password'] = arg
+        elif opt in ("-k", "--token"):
+            parameters['token'] = True
+        elif opt in ("-e", "--endpoints"):
+            parameters['endpoints'] = arg.split(',')
+            if not set(parameters['endpoints']).issubset(ENDPOINTS):
+                print usage
+                sys.exit(2)
+        elif opt in ("-b", "--batches"):
+            parameters['batches'] = [int(size) for size in arg.split(',')]
+        elif opt in ("-c", "--concurrency"):
+            parameters['concurrency'] = [int(clients) for clients in arg.split(',')]
+        elif opt in ("-n", "--requests"):
+            parameters['requests'] = int(arg)
+        elif opt in ("-s", "--seed"):
+            parameters['seed'] = int(arg)
+        elif opt in ("-o", "--ofile"):
+            outputfile = arg
+    return parameters, outputfile
+
+
+def main(argv):
+    """
+    Runs the benchmark and writes the results as JSON
+
+    :param argv: the arguments as passed to the script
+
+    :return: None
+    """
+    parameters, outputfile = parse_args(argv[1:])
+    report = benchmark(parameters)
+    # The password is not written in the report
+    report['parameters'] = dict(report['parameters'], password='*****')
+    report = json.dumps(report, indent=2, sort_keys=True)
+    if outputfile:
+        with open(outputfile, 'w') as output:
+            output.write(report + '\n')
+    else:
+        print report
+
+
+if __name__ == '__main__':
+    main(sys.argv)
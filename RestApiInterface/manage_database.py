@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+
+"""
+Creates the database of the API and inserts its base data.
+
+The API doesn't create the database when it starts: it only checks the schema version marker of both schemas. This
+script must be executed once when the project is installed and every time the schema version changes:
+
+    python manage_database.py -g        # Creates the schemas, their base data and the schema version markers
+    python manage_database.py -c        # Checks the schema version markers
+    python manage_database.py -p        # Creates the monthly partitions of the next months for the LEA tables
+    python manage_database.py -a        # Moves the AR LEAs older than the horizon of each pilot to the archive
+    python manage_database.py -r        # Updates the daily LEA rollups of the Shared Repository
+    python manage_database.py -n        # Computes the NUIs of the last months of every pilot
+
+The partitions and the rollups must be updated periodically, with a weekly and an hourly cron job. The archive horizons and directory
+are configured in the 'lea_archive' section of conf/rest_api.cfg.
+
+"""
+
+import sys
+import getopt
+import logging
+
+from src.packORM import database_generator, partitioning, lea_archive, lea_rollup, nui_engine, ar_tables, sr_tables
+from src.packControllers import ar_post_orm, sr_post_orm
+
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+def parse_args(argv):
+    """
+    Parses the arguments from command line
+
+    :param argv: the arguments to be parsed as passed to the function
+
+    :return: 'generate', 'check', 'partitions', 'archive', 'rollups' or 'nuis'
+    """
+    usage = 'manage_database.py -g | -c | -p | -a | -r | -n'
+    command = None
+    try:
+        opts, args = getopt.getopt(argv, "hgcparn", ["generate", "check", "partitions", "archive", "rollups",
+                                                     "nuis"])
+    except getopt.GetoptError:
+        print usage
+        sys.exit(2)
+    for opt, arg in opts:
+        if opt == '-h':
+            print usage
+            sys.exit()
+        elif opt in ("-g", "--generate"):
+            command = 'generate'
+        elif opt in ("-c", "--check"):
+            command = 'check'
+        elif opt in ("-p", "--partitions"):
+            command = 'partitions'
+        elif opt in ("-a", "--archive"):
+            command = 'archive'
+        elif opt in ("-r", "--rollups"):
+            command = 'rollups'
+        elif opt in ("-n", "--nuis"):
+            command = 'nuis'
+    if command is None:
+        print usage
+        sys.exit(2)
+    return command
+
+
+def main(argv):
+    """
+    Executes the given command
+
+    :param argv: the arguments as passed to the script
+
+    :return: The exit status of the script
+    """
+    command = parse_args(argv[1:])
+    logging.basicConfig(level=logging.INFO)
+    ar_database = ar_post_orm.ARPostORM()
+    sr_database = sr_post_orm.SRPostORM()
+    try:
+        if command == 'partitions':
+            for tables, database in ((ar_tables, ar_database), (sr_tables, sr_database)):
+                created = partitioning.create_future_partitions(database.session.connection(), tables)
+                database.commit()
+                print "Created %s partitions in %s" % (len(created), tables.Base.metadata.schema)
+            return 0
+        if command == 'archive':
+            # Only the Activity Recognition schema reads back the archived LEAs
+            segments = lea_archive.archive_leas(ar_database)
+            print "Archived %s rows in %s segments of %s" % (sum(segment['rows'] for segment in segments),
+                                                            len(segments), ar_tables.Base.metadata.schema)
+            return 0
+        if command == 'rollups':
+            print "Computed %s days of users" % lea_rollup.update_rollups(sr_database)
+            return 0
+        if command == 'nuis':
+            for pilot in sr_database.session.query(sr_tables.Pilot).all():
+                inserted, updated = nui_engine.compute_nuis(sr_database, pilot.pilot_code)
+                sr_database.commit()
+                print "Inserted %s and updated %s NUI values of %s" % (inserted, updated, pilot.pilot_code)
+            return 0
+        if command == 'generate':
+            database_generator.generate_database(ar_database, sr_database)
+        if database_generator.check_database(ar_database, sr_database):
+            print "The database schema version is %s" % database_generator.SCHEMA_VERSION
+            return 0
+        return 1
+    finally:
+        ar_database.close()
+        sr_database.close()
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
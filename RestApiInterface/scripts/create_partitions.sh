@@ -0,0 +1,14 @@
+#!/bin/bash
+
+#################################################################
+########
+########       Partitions script
+########
+########       Creates the monthly partitions of the following months for the LEA tables. It is installed
+########       as a weekly cron job.
+########
+#################################################################
+
+cd /opt/c4a_data_repository/RestApiInterface || exit 1
+source ./bin/activate
+python manage_database.py -p
@@ -0,0 +1,14 @@
+#!/bin/bash
+
+#################################################################
+########
+########       Rollups script
+########
+########       Updates the daily LEA rollups of the Shared Repository. It is installed
+########       as an hourly cron job.
+########
+#################################################################
+
+cd /opt/c4a_data_repository/RestApiInterface || exit 1
+source ./bin/activate
+python manage_database.py -r
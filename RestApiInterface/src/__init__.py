@@ -10,8 +10,6 @@ import sys
 from logging.handlers import RotatingFileHandler
 import jinja2
 
-from src.packORM import database_generator
-from src.packControllers import ar_post_orm, sr_post_orm
 from src.packFlask.api import app as application
 
 
@@ -27,9 +25,7 @@ sys.path.insert(0, basedir)
 # Create the log folder if not exists
 if not os.path.exists(os.path.join(basedir, "./log")):
     os.makedirs(os.path.join(basedir, "./log"))
-# Check if database is created and inserts data if it is necessary
-logging.debug("Checking if database is created and creating it if it is necessary")
-database_generator.generate_database(ar_post_orm.ARPostORM(), sr_post_orm.SRPostORM())
+# The database is created with manage_database.py. The API only checks its schema version on the first request
 # Setting logging handlers
 logHandler = RotatingFileHandler(os.path.join(basedir, "./log/info.log"), maxBytes=1024 * 1024 * 100,
                                  backupCount=20)
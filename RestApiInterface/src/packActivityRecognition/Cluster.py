@@ -1,5 +1,7 @@
 # -*- coding: utf-8 -
 
+from array import array
+
 from Pattern import Pattern
 
 __author__ = 'Gorka Azkune'
@@ -12,42 +14,62 @@ __email__ = "gorka.azkune@deusto.es"
 __status__ = "Prototype"
 
 
-class Cluster:
-    def __init__(self):
+class Cluster(object):
+
+    __slots__ = ('patternlist', 'patternindices', 'number')
+
+    def __init__(self, patternlist=None):
         """ Constructor
         
         Usage example:
-            cluster = Cluster()
+            cluster = Cluster(patternlist)
             
         Parameters
         ----------
-        None
+        patternlist : list
+            the list of patterns referenced by the cluster
             
         Returns
         ----------
         Instance of the class
         
         """
-        self.patterns = []
+        self.patternlist = patternlist if patternlist is not None else []
+        self.patternindices = array('i')
         self.number = -1
-        
-    def add_pattern(self, pattern):
+
+    @property
+    def patterns(self):
+        """ Patterns of the cluster
+
+        Usage example:
+            patterns = cluster.patterns
+
+        Returns
+        ----------
+        patterns : list
+            a list of instances of the Pattern class
+
+        """
+        return [self.patternlist[index] for index in self.patternindices]
+
+    def add_pattern(self, index):
         """ Method to add a pattern to the instance
         
         Usage example:
-            add_pattern(pattern)
+            add_pattern(5)
             
         Parameters
         ----------
-        pattern : Pattern
-            a instance of the Pattern class 
+        index : integer
+            the index of the pattern in the pattern list of the cluster
             
         Returns
         ----------
         None
         
         """
-        self.patterns.append(pattern)
+        self.patternindices.append(index)
         
     def set_number(self, number):
         """ Setter for attribute number
@@ -82,7 +104,7 @@ class Cluster:
         None
         
         """
-        self.patterns = []
+        self.patternindices = array('i')
         self.number = -1
         
     def print_cluster(self):
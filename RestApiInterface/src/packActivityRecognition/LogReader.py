@@ -4,9 +4,10 @@ This tool is to read and structure the log generated by AD tool
 from CASAS
 """
 
+import re
 import sys, getopt
-from copy import deepcopy
 import os.path
+from StringIO import StringIO
 
 from Pattern import Pattern
 from Cluster import Cluster
@@ -21,6 +22,16 @@ __maintainer__ = "Gorka Azkune"
 __email__ = "gorka.azkune@deusto.es"
 __status__ = "Prototype"
 
+
+# Matchers of the lines of the log
+ITERATION_LINE = re.compile(r'------- Iteration (\d+),')
+PATTERN_LINE = re.compile(r'Pattern: value = ([^,\s]+),? .*instances = (\d+)')
+EVENT_LINE = re.compile(r'event \(\d+\) (\S+)')
+CLUSTER_LINE = re.compile(r'Cluster (\d+)\b')
+CLUSTER_PATTERN_LINE = re.compile(r'\[(\d+)\]')
+END_OF_PATTERNS = 'No more compression can be achieved.'
+
+
 class LogReader:
     
     def __init__(self, logfile):
@@ -31,16 +42,23 @@ class LogReader:
             
         Parameters
         ----------
-        inputfile_name : string
-            the name of a text file generated as a log of the AD tool        
+        inputfile_name : string or file
+            the name of a text file generated as a log of the AD tool, or an open file object with its content
             
         Returns
         ----------
         Instance of the class
         
         """
-        self.logfile = open(logfile, 'r')
-        self.filename = logfile
+        if isinstance(logfile, basestring):
+            self.logfile = open(logfile, 'r')
+            self.filename = logfile
+            self.owned = True
+        else:
+            self.logfile = logfile
+            self.filename = getattr(logfile, 'name', None)
+            self.owned = False
+        self.parsed = False
         self.patternlist = []
         self.clusterlist = []
         self.maxPatternValue = 0
@@ -48,15 +66,36 @@ class LogReader:
         self.maxInstances = 0
         self.minInstances = sys.maxint        
         
+    @classmethod
+    def from_text(cls, text):
+        """ Constructor for a log already loaded in memory
+        
+        Usage example:
+            logreader = LogReader.from_text(text)
+            
+        Parameters
+        ----------
+        text : string
+            the content of the log generated by the AD tool
+            
+        Returns
+        ----------
+        Instance of the class
+        
+        """
+        return cls(StringIO(text))
     
     def __del__(self):
         """ Destructor
         """
-        self.logfile.close()
+        if getattr(self, 'owned', False):
+            self.logfile.close()
         
     # Method to parse the log file calling to parse_patterns and parse_clusters
     def parse_log(self):
-        """ Method to parse the log file calling to parse_patterns and parse_clusters
+        """ Method to parse the patterns and the clusters of the log file. The log is read once, line by line, so
+        it is not loaded in memory. Patterns are parsed until the end of the compression and clusters refer to
+        the parsed patterns. Parsing an already parsed log does nothing.
                     
         Usage example:
             parse_log()
@@ -70,13 +109,80 @@ class LogReader:
         None
         
         """
-        
-        self.parse_patterns()
-        self.parse_clusters()        
-        
-        
+        if self.parsed:
+            return
+        self.parsed = True
+        # Auxiliar instances for the pattern and cluster being parsed
+        pattern = Pattern()
+        cluster = Cluster(self.patternlist)
+        patterns_done = False
+
+        for line in self.logfile:
+            if not patterns_done:
+                match = ITERATION_LINE.search(line)
+                if match is not None:
+                    if pattern.number != -1:
+                        pattern.print_pattern()
+                        self.patternlist.append(pattern)
+                        #print 'Pattern added to patternlist'
+                    pattern = Pattern()
+                    pattern.set_number(int(match.group(1)))
+                    continue
+
+                match = PATTERN_LINE.search(line)
+                if match is not None:
+                    pattern.set_value(float(match.group(1)))
+                    # Update maxPatternValue and minPatternValue if needed
+                    if pattern.value > self.maxPatternValue:
+                        self.maxPatternValue = pattern.value
+                    if pattern.value < self.minPatternValue:
+                        self.minPatternValue = pattern.value
+
+                    pattern.set_instances(int(match.group(2)))
+                    # Update maxInstances and minInstances if needed
+                    if pattern.instances > self.maxInstances:
+                        self.maxInstances = pattern.instances
+                    if pattern.instances < self.minInstances:
+                        self.minInstances = pattern.instances
+                    continue
+
+                match = EVENT_LINE.search(line)
+                if match is not None:
+                    action = match.group(1)
+                    # Unfold any pattern that may be inside this one
+                    if action.find('Pat_') != -1:
+                        # There is a pattern instead of an action
+                        pattindex = int(action.split('_')[1])
+                        pattern.actionids.extend(self.patternlist[pattindex].actionids)
+                    else:
+                        pattern.append_action(action)
+                    continue
+
+                if line.find(END_OF_PATTERNS) != -1:
+                    patterns_done = True
+                    continue
+
+            # Clusters
+            if line.startswith('Cluster '):
+                match = CLUSTER_LINE.match(line)
+                if match is not None:
+                    if cluster.number != -1:
+                        self.clusterlist.append(cluster)
+                    cluster = Cluster(self.patternlist)
+                    cluster.set_number(int(match.group(1)))
+                continue
+
+            if line.find('[') != -1 and line.find('event') == -1 and len(self.patternlist) > 0:
+                match = CLUSTER_PATTERN_LINE.search(line)
+                if match is not None:
+                    # We have a line of patterns
+                    cluster.add_pattern(int(match.group(1)))
+
+        if len(self.patternlist) == 0:
+            print 'Pattern have to be parsed before clusters'
+
     def parse_patterns(self):
-        """ Method to parse de patterns from the logfile
+        """ Method to parse de patterns from the logfile. Patterns and clusters are parsed together by parse_log
                     
         Usage example:
             parse_patterns()
@@ -90,76 +196,10 @@ class LogReader:
         None
         
         """
-        
-        # Bring the cursor to the beginning
-        self.logfile.seek(0)
-        # define some position variables for file parsing    
-        valuepos = 3
-        numpos = 2
-        instpos = 8
-        actionpos = 5
-        # Auxiliar instance for a pattern
-        pattern = Pattern()
-       
-        for line in self.logfile:      
-            if line.find('------- Iteration') != -1:                
-                elems = line.split(' ')
-                if pattern.number != -1:
-                    pattern.print_pattern()
-                    self.patternlist.append(deepcopy(pattern))
-                    #print 'Pattern added to patternlist'
-                pattern.reset()            
-                pattern.set_number(int(elems[numpos].strip(',')))
-                #print 'Iteration ', pattern.number
-                       
-            if line.find('Pattern:') != -1:
-                #print 'Pattern found!'
-                elems = line.split(' ')
-                pattern.set_value(float(elems[valuepos].strip(',')))
-                # Update maxPatternValue and minPatternValue if needed
-                if pattern.value > self.maxPatternValue:
-                    self.maxPatternValue = pattern.value
-                if pattern.value < self.minPatternValue:
-                    self.minPatternValue = pattern.value
-                       
-                pattern.set_instances(int(elems[instpos]))
-                # Update maxInstances and minInstances if needed
-                if pattern.instances > self.maxInstances:
-                    self.maxInstances = pattern.instances
-                if pattern.instances < self.minInstances:
-                    self.minInstances = pattern.instances
-                       
-                #print '  value:', pattern.value
-                #print '  instances:', pattern.instances
-                      
-            if line.find('event (') != -1:
-                elems = line.split(' ')
-                # Unfold any pattern that may be inside this one
-                if elems[actionpos].find('Pat_') != -1:
-                    #print 'action: ', elems[actionpos]
-                    # There is a pattern instead of an action
-                    newelems = elems[actionpos].split('_')
-                    pattindex = int(newelems[1])
-                    #print 'pattern index:', pattindex
-                    #patternlist[pattindex].print_pattern()
-                    #actions = patternlist[pattindex].actions
-                    #print actions
-    
-                    for action in self.patternlist[pattindex].actions:
-                        #print action
-                        pattern.append_action(action)
-                        
-                else:
-                    pattern.append_action(elems[actionpos])
-                    #print '  action:', elems[actionpos]
-                         
-            if line.find('No more compression can be achieved.') != -1:
-                #print 'Exit loop!'          
-                break
-             
-    
+        self.parse_log()
+
     def parse_clusters(self):
-        """ Method to parse the clusters from the logfile
+        """ Method to parse the clusters from the logfile. Patterns and clusters are parsed together by parse_log
                     
         Usage example:
             parse_clusters()
@@ -173,32 +213,7 @@ class LogReader:
         None
         
         """
-        if len(self.patternlist) == 0:
-            print 'Pattern have to be parsed before clusters'
-            return
-        # Bring the cursor to the beginning
-        self.logfile.seek(0)
-    
-        # Auxiliar cluster
-        cluster = Cluster()
-            
-        for line in self.logfile:
-            elems = []
-            elems = line.split(' ')
-            if elems[0] == 'Cluster':
-                if cluster.number != -1:
-                    self.clusterlist.append(deepcopy(cluster))
-                    cluster.reset()
-                cluster.set_number(int(elems[1]))
-                #print 'Cluster', cluster.number
-        
-            if line.find('[') != -1 and line.find(']') != -1 and line.find('event') == -1:
-                # We have a line of patterns
-                elems = line.split('[')
-                newelems = elems[1].split(']')
-                pattindex = int(newelems[0])
-                cluster.add_pattern(self.patternlist[pattindex])
-                #print '  ', pattindex
+        self.parse_log()
 
 ########################################################################################################################          
  
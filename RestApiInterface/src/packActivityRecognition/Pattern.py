@@ -3,6 +3,8 @@
 Class Pattern to represent a pattern found by AD
 """
 
+from array import array
+
 __author__ = 'Gorka Azkune'
 __copyright__ = "Copyright 2017, City4Age project"
 __credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
@@ -13,9 +15,41 @@ __email__ = "gorka.azkune@deusto.es"
 __status__ = "Prototype"
 
 
+# Vocabulary of the actions of the patterns. Patterns store the ids of their actions and every action name is
+# kept only once
+ACTION_IDS = {}
+ACTION_NAMES = []
+
+
+def action_id(action):
+    """ Function to obtain the id of an action, adding it to the vocabulary if it is new
+
+    Usage example:
+        actionid = action_id("hasCoffee")
+
+    Parameters
+    ----------
+    action : string
+        a string with the action name
+
+    Returns
+    ----------
+    actionid : int
+        the id of the action in ACTION_NAMES
+
+    """
+    actionid = ACTION_IDS.get(action)
+    if actionid is None:
+        actionid = len(ACTION_NAMES)
+        ACTION_NAMES.append(intern(action) if isinstance(action, str) else action)
+        ACTION_IDS[ACTION_NAMES[actionid]] = actionid
+    return actionid
+
+
+class Pattern(object):
+
+    __slots__ = ('value', 'actionids', 'number', 'instances')
 
-class Pattern:
-    
     def __init__(self):
         """ Constructor
         
@@ -33,8 +67,8 @@ class Pattern:
         """
         # Pattern value calculated by AD
         self.value = 0.0
-        # Actions or events inside the pattern
-        self.actions = []
+        # Ids of the actions or events inside the pattern (see action_id)
+        self.actionids = array('i')
         # The pattern number assigned by AD
         self.number = -1
         # The number of instances of this pattern found
@@ -58,7 +92,22 @@ class Pattern:
         
         """
         self.value = value
-        
+
+    @property
+    def actions(self):
+        """ Names of the actions or events inside the pattern
+
+        Usage example:
+            actions = pattern.actions
+
+        Returns
+        ----------
+        actions : list
+            a list of strings with the action names
+
+        """
+        return [ACTION_NAMES[actionid] for actionid in self.actionids]
+
     def append_action(self, action):
         """ Method to append an action to the instance
         
@@ -75,7 +124,7 @@ class Pattern:
         None
         
         """
-        self.actions.append(action)
+        self.actionids.append(action_id(action))
         
     def set_number(self, number):
         """ Setter for attribute number
@@ -129,7 +178,7 @@ class Pattern:
         
         """
         self.value = 0.0
-        self.actions = []
+        self.actionids = array('i')
         self.number = -1
         self.instances = 0
         
@@ -5,6 +5,7 @@
 # Based on the LEAS send by the users and the stored EAMS
 
 import ad_pattern_filter
+import casas_executor
 import Cluster
 import expert_activity_model
 import kasteren_data_transformer
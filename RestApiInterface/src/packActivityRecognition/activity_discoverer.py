@@ -27,20 +27,24 @@ Transactions on Systems, Man, and Cybernetics, Part B, 2013.
 
 import os
 import io
+import json
+import hashlib
 import inspect
+import ConfigParser
 import arrow
 import logging
 import csv
 import pandas as pd
 
 from collections import OrderedDict
-from subprocess import PIPE, STDOUT, Popen, CalledProcessError
 
 from pattern_model_matching import PatternModelMatching
 from expert_activity_model import ExpertActivityModel
+from casas_executor import CasasExecutor
 
 
 from src.packControllers import ar_post_orm
+from src.packUtils import statement_counter
 
 
 #import sys
@@ -63,12 +67,31 @@ DATA_FILE = 'casas.csv'
 DATA_FILE_ANNOTATED = 'casas.csv.annotated'
 CONFIG_FILE = 'casas.config'
 LOG_FILE = 'casas_log.txt'
+RESULT_FILE = 'casas_final_%s.csv'
+FINGERPRINT_FILE = 'casas_final_%s.fingerprint'
+# Each user runs CASAS inside its own directory
+WORKING_DIR = 'casas_%s'
 
 
 # Casas configuration directories
 current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
 casas_execution_file = os.path.abspath(current_dir + '../../../al/bin/al')
 
+# Casas execution settings
+config = ConfigParser.ConfigParser()
+config.read(os.path.abspath(current_dir + '../../../conf/rest_api.cfg'))
+
+CASAS_EXECUTION = {
+    'max_processes': 2,             # AL processes running at the same time
+    'timeout': 3600,                # Wall-clock seconds of each run
+    'cpu_limit': None,              # CPU seconds of each run
+    'memory_limit': None            # Megabytes of address space of each run
+}
+if 'activity_discoverer' in config.sections():
+    for option in CASAS_EXECUTION:
+        if config.has_option('activity_discoverer', option) and config.get('activity_discoverer', option):
+            CASAS_EXECUTION[option] = config.getint('activity_discoverer', option)
+
 
 class ActivityDiscoverer(object):
 
@@ -76,6 +99,10 @@ class ActivityDiscoverer(object):
     def __init__(self):
         # Initialing database connector
         self.database = ar_post_orm.ARPostORM()
+        # Initialing the CASAS executor
+        self.executor = CasasExecutor(casas_execution_file, CASAS_EXECUTION['max_processes'],
+                                      CASAS_EXECUTION['timeout'], CASAS_EXECUTION['cpu_limit'],
+                                      CASAS_EXECUTION['memory_limit'])
 
     # Methods
 
@@ -114,99 +141,206 @@ class ActivityDiscoverer(object):
             start_time = arrow.get(p_start_time)
             final_date = arrow.get(p_end_time)
             # Calling to the main method to extract leas
-            list_lea = self.database.get_transformed_action(p_user_in_role, start_time, final_date)
+            with statement_counter.track("lea_extractor of the user %s" % p_user_in_role):
+                list_lea = self.database.get_transformed_action(p_user_in_role, start_time, final_date)
             logging.info("get_action: Number of extracted leas is:", len(list_lea))
 
         return list_lea
 
-    def execute_casas(self, p_list_leas):
+    def build_casas_input(self, p_list_leas):
+        """
+        By giving a set of data loaded from database, this method converts it into the CSV data and config contents
+        used by the CASAS AL. Nothing is written to disk.
+
+
+        :param p_list_leas: A set of LEAS extracted from database
+
+        :return: A tuple containing the CSV data, the config file content, the list of locations and the list of
+                executed action ids, in the same order as the CSV rows
+        :rtype tuple
+        """
+        list_of_executed_actions = []
+        list_of_locations = []
+        # Prepare the data to be introduced in Kasteren
+        list_of_sensor_actions = list()
+        list_of_ordered_kasteren = list()
+        for lea in p_list_leas:
+            local_time = lea['execution_datetime'].to('Europe/London')          # GMT+0
+            time = local_time.format('YYYY-MM-DD')
+            hour = local_time.format('HH:mm:ss')
+            kasteren_lea = OrderedDict([
+                ('lea_time', time),
+                ('lea_hour', hour),
+                ('action1', lea['action_name'].lower()),
+                ('action2', lea['action_name'].lower()),
+                ('mode', 'ON'),
+                ('tag', 'Other_Activity')])
+            list_of_ordered_kasteren.append(kasteren_lea)
+            # Adding the sensor elements to the list to be used in the config file
+            if lea['action_name'] not in list_of_sensor_actions:
+                list_of_sensor_actions.append(lea['action_name'])
+            # Adding the location
+            list_of_locations.append(lea['location_name'])
+            # Adding the executed_action into the list of locations
+            list_of_executed_actions.append(lea['executed_action_id'])
+        # Convert to csv
+        keys = list_of_ordered_kasteren[0].keys()
+        output_data = io.BytesIO()
+        dict_writer = csv.DictWriter(output_data, keys, delimiter=' ')
+        # dict_writer.writeheader()
+        dict_writer.writerows(list_of_ordered_kasteren)
+        # Building the config file structure
+        config = 'sensor ' + " ".join(str(i).lower() for i in list_of_sensor_actions)
+        config += '\nweight 1'
+        config += '\ndata ' + DATA_FILE
+        config += '\nmode 0'
+        config += '\nmodel model'
+        config += '\npredictactivity Sleep'
+
+        return output_data.getvalue(), config, list_of_locations, list_of_executed_actions
+
+    def casas_fingerprint(self, p_user_in_role, p_casas_input):
+        """
+        Computes a fingerprint of everything that determines the result of a CASAS + HARS run for a user: the CASAS
+        data and config files, the locations and executed actions merged into the annotated file and the user's EAMs.
+
+
+        :param p_user_in_role: The user in role id of affected user
+        :param p_casas_input: The tuple returned by build_casas_input
+
+        :return: An hexadecimal SHA-1 digest
+        :rtype basestring
+        """
+        data, config, list_of_locations, list_of_executed_actions = p_casas_input
+        sha = hashlib.sha1()
+        sha.update(data)
+        sha.update(config)
+        sha.update(json.dumps(list_of_locations))
+        sha.update(json.dumps(list_of_executed_actions))
+        sha.update(json.dumps(self.database.get_eam(p_user_in_role), sort_keys=True, default=str))
+        return sha.hexdigest()
+
+    def is_unchanged(self, p_user_in_role, p_fingerprint):
+        """
+        Checks if the given fingerprint is equal to the one stored with the last results of the user.
+
+
+        :param p_user_in_role: The user in role id of affected user
+        :param p_fingerprint: The fingerprint of the current run
+
+        :return: True if the last run of the user was done with the same input
+                False otherwise
+        """
+        res = False
+        fingerprint_file = FINGERPRINT_FILE % p_user_in_role
+        if os.path.exists(fingerprint_file) and os.path.exists(RESULT_FILE % p_user_in_role):
+            with open(fingerprint_file, 'r') as input_file:
+                res = input_file.read().strip() == p_fingerprint
+        return res
+
+    def store_fingerprint(self, p_user_in_role, p_fingerprint):
+        """
+        Stores the fingerprint of the input used to compute the current results of the user.
+
+
+        :param p_user_in_role: The user in role id of affected user
+        :param p_fingerprint: The fingerprint of the current run
+
+        :return: None
+        """
+        with open(FINGERPRINT_FILE % p_user_in_role, 'wb', 0) as output_file:
+            output_file.write(p_fingerprint)
+            output_file.flush()
+            os.fsync(output_file.fileno())
+
+    def prepare_casas(self, p_user_in_role, p_casas_input):
+        """
+        Writes the CASAS data and config files into the working directory of the user.
+
+
+        :param p_user_in_role: The user in role id of affected user
+        :param p_casas_input: The tuple returned by build_casas_input
+
+        :return: None
+        """
+        data, config, list_of_locations, list_of_executed_actions = p_casas_input
+        working_dir = WORKING_DIR % p_user_in_role
+        if not os.path.exists(working_dir):
+            os.makedirs(working_dir)
+        with open(os.path.join(working_dir, DATA_FILE), 'wb', 0) as output_file:
+            output_file.write(data)
+            output_file.flush()
+            os.fsync(output_file.fileno())
+        # Saving the config file
+        with open(os.path.join(working_dir, CONFIG_FILE), 'wb', 0) as output_config_file:
+            # Writing the structure in the file
+            output_config_file.write(config)
+            output_config_file.flush()
+            os.fsync(output_config_file.fileno())
+
+    def run_casas(self, p_list_users):
+        """
+        Executes the CASAS AL for the given users, whose input files are already prepared with prepare_casas.
+        The number of concurrent executions, their timeout and resource limits are defined in the config file.
+
+
+        :param p_list_users: A list of user in role ids
+
+        :return: A list of dicts with the execution report of each user
+        :rtype list
+        """
+        jobs = [(user, WORKING_DIR % user, CONFIG_FILE, LOG_FILE) for user in p_list_users]
+        return self.executor.run(jobs)
+
+    def merge_casas_output(self, p_user_in_role, p_casas_input):
+        """
+        After a CASAS execution, puts the locations and the executed action ids of the LEAs into the annotated file.
+
+
+        :param p_user_in_role: The user in role id of affected user
+        :param p_casas_input: The tuple returned by build_casas_input
+
+        :return: None
+        """
+        data, config, list_of_locations, list_of_executed_actions = p_casas_input
+        annotated_file = os.path.join(WORKING_DIR % p_user_in_role, DATA_FILE_ANNOTATED)
+        # After sync and store the file, we are going to change the third column with the locations
+        logging.info("giving the locations in the third column")
+        # Opening the dataframe annontated file
+        # df = pd.read_csv(DATA_FILE_ANNOTATED, parse_dates=[[0, 1]], header=None, index_col=0, sep='\t')
+        df = pd.read_csv(annotated_file, header=None, index_col=0, sep='\t')
+        # Change third column
+        df[2] = list_of_locations
+        # Changes the third column with the given locations
+        df['executed_action'] = list_of_executed_actions
+        # Store the annotated data with its locations
+        df.to_csv(annotated_file, sep='\t', header=False, encoding='utf-8')
+
+    def execute_casas(self, p_user_in_role, p_list_leas, p_casas_input=None):
         """
         By giving a set of data loaded from database, this method convert data into CSV format style to be used by the
         CASAS AL and obtain new activity tagged patterns.
         
         
+        :param p_user_in_role: The user in role id of affected user
         :param p_list_leas: A set of LEAS extracted from database
+        :param p_casas_input: The tuple returned by build_casas_input if it was already computed
         :return: True if casas y executed correct
                 False otherwise
         """
 
         res = False
-        list_of_executed_actions = []
-        list_of_locations = []
 
         # Control check
         if len(p_list_leas) > 0:
             logging.info("execute_casas: converting the given LEAs list to CASAS format")
-            # Prepare the data to be introduced in Kasteren
-            list_of_sensor_actions = list()
-            list_of_ordered_kasteren = list()
-            for lea in p_list_leas:
-                local_time = lea['execution_datetime'].to('Europe/London')          # GMT+0
-                time = local_time.format('YYYY-MM-DD')
-                hour = local_time.format('HH:mm:ss')
-                kasteren_lea = OrderedDict([
-                    ('lea_time', time),
-                    ('lea_hour', hour),
-                    ('action1', lea['action_name'].lower()),
-                    ('action2', lea['action_name'].lower()),
-                    ('mode', 'ON'),
-                    ('tag', 'Other_Activity')])
-                list_of_ordered_kasteren.append(kasteren_lea)
-                # Adding the sensor elements to the list to be used in the config file
-                if lea['action_name'] not in list_of_sensor_actions:
-                    list_of_sensor_actions.append(lea['action_name'])
-                # Adding the location
-                list_of_locations.append(lea['location_name'])
-                # Adding the executed_action into the list of locations
-                list_of_executed_actions.append(lea['executed_action_id'])
-            # Convert to csv
-            keys = list_of_ordered_kasteren[0].keys()
-            with open(DATA_FILE, 'wb', 0) as output_file:
-                dict_writer = csv.DictWriter(output_file, keys, delimiter=' ')
-                # dict_writer.writeheader()
-                dict_writer.writerows(list_of_ordered_kasteren)
-                output_file.flush()
-                os.fsync(output_file.fileno())
-            # Saving the config file
-            with open(CONFIG_FILE, 'wb', 0) as output_config_file:
-                # Writing the structure in the file
-                output_config_file.write('sensor ' + " ".join(str(i).lower() for i in list_of_sensor_actions))
-                output_config_file.write('\nweight 1')
-                output_config_file.write('\ndata ' + DATA_FILE)
-                output_config_file.write('\nmode 0')
-                output_config_file.write('\nmodel model')
-                output_config_file.write('\npredictactivity Sleep')
-                output_config_file.flush()
-                os.fsync(output_config_file.fileno())
+            casas_input = p_casas_input or self.build_casas_input(p_list_leas)
+            self.prepare_casas(p_user_in_role, casas_input)
             # We save the needed file into disk, now we are going to use casas algorithm
-            try:
-                output = Popen([casas_execution_file, '-d', CONFIG_FILE], shell=False,
-                               stdout=PIPE, stderr=STDOUT)
-                out, err = output.communicate()
-                errcode = output.returncode
-                # Creating the needed output file
-                with open(LOG_FILE, 'wb', 0) as output_log_file:
-                    # Writing the log file of the algorithm
-                    output_log_file.write(out)
-                    output_log_file.flush()
-                    os.fsync(output_log_file.fileno())
-
-                # After sync and store the file, we are going to change the third column with the locations
-                logging.info("giving the locations in the third column")
-                # Opening the dataframe annontated file
-                # df = pd.read_csv(DATA_FILE_ANNOTATED, parse_dates=[[0, 1]], header=None, index_col=0, sep='\t')
-                df = pd.read_csv(DATA_FILE_ANNOTATED, header=None, index_col=0, sep='\t')
-                # Change third column
-                df[2] = list_of_locations
-                # Changes the third column with the given locations
-                df['executed_action'] = list_of_executed_actions
-                # Store the annotated data with its locations
-                df.to_csv(DATA_FILE_ANNOTATED, sep='\t', header=False, encoding='utf-8')
+            result = self.run_casas([p_user_in_role])[0]
+            if result['returncode'] == 0 and not result['timed_out']:
+                self.merge_casas_output(p_user_in_role, casas_input)
                 res = True
-
-            except CalledProcessError as e:
-                e.output()
-                logging.error("The casas execuion gives the following error: " + errcode)
         else:
             # The given list doesn't have leas, nothing to do
             logging.warning("execute_casas: the given list of extracted LEAs is empty")
@@ -223,21 +357,27 @@ class ActivityDiscoverer(object):
 
         :return: None
         """
-        # Retrieving the stored EAMs of the current user from database
-        eamlist = self._eam_extractor(p_user_in_role)
-        # Create a PatternModelMatching instance
-        pmd = PatternModelMatching(eamlist, DATA_FILE_ANNOTATED, LOG_FILE)
-        # 1º pmd.load_annotated_data <-- THIS WILL BE DELETED, USING IT WHEN YOU LOAD YOUR CSV FILE
-        # 2º pmd.process_patterns
-        # 3º pmd.store_result <-- to database
-
-        # 1º Load the annotated data into a pandas object
-        pmd.load_annotated_data()
-        # 2º Process each pattern as needed
-        pmd.process_patterns()
-        # 3º Store the result in database
-        pmd.store_result_database(self.database, p_user_in_role)
-        pmd.store_result('casas_final_%s.csv' % p_user_in_role)
+        # The SQL statements of the whole discovery run are counted
+        with statement_counter.track("discovery run of the user %s" % p_user_in_role) as statements:
+            # Retrieving the stored EAMs of the current user from database
+            eamlist = self._eam_extractor(p_user_in_role)
+            # Create a PatternModelMatching instance
+            working_dir = WORKING_DIR % p_user_in_role
+            pmd = PatternModelMatching(eamlist, os.path.join(working_dir, DATA_FILE_ANNOTATED),
+                                       os.path.join(working_dir, LOG_FILE))
+            # 1º pmd.load_annotated_data <-- THIS WILL BE DELETED, USING IT WHEN YOU LOAD YOUR CSV FILE
+            # 2º pmd.process_patterns
+            # 3º pmd.store_result <-- to database
+
+            # 1º Load the annotated data into a pandas object
+            pmd.load_annotated_data()
+            # 2º Process each pattern as needed
+            pmd.process_patterns()
+            # 3º Store the result in database
+            pmd.store_result_database(self.database, p_user_in_role)
+            pmd.store_result(RESULT_FILE % p_user_in_role)
+        logging.info("execute_hars: %d SQL statements executed in %.2f ms for the user %s",
+                     statements.statements, statements.duration * 1000, p_user_in_role)
         logging.info("execute_hars: The execution of HARS has finished successfully for the user: ", p_user_in_role)
 
     def _eam_extractor(self, p_user_in_role_id):
@@ -34,8 +34,9 @@ class ADPatternFilter:
             
         Parameters
         ----------        
-        logfile : string
-            the name of a text file generated as a log of the AD tool
+        logfile : string, file or LogReader
+            the name of a text file generated as a log of the AD tool, an open file object with its content or
+            a LogReader instance, which is reused without parsing the log again
                     
         Returns
         ----------
@@ -43,7 +44,10 @@ class ADPatternFilter:
         
         """    
         # Create an instance of LogReader
-        self.log = LogReader(logfile)
+        if isinstance(logfile, LogReader):
+            self.log = logfile
+        else:
+            self.log = LogReader(logfile)
         self.removedPatterns = []
         self.defPatternlist = []
         
@@ -62,7 +66,7 @@ class ADPatternFilter:
         None
         
         """
-        # Parse the logfile and obtain the list of patterns and clusters
+        # Parse the logfile and obtain the list of patterns and clusters (only the first time)
         self.log.parse_log()
         self.remove_patterns1()
         #self.remove_patterns2()
@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+
+"""
+Bounded executor of the CASAS AL binary.
+
+Each CASAS run is executed in the working directory of its user, so several users can be processed at the same time.
+The executor caps the number of concurrent AL processes, kills the runs exceeding a wall-clock timeout, applies CPU
+and memory rlimits to each process and streams its output to the log file as it is produced.
+
+The AL processes are started from the threads of the pool, where preexec_fn isn't safe (the forked child can block on
+a lock held by another thread). Because of that, each run starts this file as a small launcher that creates the new
+session, applies the rlimits and then replaces itself with the CASAS AL binary:
+
+    python casas_executor.py <cpu_limit> <memory_limit> <casas_binary> [args...]
+
+A limit of 0 disables it.
+
+"""
+
+import os
+import sys
+import time
+import signal
+import logging
+import resource
+import threading
+
+from multiprocessing.pool import ThreadPool
+from subprocess import PIPE, STDOUT, Popen
+
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+# The source file of this module, executed as the launcher of the AL processes
+_LAUNCHER = os.path.splitext(os.path.abspath(__file__))[0] + '.py'
+
+
+class CasasExecutor(object):
+
+    def __init__(self, p_execution_file, p_max_processes=2, p_timeout=3600, p_cpu_limit=None, p_memory_limit=None):
+        """
+        Constructor of the class
+
+
+        :param p_execution_file: The path of the CASAS AL binary
+        :param p_max_processes: Maximum number of AL processes running at the same time
+        :param p_timeout: Wall-clock seconds after which a run is killed. None disables it
+        :param p_cpu_limit: CPU seconds allowed to each run (RLIMIT_CPU). None disables it
+        :param p_memory_limit: Megabytes of address space allowed to each run (RLIMIT_AS). None disables it
+
+        :return: Instance of the class
+        """
+        self.execution_file = p_execution_file
+        self.max_processes = max(1, int(p_max_processes))
+        self.timeout = p_timeout
+        self.cpu_limit = p_cpu_limit
+        self.memory_limit = p_memory_limit
+
+    def run(self, p_jobs):
+        """
+        Executes the CASAS AL for each given job, keeping at most max_processes running at the same time.
+
+
+        :param p_jobs: A list of tuples (user_in_role, working_dir, config_file, log_file). The files are relative
+                to the working directory
+
+        :return: A list of dicts, in the same order as the given jobs, with the keys 'user_in_role', 'returncode',
+                'runtime' (seconds) and 'timed_out'
+        :rtype list
+        """
+        if len(p_jobs) == 0:
+            return []
+        pool = ThreadPool(min(self.max_processes, len(p_jobs)))
+        try:
+            results = pool.map(self._run_job, p_jobs)
+        finally:
+            pool.close()
+            pool.join()
+        return results
+
+    def _run_job(self, p_job):
+        """
+        Runs one CASAS AL process and waits for it, writing its output line by line into the log file.
+
+
+        :param p_job: A tuple (user_in_role, working_dir, config_file, log_file)
+
+        :return: A dict with the execution report of the job
+        """
+        user_in_role, working_dir, config_file, log_file = p_job
+        result = {
+            'user_in_role': user_in_role,
+            'returncode': None,
+            'runtime': 0.0,
+            'timed_out': False
+        }
+        command = [sys.executable, _LAUNCHER, str(int(self.cpu_limit or 0)), str(int(self.memory_limit or 0)),
+                   os.path.abspath(self.execution_file), '-d', config_file]
+        start = time.time()
+        try:
+            process = Popen(command, shell=False, cwd=working_dir, stdout=PIPE, stderr=STDOUT, close_fds=True)
+        except OSError as e:
+            logging.error("casas_executor: the CASAS AL can't be started for the user %s: %s", user_in_role, e)
+            return result
+        timer = None
+        if self.timeout:
+            timer = threading.Timer(self.timeout, self._kill, [process, result])
+            timer.start()
+        try:
+            with open(os.path.join(working_dir, log_file), 'wb', 0) as output_log_file:
+                for line in iter(process.stdout.readline, b''):
+                    output_log_file.write(line)
+                    logging.debug("casas[%s]: %s", user_in_role, line.rstrip())
+                output_log_file.flush()
+                os.fsync(output_log_file.fileno())
+            process.stdout.close()
+            result['returncode'] = process.wait()
+        finally:
+            if timer is not None:
+                timer.cancel()
+        result['runtime'] = time.time() - start
+        if result['timed_out']:
+            logging.error("casas_executor: the CASAS AL of the user %s was killed after %s seconds",
+                          user_in_role, self.timeout)
+        elif result['returncode'] != 0:
+            logging.error("casas_executor: the CASAS AL of the user %s finished with the exit status %s",
+                          user_in_role, result['returncode'])
+        logging.info("casas_executor: user %s, exit status %s, runtime %.2f seconds", user_in_role,
+                     result['returncode'], result['runtime'])
+        return result
+
+    @staticmethod
+    def _kill(p_process, p_result):
+        """
+        Kills the process group of a run that exceeded the wall-clock timeout
+
+        :param p_process: The Popen instance of the AL process
+        :param p_result: The execution report of the job
+
+        :return: None
+        """
+        p_result['timed_out'] = True
+        try:
+            os.killpg(p_process.pid, signal.SIGKILL)
+        except OSError:
+            # The process has already finished
+            pass
+
+
+def _launch(p_argv):
+    """
+    Puts the current process in its own session, applies the resource limits and executes the CASAS AL binary in
+    its place, so the timeout of the executor can kill its whole process group.
+
+    :param p_argv: The list [cpu_limit, memory_limit, casas_binary, args...]. A limit of 0 disables it
+
+    :return: None. The process is replaced by the CASAS AL binary
+    """
+    cpu_limit, memory_limit = int(p_argv[0]), int(p_argv[1])
+    os.setsid()
+    if cpu_limit:
+        resource.setrlimit(resource.RLIMIT_CPU, (cpu_limit, cpu_limit))
+    if memory_limit:
+        memory = memory_limit * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (memory, memory))
+    os.execv(p_argv[2], p_argv[2:])
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 4:
+        sys.exit('Usage: casas_executor.py <cpu_limit> <memory_limit> <casas_binary> [args...]')
+    _launch(sys.argv[1:])
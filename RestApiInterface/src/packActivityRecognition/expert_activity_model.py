@@ -11,8 +11,31 @@ __maintainer__ = "Gorka Azkune"
 __email__ = "gorka.azkune@deusto.es"
 __status__ = "Prototype"
 
-class ExpertActivityModel:
-    
+
+def intern_name(name):
+    """ Function to intern the name of an action or location, so the EAMs share a single copy of each name
+
+    Usage example:
+        name = intern_name("kitchen")
+
+    Parameters
+    ----------
+    name : string
+        the name of the action or location
+
+    Returns
+    ----------
+    name : string
+        the interned name (unicode names are returned as they are)
+
+    """
+    return intern(name) if isinstance(name, str) else name
+
+
+class ExpertActivityModel(object):
+
+    __slots__ = ('name', 'locations', 'actions', 'duration', 'start')
+
     def __init__(self, name=None, infodict=None):
         """ Constructor
         
@@ -34,8 +57,8 @@ class ExpertActivityModel:
         
         if name is not None and isinstance(infodict, dict):
             self.name = name
-            self.locations = infodict["locations"]
-            self.actions = infodict["actions"]
+            self.locations = [intern_name(location) for location in infodict["locations"]]
+            self.actions = [intern_name(action) for action in infodict["actions"]]
             self.duration = infodict["duration"]
             # convert strings to datetime types
             #self.start = infodict["start"]
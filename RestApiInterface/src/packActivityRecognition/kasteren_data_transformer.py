@@ -4,6 +4,7 @@ This tool is to transform Kasteren datasets to our csv format
 """
 
 import sys, getopt
+import itertools
 import numpy as np
 import time, datetime
 import pandas as pd
@@ -21,6 +22,16 @@ __email__ = "gorka.azkune@deusto.es"
 __status__ = "Prototype"
 
 
+# List of activities which we want to store in the transformed dataset
+TARGET_ACTS = [13, 5, 15]
+
+# Sensor dictionary
+SENSOR_DICT = {1:'Microwave', 5:'HallToiletDoor', 6:'HallBathroomDoor', 7:'CupsCupboard', 8:'Fridge', 9:'PlatesCupboard', 12:'Frontdoor', 13:'Dishwasher', 14:'ToiletFlush', 17:'Freezer', 18:'PansCupboard', 20:'Washingmachine', 23:'GroceriesCupboard', 24:'HallBedroomDoor'}
+
+# Activity dictionary
+ACT_DICT = {1:'LeaveHouse', 4:'UseToilet', 5:'TakeShower', 10:'GoToBed', 13:'PrepareBreakfast', 15:'PrepareDinner', 17:'GetDrink'}
+
+
 """
 Function to parse arguments from command line
 Input:
@@ -30,21 +41,24 @@ Output:
     act_file -> csv file with activity data (start, end, activity-id)
     output -> csv file where timestamped sensor activation are listed where
         [timestamp, sensor, activity, start-end]
+    chunksize -> number of sensor activations of each chunk in streaming mode
+        (None to load the datasets in memory)
 """
 
 def parseArgs(argv):
    sense_file = ''
    act_file = ''
    output = ''
+   chunksize = None
    
    try:
-      opts, args = getopt.getopt(argv,"hs:a:o:",["sense=","act=","out="])
+      opts, args = getopt.getopt(argv,"hs:a:o:c:",["sense=","act=","out=","chunk="])
    except getopt.GetoptError:
-      print 'kasteren_data_transformer.py -sense <sense_dataset> -act <act_dataset> -out <output_dataset>'
+      print 'kasteren_data_transformer.py -sense <sense_dataset> -act <act_dataset> -out <output_dataset> [-chunk <chunk_size>]'
       sys.exit(2)
    for opt, arg in opts:
       if opt == '-h':
-         print 'kasteren_data_transformer.py -sense <sense_dataset> -act <act_dataset> -out <output_dataset>'
+         print 'kasteren_data_transformer.py -sense <sense_dataset> -act <act_dataset> -out <output_dataset> [-chunk <chunk_size>]'
          sys.exit()
       elif opt in ("-s", "--sense"):
          sense_file = arg      
@@ -52,13 +66,20 @@ def parseArgs(argv):
          act_file = arg
       elif opt in ("-o", "--out"):
          output = arg
+      elif opt in ("-c", "--chunk"):
+         chunksize = int(arg)
          
     
        
-   return sense_file, act_file, output
+   return sense_file, act_file, output, chunksize
 
 """
 Function to detect and remove overlapping activities
+Activities containing another activity (which starts later and ends earlier) are
+removed. Activities are sorted by start once and, for each one, the earliest end
+of the activities starting later is found with a binary search over the suffix
+minimums of the ends, so the check is O(n log n) and all the overlapping
+activities are dropped at once.
 Input:
     act_df: pd.DataFrame with activities (start, end, activity)
     act_dict: dictionaty of activity ids and names {id:'Activity'}
@@ -68,90 +89,121 @@ Output:
 def detectOverlappingActivities(act_df, act_dict):
     # For testing purposes, remove index 53
     act_df = act_df.drop([53])
-    for index in act_df.index:
-        start = act_df.loc[index, 'start']
-        end = act_df.loc[index, 'end']
-        act_id = act_df.loc[index, 'activity']
-        #print index, start < end
-        
-        
-        #print 'Activity', act_dict[act_id], 'start:', start, 'end:', end
-        overlapping = act_df[np.logical_and(act_df['start'] > start, act_df['end'] < end)]
-        #activity_index = filtered_df[np.logical_or(filtered_df['a_start_end'] == 'start', filtered_df['a_start_end'] == 'end')].index
-        if not overlapping.empty:
-            #print '--------------------------'
-            #print 'Activity', act_dict[act_id], start, end
-            #print 'Overlapping activities:'
-            #print overlapping.head()
-            act_df = act_df.drop([index])
-    
+    if act_df.empty:
+        return act_df
+    starts = act_df['start'].values
+    ends = act_df['end'].values
+    order = np.argsort(starts, kind='mergesort')
+    sorted_starts = starts[order]
+    # min_ends[i] is the earliest end of the activities order[i:], min_ends[n] is never reached by an end
+    min_ends = np.minimum.accumulate(ends[order][::-1])[::-1]
+    min_ends = np.append(min_ends, ends.max())
+    # First activity starting strictly after each activity
+    later = np.searchsorted(sorted_starts, starts, side='right')
+    overlapping = min_ends[later] < ends
     #print 'Activities after removing overlapping'
-    #print act_df.head(50)
-    return act_df
+    #print act_df[~overlapping].head(50)
+    return act_df[~overlapping]
         
 
+"""
+Function to label each sensor activation with the name of the activity being
+performed, using the start/end times of the activities. Sensor activations are
+ordered by time and the first and last activations of each activity are
+marked as 'start' and 'end'. The activations of each activity are located with
+searchsorted, so labels and markers are assigned to slices of arrays. When
+activities overlap, the last one in act_df prevails.
+Input:
+    sense_df: pd.DataFrame with sensor data (start, end, sensor, value)
+    act_df: pd.DataFrame with activities (start, end, activity)
+    sensor_dict: dictionary of sensor ids and names {id:'Sensor'}
+    act_dict: dictionaty of activity ids and names {id:'Activity'}
+    target_acts: list of the activity ids to label
+    started: optional list of booleans for act_df, True for the activities whose
+        first activation is before sense_df (used by the streaming mode)
+Output:
+    trans_df: pd.DataFrame indexed by the sensor activation times with the
+        columns sensor, activity and start/end
+"""
+def labelSensorEvents(sense_df, act_df, sensor_dict, act_dict, target_acts, started=None):
+    timestamps = sense_df['start'].values
+    order = None
+    if len(timestamps) > 1 and (timestamps[1:] < timestamps[:-1]).any():
+        order = np.argsort(timestamps, kind='mergesort')
+        timestamps = timestamps[order]
+    
+    # Initialize transformed dataset. Sensor names are obtained from a categorical
+    # with the sensor ids, so the dictionary is only used once per sensor
+    trans_df = pd.DataFrame(index = timestamps)
+    sensors = sense_df['sensor'].astype('category')
+    snames = sensors.cat.rename_categories([sensor_dict[sensor] for sensor in sensors.cat.categories]).values
+    if order is not None:
+        snames = snames.take(order)
+    
+    trans_df['sensor'] = snames
+    activities = np.empty(len(trans_df), dtype=object)
+    activities.fill('None')
+    startend = np.empty(len(trans_df), dtype=object)
+    startend.fill('')
+    
+    # Positions of the first and last (exclusive) sensor activations of each activity
+    target = act_df['activity'].isin(target_acts).values
+    act_df = act_df[target]
+    if started is None:
+        started = np.zeros(len(act_df), dtype=bool)
+    else:
+        started = np.asarray(started, dtype=bool)[target]
+    act_names = [act_dict[act_id] for act_id in act_df['activity'].values]
+    firsts = np.searchsorted(timestamps, act_df['start'].values, side='left')
+    lasts = np.searchsorted(timestamps, act_df['end'].values, side='right')
+    for i in xrange(len(act_names)):
+        first = firsts[i]
+        last = lasts[i]
+        if first >= last:
+            continue
+        activities[first:last] = act_names[i]
+        # Activations at the same time as the first and last ones get the same marker
+        if not started[i]:
+            startend[first:np.searchsorted(timestamps, timestamps[first], side='right')] = 'start'
+        if last - first > 1 or started[i]:
+            startend[np.searchsorted(timestamps, timestamps[last - 1], side='left'):last] = 'end'
+    
+    trans_df['activity'] = activities
+    trans_df['start/end'] = startend
+    #print 'Trans df:'
+    #print trans_df.head(50)
+    return trans_df
+    
+
 """
 Dataset transformation function
 """
 
 def transformDataset(sense_file, act_file):
     # List of activities which we want to store in the transformed dataset
-    target_acts = [13, 5, 15]    
+    target_acts = TARGET_ACTS
 
     # open sense dataset file    
-    sense_df = pd.read_csv(sense_file, parse_dates=0, names=['start', 'end', 'sensor', 'value'])
+    sense_df = pd.read_csv(sense_file, parse_dates=[0, 1], names=['start', 'end', 'sensor', 'value'])
     print 'Sensor dataset:'
     print sense_df.head()
     
     # open activity dataset file    
-    act_df = pd.read_csv(act_file, parse_dates=0, names=['start', 'end', 'activity'])
+    act_df = pd.read_csv(act_file, parse_dates=[0, 1], names=['start', 'end', 'activity'])
     print 'Activity dataset'
     print act_df.head()
     
     # build sensor dictionary
-    sensor_dict = {1:'Microwave', 5:'HallToiletDoor', 6:'HallBathroomDoor', 7:'CupsCupboard', 8:'Fridge', 9:'PlatesCupboard', 12:'Frontdoor', 13:'Dishwasher', 14:'ToiletFlush', 17:'Freezer', 18:'PansCupboard', 20:'Washingmachine', 23:'GroceriesCupboard', 24:'HallBedroomDoor'}
+    sensor_dict = SENSOR_DICT
     
     # build activity dict
-    act_dict = {1:'LeaveHouse', 4:'UseToilet', 5:'TakeShower', 10:'GoToBed', 13:'PrepareBreakfast', 15:'PrepareDinner', 17:'GetDrink'}
+    act_dict = ACT_DICT
     
     #act_df = detectOverlappingActivities(act_df, act_dict)
     #print 'Activities after removing overlapping'
     #print act_df.head(50)
     
-    # Initialize transformed dataset
-    trans_df = pd.DataFrame(index = sense_df['start'].values)
-    sensors = sense_df['sensor'].values    
-    snames = []
-    for i in xrange(len(sensors)):
-        snames.append(sensor_dict[sensors[i]])
-        
-    trans_df['sensor'] = snames
-    trans_df['activity'] = ['None']*len(trans_df)
-    trans_df['start/end'] = ['']*len(trans_df)
-    #print 'Trans df:'
-    #print trans_df.head(50)
-    
-    # Label each sensor activation with an activity name, using act_df start/end times
-    for index in act_df.index:        
-        act_id = act_df.loc[index, 'activity']
-        try: 
-            target_acts.index(act_id)
-            act_name = act_dict[act_id]
-            index_list = trans_df[np.logical_and(trans_df.index >= act_df.loc[index, 'start'], trans_df.index <= act_df.loc[index, 'end'])].index
-            #print 'Activity', act_name
-            #print index_list
-            trans_df.loc[index_list, 'activity'] = act_name
-            aux = 0
-            for i in index_list:
-                if aux == 0:
-                    trans_df.loc[i, 'start/end'] = 'start'
-                elif aux == len(index_list) - 1:
-                    trans_df.loc[i, 'start/end'] = 'end'
-            
-                aux = aux + 1
-        except ValueError:
-            pass
-                
+    trans_df = labelSensorEvents(sense_df, act_df, sensor_dict, act_dict, target_acts)
         
     # Remove all None actions to have a clear dataset (only activities)
     trans_df = trans_df[trans_df['activity'] != 'None']
@@ -162,19 +214,108 @@ def transformDataset(sense_file, act_file):
     return trans_df
     
 
+"""
+Streaming version of transformDataset for datasets that do not fit in memory
+Sensor activations are read in chunks and written to the output as soon as they
+are labeled. Only the activities still open at the end of a chunk and the
+activations sharing its last timestamp (which may still become the 'end' of an
+activity) are carried to the next chunk, so the output is the same as the one
+of transformDataset. Both files must be ordered by start time.
+Input:
+    sense_file: csv file with sensor data (start, end, sensor-id, value=1)
+    act_file: csv file with activity data (start, end, activity-id)
+    output: csv file where the labeled sensor activations are written
+    chunksize: number of sensor activations read in each chunk
+Output:
+    count: number of labeled sensor activations written to output
+"""
+
+def transformDatasetStreaming(sense_file, act_file, output, chunksize=100000):
+    sense_reader = pd.read_csv(sense_file, parse_dates=[0, 1], names=['start', 'end', 'sensor', 'value'],
+                               chunksize=chunksize)
+    act_reader = iter(pd.read_csv(act_file, parse_dates=[0, 1], names=['start', 'end', 'activity'],
+                                  chunksize=chunksize))
+    columns = ['sensor', 'activity', 'start/end']
+    pd.DataFrame(columns=columns).to_csv(output)
+    
+    # Activations and activities carried between chunks, and activities read but not started yet
+    held_df = None
+    open_df = None
+    started = np.zeros(0, dtype=bool)
+    upcoming_df = pd.DataFrame(columns=['start', 'end', 'activity'])
+    act_done = False
+    count = 0
+    
+    for chunk_df in itertools.chain(sense_reader, [None]):
+        if chunk_df is not None:
+            window_df = chunk_df if held_df is None else pd.concat([held_df, chunk_df], ignore_index=True)
+        else:
+            # End of the sensor data, the held activations are final
+            if held_df is None:
+                break
+            window_df = held_df
+        timestamps = window_df['start'].values
+        if len(timestamps) > 1 and (timestamps[1:] < timestamps[:-1]).any():
+            raise ValueError('The sensor dataset is not ordered by start time')
+        last_time = timestamps[-1]
+        
+        # Read the activities starting before the end of the window
+        while not act_done and (upcoming_df.empty or upcoming_df['start'].values[-1] <= last_time):
+            act_chunk = next(act_reader, None)
+            if act_chunk is None:
+                act_done = True
+            else:
+                act_chunk = act_chunk[act_chunk['activity'].isin(TARGET_ACTS)]
+                upcoming_df = pd.concat([upcoming_df, act_chunk], ignore_index=True)
+                act_starts = upcoming_df['start'].values
+                if len(act_starts) > 1 and (act_starts[1:] < act_starts[:-1]).any():
+                    raise ValueError('The activity dataset is not ordered by start time')
+        ready = upcoming_df['start'].values <= last_time
+        open_df = upcoming_df[ready] if open_df is None else pd.concat([open_df, upcoming_df[ready]],
+                                                                          ignore_index=True)
+        started = np.append(started, np.zeros(ready.sum(), dtype=bool))
+        upcoming_df = upcoming_df[~ready]
+        
+        trans_df = labelSensorEvents(window_df, open_df, SENSOR_DICT, ACT_DICT, TARGET_ACTS, started)
+        
+        # Activations at the last time of the window are held until the next chunk
+        final = len(trans_df) if chunk_df is None else np.searchsorted(timestamps, last_time, side='left')
+        final_df = trans_df[:final]
+        final_df = final_df[final_df['activity'] != 'None']
+        final_df.to_csv(output, mode='a', header=False)
+        count += len(final_df)
+        held_df = window_df[final:]
+        
+        # Activities with activations already written do not get a 'start' marker again, and the
+        # activities ending before the held activations are closed
+        if chunk_df is not None and len(open_df) > 0:
+            firsts = np.searchsorted(timestamps, open_df['start'].values, side='left')
+            lasts = np.searchsorted(timestamps, open_df['end'].values, side='right')
+            started = np.logical_or(started, np.logical_and(firsts < final, firsts < lasts))
+            still_open = open_df['end'].values >= last_time
+            open_df = open_df[still_open]
+            started = started[still_open]
+        print 'Labeled sensor activations:', count
+        
+    return count
+    
+
 """
 Main function
 """
 
 def main(argv):
     # call the argument parser
-    [sense_file, act_file, output] = parseArgs(argv[1:])
+    [sense_file, act_file, output, chunksize] = parseArgs(argv[1:])
     print 'Sense:', sense_file
     print 'Act:', act_file
     print 'Output:', output
     
-    dataset_df = transformDataset(sense_file, act_file)
-    dataset_df.to_csv(output)
+    if chunksize:
+        transformDatasetStreaming(sense_file, act_file, output, chunksize)
+    else:
+        dataset_df = transformDataset(sense_file, act_file)
+        dataset_df.to_csv(output)
     
 if __name__ == "__main__":   
     main(sys.argv)
\ No newline at end of file
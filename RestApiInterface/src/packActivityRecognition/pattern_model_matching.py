@@ -9,6 +9,8 @@ import pandas as pd
 import json
 import itertools
 
+from collections import OrderedDict
+
 from expert_activity_model import ExpertActivityModel
 from Pattern import Pattern
 from Cluster import Cluster
@@ -26,9 +28,68 @@ __email__ = "gorka.azkune@deusto.es"
 __status__ = "Prototype"
 
 
+def popcount(mask):
+    """ Function to count the bits set in an integer bitmask
+
+    Usage example:
+        size = popcount(mask)
+
+    Parameters
+    ----------
+    mask : int
+        a non negative integer
+
+    Returns
+    -------
+    count : int
+        the number of bits set
+
+    """
+    return bin(mask).count('1')
+
+
+def seconds_of_day(timestamp):
+    """ Function to convert the time of a timestamp to seconds since midnight, ignoring microseconds
+
+    Usage example:
+        seconds = seconds_of_day(pd.Timestamp('2016-01-01 00:01:12'))
+
+    Parameters
+    ----------
+    timestamp : Pandas.Timestamp or datetime.datetime
+        the timestamp to convert
+
+    Returns
+    -------
+    seconds : int
+        the seconds elapsed since the start of the day
+
+    """
+    return timestamp.hour * 3600 + timestamp.minute * 60 + timestamp.second
+
+
 class PatternModelMatching:    
-    
-    def __init__(self, eamlist, annotatedfile, logfile):
+
+    # define the weights of the cost function
+    # Weights for the test with synthetic data
+#    wa = 1
+#    wl = 1
+#    wd = 0.2
+#    ws = 0.7
+    # Weights for the test with Kasteren dataset
+    # F1 score (macro) = 0.77
+    wa = 1.3 #1.3
+    wl = 1.0 #1.0
+    wd = 0.1 #0.1
+    ws = 1.5 #1.5
+    #wt = 1
+    # Slope of the duration function (score lost per second of difference)
+    kd = 0.001
+    # Tolerance used when pruning combinations, so float rounding never discards the best one
+    epsilon = 1e-9
+
+    def __init__(self, eamlist, annotatedfile, logfile, maxcombsize=None, cachesize=1024, startbucket=60,
+                 durationbucket=10):
         """
         Constructor of the class
 
@@ -36,7 +97,10 @@ class PatternModelMatching:
         :param eamlist: A lis of eams
         :param basestring annotatedfile: The name of the CSV file (CASAS format) where the patterns found by AD are
         :param basestring logfile:  The name of a text file generated as a log of the AD tool
-        :param string or None contextfile: The name of the JSON file where the context model in defined
+        :param int or None maxcombsize: The maximum number of EAMs in a combination. None to test all the sizes
+        :param int cachesize: The maximum number of pattern scores kept in the cache. 0 disables the cache
+        :param int startbucket: The seconds of the start time buckets used as cache keys
+        :param int durationbucket: The seconds of the duration buckets used as cache keys
 
         :returns Instance of the class
 
@@ -53,21 +117,99 @@ class PatternModelMatching:
         self.logfile = logfile
 
 
+        self.maxcombsize = maxcombsize
+
+
         # We may not need to read the logfile and extract the pattern and cluster lists
         self.patternlist = []
         self.clusterlist = []
-        # Attribute to store a dict of eam indices and all their possible combinations
-        self.eamcombinations = {}        
 
-        # For the maximization problem, build already all the combinations of EAM
-        # indices
+        # Vocabularies of the actions and locations of the EAMs of the user. The actions and locations of
+        # each EAM are encoded as integer bitmasks over them, so unions, intersections and sizes of the
+        # sets used by the score functions are bit operations
+        self.actionbits = {}
+        self.locationbits = {}
+        for eam in self.eamlist:
+            for action in eam.actions:
+                self.actionbits.setdefault(action, 1 << len(self.actionbits))
+            for location in eam.locations:
+                self.locationbits.setdefault(location, 1 << len(self.locationbits))
+        self.eamactionmasks = [self.encode(eam.actions, self.actionbits) for eam in self.eamlist]
+        self.eamlocationmasks = [self.encode(eam.locations, self.locationbits) for eam in self.eamlist]
+
+        # Durations of the EAMs and their start ranges as seconds of the day. rangeeams stores the
+        # EAM index of each range
+        self.eamdurations = np.array([eam.duration for eam in self.eamlist], dtype=float)
+        ranges = [(i, seconds_of_day(timerange[0]), seconds_of_day(timerange[1]))
+                  for i in xrange(len(self.eamlist)) for timerange in self.eamlist[i].start]
+        self.rangeeams = np.array([r[0] for r in ranges], dtype=int)
+        self.rangestarts = np.array([r[1] for r in ranges], dtype=float)
+        self.rangeends = np.array([r[2] for r in ranges], dtype=float)
+        # Start time scores of the EAMs for the last pattern start, (start, scores), and duration in seconds
+        # of the last pattern, ((start, end), duration)
+        self.laststartscores = (None, None)
+        self.lastduration = (None, None)
+
+        # LRU cache of the results of find_models_for_pattern for the repeated instances of a pattern. The keys
+        # are the action and location sets of the pattern and its start time and duration buckets
+        self.cachesize = cachesize
+        self.startbucket = startbucket
+        self.durationbucket = durationbucket
+        self.scorecache = OrderedDict()
+        self.cachehits = 0
+        self.cachemisses = 0
+
+    def eam_combinations(self):
+        """ Generator of all the combinations of EAM indices, from the smallest to the largest size (up to
+        maxcombsize) and in lexicographic order for each size. The combinations are built lazily, so the
+        memory used does not depend on the number of EAMs.
+
+        Usage example:
+            for eamindices in eam_combinations():
+                ...
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        generator
+            a generator of tuples of EAM indices
+
+        """
         eamindex = range(0, len(self.eamlist))
-        for i in eamindex:
-            # eams = list(itertools.combinations(eamindex, i))
-            self.eamcombinations[i] = list(itertools.combinations(eamindex, i + 1))
-            # print i
-            # print self.eamcombinations[i]
-            # print '-----------------------------------'
+        maxsize = len(eamindex)
+        if self.maxcombsize is not None:
+            maxsize = min(maxsize, self.maxcombsize)
+        for size in xrange(1, maxsize + 1):
+            for combination in itertools.combinations(eamindex, size):
+                yield combination
+
+    def encode(self, elements, vocabulary):
+        """ Method to encode a list of actions or locations as a bitmask over the given vocabulary.
+        Elements outside the vocabulary are ignored, as no EAM contains them.
+
+        Usage example:
+            mask = encode(actions, self.actionbits)
+
+        Parameters
+        ----------
+        elements : list
+            a list of actions or locations
+        vocabulary : dict
+            the bit of each known element (self.actionbits or self.locationbits)
+
+        Returns
+        -------
+        mask : int
+            the bitmask of the known elements
+
+        """
+        mask = 0
+        for element in elements:
+            mask |= vocabulary.get(element, 0)
+        return mask
 
     # TODO consider to delete it
     def load_annotated_data(self):
@@ -98,17 +240,17 @@ class PatternModelMatching:
         """ Method to store the detected EAMs in the internal dataframe as a new column (detected_activities)
             
         Usage example:
-            start = pd.Timestamp('2016-01-01 00:00:00')
-            end = pd.Timestamp('2016-01-01 00:00:12')
+            start = 10
+            end = 14
             bestnames = ['MakeCoffee', 'MakePasta']
             annotate_data_frame(start, end, bestnames)
                 
         Parameters
         ----------
-        start : Pandas.Timestamp
-            start time of the action sequence to annotate
-        end : Pandas.Timestamp
-            end time of the action sequence to annotate
+        start : int
+            position of the first row of the action sequence to annotate
+        end : int
+            position of the last row of the action sequence to annotate
         bestanames : list
             a list of strings with the names of the best EAMs found
                 
@@ -117,9 +259,9 @@ class PatternModelMatching:
         None
         
         """
-        aux_df = self.df[start:end+1]
-        for index in aux_df.index:
-            self.df.set_value(index, 'detected_activities', bestnames)
+        values = np.empty(end + 1 - start, dtype=object)
+        values.fill(bestnames)
+        self.df.iloc[start:end+1, self.df.columns.get_loc('detected_activities')] = values
 
 
     def prefilter_patterns(self):
@@ -142,14 +284,15 @@ class PatternModelMatching:
         prefilter.filter_patterns()
         auxlist = ['Pat_%s' % (x.number) for x in prefilter.removedPatterns]
         
-        for index in self.df.index:
-            pattern = self.df.loc[index, 'pattern']            
-            if pattern in auxlist:
-                self.df.loc[index, 'pattern'] = 'Other_Activity'
+        self.df.loc[self.df['pattern'].isin(auxlist), 'pattern'] = 'Other_Activity'
 
     def process_patterns(self):
         """ Method to iterate through the dataframe (self.df), extract patterns and calculate the suitability of EAMs for that
         pattern.
+        
+        The rows tagged with a pattern are split into runs of consecutive rows with the same pattern (rows
+        tagged as Other_Activity are skipped) and each run is matched against the EAMs. As in the original
+        row by row loop, the last run of the dataframe is not matched.
             
         Usage example:
             process_patterns()
@@ -165,65 +308,57 @@ class PatternModelMatching:
         """
         # TESTING!! Use the prefilter based
         self.prefilter_patterns()
-        # Filter all the actions tagged as Other_Activity
-        auxdf = self.df[self.df["pattern"] != "Other_Activity"]
-        actions = []
-        locations = []
-        pat = ""
-        start = None
-        end = None
-        previous = None
-        start_index = None
-        end_index = None
-        previous_index = None
         # Add a new column to self.df for the activities detected by the algorithm
         # The new column is initialized with 'None'
-        detected_activities = [['None']]*len(self.df)
+        detected_activities = np.empty(len(self.df), dtype=object)
+        detected_activities.fill(['None'])
+        # Positions of the lines in which casas encountered something
+        patterns = self.df['pattern'].values
+        positions = np.flatnonzero(patterns != 'Other_Activity')
+        if len(positions) > 0:
+            # A new run starts wherever the pattern differs from the previous tagged line
+            patterns = patterns[positions]
+            runstarts = np.flatnonzero(patterns[1:] != patterns[:-1]) + 1
+            runactions = np.split(self.df['action'].values[positions], runstarts)
+            runlocations = np.split(self.df['location'].values[positions], runstarts)
+            runpositions = np.split(positions, runstarts)
+            timestamps = self.df['timestamp']
+            # The last run is not followed by a different pattern, so it is not matched
+            for run in xrange(len(runstarts)):
+                actions = runactions[run].tolist()
+                locations = runlocations[run].tolist()
+                start_index = runpositions[run][0]
+                end_index = runpositions[run][-1]
+                start = timestamps.iloc[start_index]
+                end = timestamps.iloc[end_index]
+                print 'New pattern'
+                print '   actions:', actions
+                # Call here to the real matcher
+                [maxscore, bestnames, partialscores] = self.find_models_for_pattern_cached(locations, actions, start, end)
+                # TESTING!! Action based filter
+                if partialscores[0] == -1:
+                    bestnames = ['None']
+
+                # TESTING!! Number of activities greater than number of actions
+                if len(bestnames) > len(actions):
+                    bestnames = ['None']
+
+
+                print '   start:', start, 'end:', end
+                print '   best eams:', bestnames, '(', maxscore, ')'
+                print '   partial scores: a(', partialscores[0], '), d(', partialscores[1], '), s(', partialscores[2], '), l(', partialscores[3], ')'
+                detected_activities[start_index:end_index+1].fill(bestnames)
         self.df['detected_activities'] = detected_activities
-        for index in auxdf.index:                               # Lines in which casas encountered something
-            if auxdf.loc[index, "pattern"] != pat:
-                if len(actions) > 0:
-                    print 'New pattern'
-                    print '   actions:', actions
-                    end = previous
-                    end_index = previous_index
-                    # Call here to the real matcher                    
-                    [maxscore, bestnames, partialscores] = self.find_models_for_pattern(locations, actions, start, end)
-                    # TESTING!! Action based filter  
-                    if partialscores[0] == -1:
-                        bestnames = ['None']
-                        
-                    # TESTING!! Number of activities greater than number of actions                        
-                    if len(bestnames) > len(actions):
-                        bestnames = ['None']                        
-                    
-                        
-                    print '   start:', start, 'end:', end
-                    print '   best eams:', bestnames, '(', maxscore, ')'
-                    print '   partial scores: a(', partialscores[0], '), d(', partialscores[1], '), s(', partialscores[2], '), l(', partialscores[3], ')'
-                    self.annotate_data_frame(start_index, end_index, bestnames)
-                
-                # Assign start the index value (the timestampt itself)
-                start = auxdf.loc[index, 'timestamp']
-                start_index = index
-                #print 'New pattern!', auxdf.loc[timestamp, "pattern"]                
-                pat = auxdf.loc[index, "pattern"]
-                actions = []
-                locations = []
-                
-            actions.append(auxdf.loc[index, "action"])
-            locations.append(auxdf.loc[index, "location"])
-            previous = auxdf.loc[index, 'timestamp']
-            previous_index = index
+        statistics = self.cache_statistics()
+        logging.info("pattern_model_matching: pattern score cache hits %s, misses %s, hit rate %.2f",
+                     statistics['hits'], statistics['misses'], statistics['hit_rate'])
             
     def shared_actions(self, actions, eamindices):
 #        print 'EAMS:', eams
 #        print 'Actions:', actions
-        actions = set(actions)        
+        actionmask = self.encode(actions, self.actionbits)
         for i in eamindices:
-            eamactions = self.eamlist[i].actions
-            eamactions = set(eamactions)
-            if len(actions.intersection(eamactions)) == 0:
+            if self.eamactionmasks[i] & actionmask == 0:
                 return False
                 
         return True
@@ -231,6 +366,11 @@ class PatternModelMatching:
     def find_models_for_pattern(self, locations, actions, start, end):
         """ Method to calculate for a given pattern (sensors, actions, start, end), the best list of EAMs
         to explain the pattern
+        
+        The combinations of EAMs are explored with a branch and bound search: a combination is only
+        extended if an upper bound of the score of all its extensions can beat the best score found so far.
+        Without size limit (maxcombsize) the result is the same as find_models_for_pattern_exhaustive,
+        including the combination chosen when several of them have the same score.
             
         Usage example:
             start = pd.Timestamp('2016-01-01 00:00:00')
@@ -258,57 +398,299 @@ class PatternModelMatching:
             a list of floats in [-1, 1] for the scores obtained for each function of the cost function
         
         """
-        # define the weights of the cost function
-        # Weights for the test with synthetic data
-#        wa = 1        
-#        wl = 1
-#        wd = 0.2 
-#        ws = 0.7
-        # Weights for the test with Kasteren dataset
-        # F1 score (macro) = 0.77
-        wa = 1.3 #1.3
-        wl = 1.0 #1.0
-        wd = 0.1 #0.1
-        ws = 1.5 #1.5
-        #wt = 1
+        nactions = len(set(actions))
+        nlocations = len(set(locations))
+        actionmask = self.encode(actions, self.actionbits)
+        locationmask = self.encode(locations, self.locationbits)
+        # Only the EAMs sharing actions with the pattern can be part of a combination (see shared_actions)
+        candidates = [i for i in xrange(len(self.eamlist)) if self.eamactionmasks[i] & actionmask != 0]
+        ncandidates = len(candidates)
+        # Start time score of each candidate. func_start_time is the mean of these values
+        startscores = self.start_time_scores(start)[candidates]
+        durations = self.eamdurations[candidates]
+        startlist = startscores.tolist()
+        durationlist = durations.tolist()
+        # Aggregated values of the candidates from each position to the end, used by the bounds
+        suffixactions = [0] * (ncandidates + 1)
+        suffixlocations = [0] * (ncandidates + 1)
+        for pos in xrange(ncandidates - 1, -1, -1):
+            suffixactions[pos] = suffixactions[pos + 1] | self.eamactionmasks[candidates[pos]]
+            suffixlocations[pos] = suffixlocations[pos + 1] | self.eamlocationmasks[candidates[pos]]
+        suffixstart = np.append(np.maximum.accumulate(startscores[::-1])[::-1], -1.0).tolist()
+        suffixmindur = np.append(np.cumsum(np.minimum(0, durations)[::-1])[::-1], 0.0).tolist()
+        suffixmaxdur = np.append(np.cumsum(np.maximum(0, durations)[::-1])[::-1], 0.0).tolist()
+        pat_duration = (end - start).total_seconds()
+
+        best = {'score': -sys.maxint, 'combination': None, 'partialscores': []}
+        # Depth first search. Each node is (combination, positions of its candidates, action and location masks,
+        # sum of start time scores and sum of durations)
+        stack = [((), (), 0, 0, 0.0, 0.0)]
+        while stack:
+            combination, positions, eamactions, eamlocations, startsum, durationsum = stack.pop()
+            if len(combination) > 0:
+                score_actions = self._set_score(nactions, actionmask, eamactions)
+                score_locations = self._set_score(nlocations, locationmask, eamlocations)
+                self._score_combination(best, combination, score_actions, score_locations,
+                                        startsum / len(combination), durationsum, pat_duration)
+            if self.maxcombsize is not None and len(combination) >= self.maxcombsize:
+                continue
+            nextpos = positions[-1] + 1 if len(positions) > 0 else 0
+            children = []
+            for pos in xrange(nextpos, ncandidates):
+                childactions = eamactions | self.eamactionmasks[candidates[pos]]
+                childlocations = eamlocations | self.eamlocationmasks[candidates[pos]]
+                childpositions = positions + (pos,)
+                childstart = startsum + startlist[pos]
+                childduration = durationsum + durationlist[pos]
+                # Upper bound of the score of the child and all the combinations that extend it
+                bound = self.wa * self._bound_set_score(nactions, actionmask, childactions, suffixactions[pos + 1]) + \
+                    self.wl * self._bound_set_score(nlocations, locationmask, childlocations,
+                                                    suffixlocations[pos + 1]) + \
+                    self.ws * max(childstart / len(childpositions), suffixstart[pos + 1]) + \
+                    self.wd * self._bound_duration_score(pat_duration, childduration, suffixmindur[pos + 1],
+                                                         suffixmaxdur[pos + 1])
+                if bound < best['score'] - self.epsilon:
+                    continue
+                children.append((combination + (candidates[pos],), childpositions, childactions, childlocations,
+                                 childstart, childduration))
+            # Visit the children in candidate order
+            stack.extend(reversed(children))
+
+        # This if is done for those cases where no EAM shares actions with the pattern
+        if best['combination'] is None:
+            return -sys.maxint, ['None'], [-1, -1, -1, -1]
+        bestnames = [self.eamlist[j].name for j in best['combination']]
+        return best['score'], bestnames, best['partialscores']
+
+    def find_models_for_pattern_cached(self, locations, actions, start, end):
+        """ Method to calculate the best list of EAMs for a pattern reusing the result of a previous instance
+        with the same actions and locations, a start time in the same bucket (time of the day) and a duration
+        in the same bucket. The least recently used results are evicted when the cache is full.
+
+        Usage example:
+            start = pd.Timestamp('2016-01-01 00:00:00')
+            end = pd.Timestamp('2016-01-01 00:00:12')
+            find_models_for_pattern_cached(sensors, actions, start, end)
+
+        Parameters
+        ----------
+        actions: list
+            a list of actions
+        locations: list
+            a list of locations for actions
+        start : Pandas.Timestamp
+            start time of the action sequence that compose the detected patter
+        end : Pandas.Timestamp
+            end time of the action sequence that compose the detected patter
+
+        Returns
+        -------
+        The same values as find_models_for_pattern
+
+        """
+        if not self.cachesize:
+            return self.find_models_for_pattern(locations, actions, start, end)
+        key = (frozenset(actions), frozenset(locations), seconds_of_day(start) // self.startbucket,
+               int((end - start).total_seconds() // self.durationbucket))
+        result = self.scorecache.pop(key, None)
+        if result is None:
+            self.cachemisses += 1
+            result = self.find_models_for_pattern(locations, actions, start, end)
+            if len(self.scorecache) >= self.cachesize:
+                self.scorecache.popitem(last=False)
+        else:
+            self.cachehits += 1
+        # The most recently used entries are kept at the end
+        self.scorecache[key] = result
+        maxscore, bestnames, partialscores = result
+        return maxscore, list(bestnames), list(partialscores)
+
+    def cache_statistics(self):
+        """ Method to report the usage of the pattern score cache
+
+        Usage example:
+            stats = cache_statistics()
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        statistics : dict
+            the number of 'hits' and 'misses', the 'hit_rate' in [0, 1] and the number of cached 'entries'
+
+        """
+        lookups = self.cachehits + self.cachemisses
+        return {
+            'hits': self.cachehits,
+            'misses': self.cachemisses,
+            'hit_rate': float(self.cachehits) / lookups if lookups > 0 else 0.0,
+            'entries': len(self.scorecache)
+        }
+
+    def _score_combination(self, best, combination, score_actions, score_locations, score_start_time, eam_duration,
+                           pat_duration):
+        """ Method to score a combination of EAMs and keep it in best if it improves the best combination
+        found so far. Combinations with the same score are ordered as in find_models_for_pattern_exhaustive
+        (size first and then EAM indices).
+
+        Parameters
+        ----------
+        best : dict
+            the best combination found so far: 'score', 'combination' and 'partialscores'
+        combination : tuple
+            the EAM indices of the combination
+        score_actions : float
+            the func_actions score of the combination
+        score_locations : float
+            the func_locations score of the combination
+        score_start_time : float
+            the func_start_time score of the combination (mean of the start time scores of its EAMs)
+        eam_duration : float
+            the sum of the durations of the EAMs of the combination
+        pat_duration : float
+            the duration of the pattern in seconds
+
+        Returns
+        -------
+        None
+
+        """
+        # Same as func_duration, from the duration sum carried by the search
+        score_duration = max(-1, 1 - self.kd*abs(eam_duration - pat_duration))
+        score = self.wa*score_actions + self.wd*score_duration + self.ws*score_start_time + self.wl*score_locations
+        if score > best['score'] or (score == best['score'] and
+                                     (len(combination), combination) < (len(best['combination']),
+                                                                        best['combination'])):
+            best['score'] = score
+            best['combination'] = combination
+            best['partialscores'] = [score_actions, score_duration, score_start_time, score_locations]
+
+    def _bound_set_score(self, npattern, patternmask, eammask, remainingmask):
+        """ Method to calculate an upper bound of func_actions (or func_locations) for a combination of EAMs
+        whose actions are eammask and any extension of it with EAMs whose actions are in remainingmask.
+
+        The score is I/P - 1 + I/(I + O), where P is the size of the pattern set, I the size of the
+        intersection and O the number of EAM elements outside the pattern. It grows with I and decreases
+        with O, while the extensions can only increase O and can not make I larger than the intersection
+        of the pattern with eammask and remainingmask.
+
+        Parameters
+        ----------
+        npattern : int
+            the number of different actions (or locations) of the pattern
+        patternmask : int
+            the bitmask of the actions (or locations) of the pattern
+        eammask : int
+            the bitmask of the actions (or locations) of the combination of EAMs
+        remainingmask : int
+            the bitmask of the actions (or locations) of the EAMs that can extend the combination
+
+        Returns
+        -------
+        bound : float
+            an upper bound of the score
+
+        """
+        maxintersect = float(popcount(patternmask & (eammask | remainingmask)))
+        outside = float(popcount(eammask & ~patternmask))
+        if maxintersect + outside == 0:
+            return 0.0
+        return maxintersect / npattern - 1 + maxintersect / (maxintersect + outside)
+
+    def _bound_duration_score(self, pat_duration, eam_duration, mindelta, maxdelta):
+        """ Method to calculate an upper bound of func_duration for a combination of EAMs with a total
+        duration of eam_duration whose extensions can change that duration between mindelta and maxdelta.
+
+        Parameters
+        ----------
+        pat_duration : float
+            the duration of the pattern in seconds
+        eam_duration : float
+            the sum of the durations of the combination of EAMs
+        mindelta : float
+            the minimum change of duration of the extensions (sum of the negative durations)
+        maxdelta : float
+            the maximum change of duration of the extensions (sum of the positive durations)
+
+        Returns
+        -------
+        bound : float
+            an upper bound of the score
+
+        """
+        target = pat_duration - eam_duration
+        delta = abs(target - min(max(target, mindelta), maxdelta))
+        return max(-1, 1 - self.kd*delta)
+
+    def find_models_for_pattern_exhaustive(self, locations, actions, start, end):
+        """ Method to calculate for a given pattern (sensors, actions, start, end), the best list of EAMs
+        to explain the pattern testing all the combinations of EAMs. find_models_for_pattern returns the
+        same result pruning the combinations that can not improve the best one.
+            
+        Usage example:
+            start = pd.Timestamp('2016-01-01 00:00:00')
+            end = pd.Timestamp('2016-01-01 00:00:12')
+            find_models_for_pattern_exhaustive(sensors, actions, start, end)
+                
+        Parameters
+        ----------
+        actions: list
+            a list of actions
+        locations: list
+            a list of locations for actions
+        start : Pandas.Timestamp
+            start time of the action sequence that compose the detected patter
+        end : Pandas.Timestamp
+            end time of the action sequence that compose the detected patter
+                
+        Returns
+        -------
+        maxscore: float
+            a float number in [-1, 1] with the maximum score of all combinations of EAMs
+        bestnames: list
+            a list of strings which represent the target activities
+        partialscores: list
+            a list of floats in [-1, 1] for the scores obtained for each function of the cost function
+        
+        """
+        wa, wl, wd, ws = self.wa, self.wl, self.wd, self.ws
         # We will use a strong force search, testing all the posible combinations
         # of eams and returning the combination with the highest score
         maxscore = -sys.maxint
         partialscores = []
         bestnames = []
-        for key in self.eamcombinations:
-            # This is the list of EAM indices for combination level 'key' 
-            eams = self.eamcombinations[key]            
-            for i in xrange(len(eams)):
-                # Testing!!
-                # Onyl consider those combinations of EAMs where shared actions for
-                # all EAMs exist
-                if self.shared_actions(actions, eams[i]) == False:                                        
-                    continue
-                
-                # Extract the EAM names of the current combination of EAMs
-                names = [self.eamlist[j].name for j in eams[i]]
-                #print '   ', names
-                score_actions = self.func_actions(actions, eams[i])
-                #score_time = self.func_time(start, end, eams[i])
-                score_duration = self.func_duration(start, end, eams[i])
-                score_start_time = self.func_start_time(start, eams[i])
-                score_locations = self.func_locations(locations, eams[i])
-
-                score = wa*score_actions + wd*score_duration + ws*score_start_time + wl*score_locations                
-                
-                #print '   score:', score, 'SA:', score_actions, 'ST:', score_time
-#                if score > maxscore and len(actions) >= len(bestnames):
-                if score > maxscore:
-                    maxscore = score
-                    bestnames = names
-                    # store also the partial scores of each metric
-                    partialscores = []
-                    partialscores.append(score_actions)
-                    partialscores.append(score_duration)
-                    partialscores.append(score_start_time)
-                    partialscores.append(score_locations)
-                    
+        for eams in self.eam_combinations():
+            # Testing!!
+            # Onyl consider those combinations of EAMs where shared actions for
+            # all EAMs exist
+            if self.shared_actions(actions, eams) == False:
+                continue
+
+            # Extract the EAM names of the current combination of EAMs
+            names = [self.eamlist[j].name for j in eams]
+            #print '   ', names
+            score_actions = self.func_actions(actions, eams)
+            #score_time = self.func_time(start, end, eams)
+            score_duration = self.func_duration(start, end, eams)
+            score_start_time = self.func_start_time(start, eams)
+            score_locations = self.func_locations(locations, eams)
+
+            score = wa*score_actions + wd*score_duration + ws*score_start_time + wl*score_locations
+
+            #print '   score:', score, 'SA:', score_actions, 'ST:', score_time
+#            if score > maxscore and len(actions) >= len(bestnames):
+            if score > maxscore:
+                maxscore = score
+                bestnames = names
+                # store also the partial scores of each metric
+                partialscores = []
+                partialscores.append(score_actions)
+                partialscores.append(score_duration)
+                partialscores.append(score_start_time)
+                partialscores.append(score_locations)
+
         # This if is done for those cases where no EAM shares actions with the pattern
         if len(partialscores) == 0:
             maxscore = -sys.maxint
@@ -338,23 +720,37 @@ class PatternModelMatching:
         
         """        
              
-        eamactions = []        
+        eamactions = 0
         for i in eamindices:
-            eamactions.extend(self.eamlist[i].actions)            
-            
-        eamactions = set(eamactions)
-        actions = set(actions)
-        
-        intersect = eamactions.intersection(actions)
-        lactions = float(len(actions))
-        lintersect = float(len(intersect))
-        leams = float(len(eamactions))
+            eamactions |= self.eamactionmasks[i]
+
+        return self._set_score(len(set(actions)), self.encode(actions, self.actionbits), eamactions)
+
+    def _set_score(self, npattern, patternmask, eammask):
+        """ Method to calculate the score shared by func_actions and func_locations from the bitmasks
+        of the pattern and the EAMs
+
+        Parameters
+        ----------
+        npattern : int
+            the number of different actions (or locations) of the pattern
+        patternmask : int
+            the bitmask of the actions (or locations) of the pattern
+        eammask : int
+            the bitmask of the actions (or locations) of the EAMs
+
+        Returns
+        -------
+        score : float
+            a float number in [-1, 1] with the score of the function for the given EAMs
+
+        """
+        lactions = float(npattern)
+        lintersect = float(popcount(eammask & patternmask))
+        leams = float(popcount(eammask))
         #score = float((len(intersect) / len(actions)) - ((len(eamactions) - len(intersect))/len(eamactions)))
         score = float((lintersect / lactions) - ((leams - lintersect)/leams))
-        
-        #print '   A: actions:', actions, 'eamactions:', eamactions, 
-        #print '   ', len(actions), len(eamactions), len(intersect), score
-        
+
         return score
     
 
@@ -378,43 +774,50 @@ class PatternModelMatching:
             a float number in [-1, 1] with the score of the function for the given EAMs
         
         """        
-        start_p = datetime.datetime.strptime(start.strftime("%H:%M:%S"), "%H:%M:%S")
-        # This list will store the highest score obtained by each of the EAMs
-        eamscores = []
-        for i in eamindices:
-            ranges = self.eamlist[i].start
-            # As an EAM may have several time ranges, partial scores will be calculated
-            # and afterwards, the masimum score will be stored in eamscores
-            partialscores = []
-            for timerange in ranges:
-                start_eam = timerange[0]
-                end_eam = timerange[1]
-                if start_p >= start_eam and start_p <= end_eam:
-                    # The start time of the pattern is inside the range of the EAM
-                    partialscores.append(1)
-                elif start_p < start_eam:
-                    # Apply a linear decreasing function where -1 is the minimum value
-                    diff = start_eam - start_p
-                    diff = diff.total_seconds()
-                    k = 1.0
-                    b = 0.1
-                    partialscores.append(max(-1, k/diff - b))
-                else:
-                    # start_p > end_eam
-                    # Apply a linear decreasing function where -1 is the minimum value
-                    diff = start_p - end_eam
-                    diff = diff.total_seconds()
-                    k = 1.0
-                    b = 0.1
-                    partialscores.append(max(-1, k/diff - b))
-            
-            # We already have the partial scores for an EAM; keep only the maximum
-            eamscores.append(max(partialscores))
-            
+        eamscores = self.start_time_scores(start)[list(eamindices)].tolist()
         # At this point we have the best score for all EAMs in eamindices
         return sum(eamscores) / len(eamscores)
-    
-    
+
+    def start_time_scores(self, start):
+        """ Method to calculate the start time score of every EAM for the start of a pattern. The score of an
+        EAM is the best score of its time ranges: 1 if the pattern starts inside the range and 1/diff - 0.1
+        otherwise, where diff are the seconds to the closest bound of the range. EAMs without time ranges
+        get the minimum score (-1). The scores of the last start are kept, so all the combinations of EAMs
+        of a pattern reuse them.
+
+        Usage example:
+            start = pd.Timestamp('2016-01-01 00:00:00')
+            scores = start_time_scores(start)
+
+        Parameters
+        ----------
+        start : Pandas.Timestamp
+            start time of the action sequence that compose the detected patter
+
+        Returns
+        -------
+        scores : numpy.ndarray
+            a float array in [-1, 1] with the score of each EAM in self.eamlist
+
+        """
+        if self.laststartscores[0] is not None and self.laststartscores[0] == start:
+            return self.laststartscores[1]
+        start_p = seconds_of_day(start)
+        # Ranges crossing midnight (start > end) never contain the pattern, and their distance is measured to
+        # their start when the pattern starts before it and to their end otherwise
+        outside = ~((start_p >= self.rangestarts) & (start_p <= self.rangeends))
+        diff = np.where(start_p < self.rangestarts, self.rangestarts - start_p, start_p - self.rangeends)
+        k = 1.0
+        b = 0.1
+        rangescores = np.ones(len(diff))
+        # Apply a linear decreasing function where -1 is the minimum value
+        rangescores[outside] = np.maximum(-1, k / diff[outside] - b)
+        # As an EAM may have several time ranges, keep only the maximum score of each EAM
+        scores = np.full(len(self.eamlist), -1.0)
+        np.maximum.at(scores, self.rangeeams, rangescores)
+        self.laststartscores = (start, scores)
+        return scores
+
     def func_duration(self, start, end, eamindices):
         """ Method to calculate the duration suitability of the pattern and the given EAMs
             
@@ -439,15 +842,14 @@ class PatternModelMatching:
         
         """
         
-        pat_duration = (end - start).total_seconds()
-        eam_duration = 0
-        for i in eamindices:
-            eam_duration = eam_duration + self.eamlist[i].duration
-            
+        if self.lastduration[0] is None or self.lastduration[0] != (start, end):
+            self.lastduration = ((start, end), (end - start).total_seconds())
+        pat_duration = self.lastduration[1]
+        eam_duration = sum(self.eamdurations[list(eamindices)].tolist())
+
         delta = abs(eam_duration - pat_duration)
         # delta stores the duration difference between the pattern and the EAMs
-        k = 0.001
-        score = max(-1, 1 - k*delta)
+        score = max(-1, 1 - self.kd*delta)
         return score
         
     # The time suitability function; start and end are timestamps for the pattern
@@ -546,21 +948,11 @@ class PatternModelMatching:
         #    location = self.contextmodel["objects"][obj]["location"]
         #    locations.append(location)
             
-        locations = set(locations)
-                
-        eamlocations = []
+        eamlocations = 0
         for i in eamindices:
-            eamlocations.extend(self.eamlist[i].locations)
-            
-        eamlocations = set(eamlocations)
-        intersect = eamlocations.intersection(locations)
-        llocations = float(len(locations))
-        lintersect = float(len(intersect))
-        leams = float(len(eamlocations))
-        #score = float((len(intersect) / len(actions)) - ((len(eamactions) - len(intersect))/len(eamactions)))
-        score = float((lintersect / llocations) - ((leams - lintersect)/leams))
-        
-        return score
+            eamlocations |= self.eamlocationmasks[i]
+
+        return self._set_score(len(set(locations)), self.encode(locations, self.locationbits), eamlocations)
         
     
     def store_result(self, filename):
@@ -581,10 +973,47 @@ class PatternModelMatching:
         """
         self.df.to_csv(filename, index=False)
 
+    def discovered_segments(self):
+        """ Method to split the annotated dataframe into segments of consecutive rows with the same detected EAMs.
+        Rows without detected EAMs ('None') are not part of any segment.
+
+        Usage example:
+            segments = discovered_segments()
+
+        Parameters
+        ----------
+        None
+
+        Returns
+        -------
+        segments : list
+            a list of dicts with the detected 'activities', the 'start_time' and 'end_time' timestamps and the
+            'executed_actions' of each segment
+
+        """
+        segments = []
+        detected_activities = self.df['detected_activities'].values
+        timestamps = self.df['timestamp']
+        executed_actions = self.df['executed_action'].values
+        for activities, group in itertools.groupby(xrange(len(detected_activities)),
+                                                   key=lambda i: detected_activities[i]):
+            if activities[0] == 'None':
+                continue
+            positions = list(group)
+            segments.append({
+                'activities': activities,
+                'start_time': timestamps.iloc[positions[0]],
+                'end_time': timestamps.iloc[positions[-1]],
+                'executed_actions': executed_actions[positions[0]:positions[-1] + 1].tolist()
+            })
+        return segments
+
     def store_result_database(self, p_database, p_user_in_role):
         """
         This is an alternative method that allows to store data in a DATABASE given its needed connections
 
+        All the segments of the user are stored at once in a single transaction (see discovered_segments)
+
         It is important to know that this is not a parametrized method
 
 
@@ -594,54 +1023,7 @@ class PatternModelMatching:
 
         res = False
         if 'detected_activities' in self.df.columns:
-            # Data and index row of the given dataFrame
-            start_date = None
-            end_date = None
-            start_date_index = None
-            end_date_index = None
-            # Action and previous action
-            action = None
-            previous_action = None
-            # We have executed well this method because we have results
-            for index, row in self.df.iterrows():
-                    # Check if the action is none or equals to the last one
-                    action = row['detected_activities']
-                    if action[0] == 'None' and start_date is not None and end_date is not None:
-                        # We have valid data to insert in DB
-                        aux_df = self.df[start_date_index:end_date_index+1]
-                        p_database.add_discovered_activities(aux_df, p_user_in_role)
-                        # Deleting the data
-                        start_date = None
-                        end_date = None
-                        start_date_index = None
-                        end_date_index = None
-                        previous_action = None
-                    elif action != previous_action and start_date is not None and end_date is not None:
-                        # We have valid data to insert in DB
-                        aux_df = self.df[start_date_index:end_date_index+1]
-                        p_database.add_discovered_activities(aux_df, p_user_in_role)
-                        # Update data with the current valid one
-                        start_date = self.df.loc[index, 'timestamp']
-                        end_date = self.df.loc[index, 'timestamp']
-                        start_date_index = index
-                        end_date_index = index
-                        previous_action = action
-                    elif action[0] != 'None':
-                        # Add more data to the current one
-                        if start_date is None:
-                            # First action date
-                            start_date = self.df.loc[index, 'timestamp']
-                            start_date_index = index
-                        end_date = self.df.loc[index, 'timestamp']
-                        end_date_index = index
-                        previous_action = action
-            # When the iteration has finished, we recheck if we have some data
-            if previous_action is not None and start_date is not None and end_date is not None:
-                # Insert the last action in DB
-                aux_df = self.df[start_date_index:end_date_index+1]
-                p_database.add_discovered_activities(aux_df, p_user_in_role)
-            # For the moment, we 'assume' that everything is ok
-            res = True
+            res = p_database.add_discovered_activities_bulk(self.discovered_segments(), p_user_in_role)
 
         return res
 
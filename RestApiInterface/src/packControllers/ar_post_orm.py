@@ -15,8 +15,11 @@ import json
 import sys
 sys.path.append('../packORM')               # Append the ORM classes
 import pandas as pd
+from collections import OrderedDict
+from itertools import chain
 from sqlalchemy import MetaData
-from src.packORM import ar_tables
+from sqlalchemy.exc import SQLAlchemyError
+from src.packORM import ar_tables, lea_archive
 from post_orm import PostORM
 
 
@@ -32,6 +35,9 @@ __maintainer__ = "Rubén Mulero"
 __email__ = "ruben.mulero@deusto.es"
 __status__ = "Prototype"
 
+# Maximum number of rows of each multi-row insert
+BULK_INSERT_SIZE = 1000
+
 
 class ARPostORM(PostORM):
     def __init__(self, autoflush=True):
@@ -208,30 +214,101 @@ class ARPostORM(PostORM):
 
         :return:
         """
+        segment = {
+            'activities': p_data_frame['detected_activities'].values[0],
+            'start_time': p_data_frame['timestamp'].values[0],
+            'end_time': p_data_frame['timestamp'].values[-1],
+            'executed_actions': p_data_frame['executed_action'].tolist()
+        }
+        return self.add_discovered_activities_bulk([segment], p_user_in_role_id)
+
+    def add_discovered_activities_bulk(self, p_segments, p_user_in_role_id):
+        """
+        Stores all the activities discovered by HARS for a user in a single transaction.
+
+        The activity ids are resolved with one query, the executed activities are inserted with multi-row inserts
+        returning their ids and the relations with the executed actions are inserted with multi-row inserts too.
+        Executed activities and relations already stored are not duplicated.
+
+        :param p_segments: A list of dicts with the keys 'activities' (list of activity names), 'start_time',
+                'end_time' and 'executed_actions' (list of executed action ids)
+        :param p_user_in_role_id: the city4ageuserID
+
+        :return: True if the data is stored
+                False if not
+        """
         logging.info(inspect.stack()[0][3], "adding data to database")
-        # We extract the list of possible activity values
-        discovered_activities = p_data_frame['detected_activities'].values[0]
-        # For each activity, we have to create a new 'executed_activity
-        for activity in discovered_activities:
-            # Finding the activity in database
-            cd_activity = self.session.query(self.tables.CDActivity).filter_by(activity_name=activity)[0]
+        if len(p_segments) == 0:
+            return True
+        # Resolving the ids of the discovered activities
+        activity_names = set(name for segment in p_segments for name in segment['activities'])
+        activity_ids = dict(self.session.query(ar_tables.CDActivity.activity_name, ar_tables.CDActivity.id)
+                            .filter(ar_tables.CDActivity.activity_name.in_(activity_names)))
+        # Building the executed activities and the executed actions related to each one
+        executed_activities = OrderedDict()
+        for segment in p_segments:
             # Format the time according to database time
-            start_time = arrow.get(pd.to_datetime(str(p_data_frame['timestamp'].values[0])))
-            end_time = arrow.get(pd.to_datetime(str(p_data_frame['timestamp'].values[-1])))
+            start_time = arrow.get(pd.to_datetime(str(segment['start_time'])))
+            end_time = arrow.get(pd.to_datetime(str(segment['end_time'])))
             duration = end_time - start_time
-            executed_activity = self._get_or_create(self.tables.ExecutedActivity, start_time=start_time,
-                                                    end_time=end_time,
-                                                    duration=duration.seconds,
-                                                    data_source_type='discovered_by_hars',
-                                                    cd_activity_id=cd_activity.id,
-                                                    user_in_role_id=p_user_in_role_id)[0]
-
-            for executed_action in p_data_frame['executed_action']:
-                # Filling the intermediate table with the instantiated activity
-                self._get_or_create(self.tables.ExecutedActivityExecutedActionRel,
-                                    executed_activity_id=executed_activity.id,
-                                    executed_action_id=executed_action)
-
+            for activity in segment['activities']:
+                if activity not in activity_ids:
+                    logging.error("add_discovered_activities_bulk: the activity %s is not in the database", activity)
+                    continue
+                key = (start_time, end_time, activity_ids[activity])
+                executed_actions = executed_activities.setdefault(key, {
+                    'row': {
+                        'start_time': start_time,
+                        'end_time': end_time,
+                        'duration': duration.seconds,
+                        'data_source_type': 'discovered_by_hars',
+                        'cd_activity_id': activity_ids[activity],
+                        'user_in_role_id': p_user_in_role_id
+                    },
+                    'executed_actions': set()
+                })['executed_actions']
+                executed_actions.update(int(executed_action) for executed_action in segment['executed_actions'])
+        if len(executed_activities) == 0:
+            return True
+        executed_activity_table = ar_tables.ExecutedActivity.__table__
+        rel_table = ar_tables.ExecutedActivityExecutedActionRel.__table__
+        try:
+            # Executed activities of the user already stored in the period of the segments
+            ids = {}
+            existing_query = self.session.query(ar_tables.ExecutedActivity.id, ar_tables.ExecutedActivity.start_time,
+                                                ar_tables.ExecutedActivity.end_time,
+                                                ar_tables.ExecutedActivity.cd_activity_id).filter(
+                ar_tables.ExecutedActivity.user_in_role_id == p_user_in_role_id,
+                ar_tables.ExecutedActivity.data_source_type == 'discovered_by_hars',
+                ar_tables.ExecutedActivity.start_time >= min(key[0] for key in executed_activities),
+                ar_tables.ExecutedActivity.end_time <= max(key[1] for key in executed_activities))
+            for executed_activity_id, start_time, end_time, cd_activity_id in existing_query:
+                ids[(start_time, end_time, cd_activity_id)] = executed_activity_id
+            existing_rels = set()
+            existing_ids = [ids[key] for key in executed_activities if key in ids]
+            if existing_ids:
+                existing_rels = set(self.session.query(rel_table.c.executed_activity_id,
+                                                       rel_table.c.executed_action_id)
+                                    .filter(rel_table.c.executed_activity_id.in_(existing_ids)))
+            # Inserting the new executed activities and obtaining their ids
+            new_rows = [value['row'] for key, value in executed_activities.items() if key not in ids]
+            for chunk in xrange(0, len(new_rows), BULK_INSERT_SIZE):
+                statement = executed_activity_table.insert().values(new_rows[chunk:chunk + BULK_INSERT_SIZE]) \
+                    .returning(executed_activity_table.c.id, executed_activity_table.c.start_time,
+                               executed_activity_table.c.end_time, executed_activity_table.c.cd_activity_id)
+                for executed_activity_id, start_time, end_time, cd_activity_id in self.session.execute(statement):
+                    ids[(start_time, end_time, cd_activity_id)] = executed_activity_id
+            # Filling the intermediate table with the instantiated activities
+            rel_rows = []
+            for key, value in executed_activities.items():
+                for executed_action_id in sorted(value['executed_actions']):
+                    if (ids[key], executed_action_id) not in existing_rels:
+                        rel_rows.append({'executed_activity_id': ids[key], 'executed_action_id': executed_action_id})
+            for chunk in xrange(0, len(rel_rows), BULK_INSERT_SIZE):
+                self.session.execute(rel_table.insert().values(rel_rows[chunk:chunk + BULK_INSERT_SIZE]))
+        except SQLAlchemyError as e:
+            logging.exception("add_discovered_activities_bulk: failed to add the discovered activities: %s", e)
+            return self.rollback()
         # Commit changes and exiting
         logging.info(inspect.stack()[0][3], "data added successful")
         return self.commit()
@@ -464,7 +541,7 @@ class ARPostORM(PostORM):
     def get_action(self, p_start_time, p_end_time):
         """
         By giving a start and end time, this method extracts from database the stored leas and inserts in in a
-        Python dict.
+        Python dict. The archived leas of the given time range are included.
 
 
         :param p_start_time: The interval start date of the extraction
@@ -477,7 +554,8 @@ class ARPostORM(PostORM):
         query = self.session.query(ar_tables.ExecutedAction).filter(
             ar_tables.ExecutedAction.execution_datetime.between(p_start_time, p_end_time))
         logging.info(inspect.stack()[0][3], "Total founded LEAS in database: ", query.count())
-        for q in query:
+        archived = lea_archive.read_rows(ar_tables.ExecutedAction.__table__, p_start_time, p_end_time)
+        for q in chain(query, archived):
             # Extracting the needed data and obtaining additional values
             location_name = self.session.query(ar_tables.Location).filter_by(id=q.location_id)[0].location_name
             action_name = self.session.query(ar_tables.CDAction).filter_by(id=q.location_id)[0].action_name
@@ -494,7 +572,8 @@ class ARPostORM(PostORM):
     def get_transformed_action(self, p_user_in_role, p_start_time, p_end_time):
         """
         By giving a start and end time, this method extract from database the stored Transformed actions
-        to create a proper Python dict to be used by HARS.
+        to create a proper Python dict to be used by HARS. The archived transformed actions of the given time range
+        are included.
 
         :param p_user_in_role: The id of the user in role to extract its leas
         :param p_start_time: The interval start date of the extraction
@@ -509,10 +588,20 @@ class ARPostORM(PostORM):
             ar_tables.ExecutedTransformedAction.transformed_execution_datetime.between(p_start_time, p_end_time),
             ar_tables.ExecutedTransformedAction.user_in_role_id == p_user_in_role)
         logging.debug(inspect.stack()[0][3], "Total LEAS in database: ", query.count(), "\nfor user: ", p_user_in_role)
-        for q in query:
+        archived = lea_archive.read_rows(ar_tables.ExecutedTransformedAction.__table__, p_start_time, p_end_time,
+                                         p_user_in_role)
+        archived_actions = {}
+        if archived:
+            # The executed actions of the archived transformed actions are archived too
+            archived_actions = {action.id: action for action in lea_archive.read_rows(
+                ar_tables.ExecutedAction.__table__, p_start_time, p_end_time, p_user_in_role)}
+        for q in chain(query, archived):
             # Extracting the needed data and obtaining additional values
             transformed_action = self.session.query(ar_tables.CDTransformedAction).filter_by(id=q.cd_transformed_action_id)[0]
-            executed_action = self.session.query(ar_tables.ExecutedAction).filter_by(id=q.executed_action_id).first()
+            # The execution time of the action limits the search to its partition
+            executed_action = self.session.query(ar_tables.ExecutedAction).filter_by(
+                id=q.executed_action_id, execution_datetime=q.transformed_execution_datetime).first() \
+                or archived_actions.get(q.executed_action_id)
             location = self.session.query(ar_tables.Location).filter_by(id=executed_action.location_id).first()
             lea = {
                 'user_in_role_id': q.user_in_role_id,
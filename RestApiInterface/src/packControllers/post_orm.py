@@ -66,28 +66,53 @@ OUTDOOR_VALUES = ['outdoor', 'publicpark', 'cityzone', 'foodcourt', 'transportat
                   'privatetransportationmean', 'bus', 'car', 'taxi', 'train']
 
 
+# The engine is shared by all the controllers. It is created on its first use, so importing the API is fast
+ENGINE = None
+
+
+def get_engine():
+    """
+    Gives the engine of the database, creating it on the first call
+
+    :return: The SQLAlchemy engine
+    """
+    global ENGINE
+    if ENGINE is None:
+        ENGINE = create_engine(URL(**DATABASE))
+        orm.configure_mappers()  # Important for full text search index
+    return ENGINE
+
+
 class PostORM(object):
     def __init__(self, p_tables, autoflush=True):
         # Database tables schema
         self.tables = p_tables
-        # Make basic connection and setup declarative
-        self.engine = create_engine(URL(**DATABASE))
-        orm.configure_mappers()  # Important for full text search index
-        try:
-            session_mark = scoped_session(sessionmaker(autoflush=autoflush, bind=self.engine))
-            session = session_mark()
-            if session:
-                print("Database connection OK")
-                logging.debug(inspect.stack()[0][3], "Database session opened successfully")
-                self.session = session
-                # Registering the index service
-                # self._index_tables()
-            else:
-                print("Failed to open a database session")
-                logging.error(inspect.stack()[0][3], "Failed to open database session")
-                raise Exception("Failed to open database session")
-        except OperationalError:
-            print("Database arguments are invalid")
+        self.autoflush = autoflush
+        # The session is opened on its first use
+        self._session = None
+
+    @property
+    def engine(self):
+        return get_engine()
+
+    @property
+    def session(self):
+        if self._session is None:
+            try:
+                session_mark = scoped_session(sessionmaker(autoflush=self.autoflush, bind=self.engine))
+                session = session_mark()
+                if session:
+                    logging.debug(inspect.stack()[0][3], "Database session opened successfully")
+                    self._session = session
+                    # Registering the index service
+                    # self._index_tables()
+                else:
+                    print("Failed to open a database session")
+                    logging.error(inspect.stack()[0][3], "Failed to open database session")
+                    raise Exception("Failed to open database session")
+            except OperationalError:
+                print("Database arguments are invalid")
+        return self._session
 
     ###################################################################################################
     ###################################################################################################
@@ -236,8 +261,8 @@ class PostORM(object):
 
         :return: None
         """
-        if self.session:
-            self.session.close()
+        if self._session is not None:
+            self._session.close()
 
     ###################################################################################################
     ###################################################################################################
@@ -13,7 +13,7 @@ import logging
 import subprocess
 import sys
 sys.path.append('../packORM')               # Append the ORM classes
-from src.packORM import sr_tables
+from src.packORM import sr_tables, nui_engine
 
 # from packORM import sr_tables
 
@@ -142,7 +142,8 @@ class SRPostORM(PostORM):
     def commit_measure(self, p_user):
         """
         This method updates the Pilot column called as latest_data_submission_completed to let
-        external services that the Pilot stops uploading data to the API
+        external services that the Pilot stops uploading data to the API. The NUIs of the last months of the Pilot
+        are computed from its measures in the same transaction.
 
         :return: True if everything is OK
         """
@@ -150,6 +151,11 @@ class SRPostORM(PostORM):
         # update latest_data_submission_completed from Pilot table
         pilot = self.session.query(self.tables.Pilot).filter_by(pilot_code=p_user.user_in_role[0].pilot_code)[0]
         pilot.latest_data_submission_completed = arrow.utcnow()
+        try:
+            nui_engine.compute_nuis(self, pilot.pilot_code)
+        except Exception as e:
+            logging.error("An error happened in " + inspect.stack()[0][3] + " the exception is: " + str(e))
+            return self.rollback()
 
         return self.commit()
 
@@ -320,3 +326,18 @@ class SRPostORM(PostORM):
         for mea in list_measures:
             measures.append(mea[0])
         return measures
+
+    def get_daily_rollups(self, p_user_in_role_id, p_start_day, p_end_day):
+        """
+        Retrieves the daily aggregates of the LEAs of a user for each action and location. They are updated
+        periodically by the rollup job, see 'python manage_database.py -r'.
+
+        :param p_user_in_role_id: The id of the user in role
+        :param p_start_day: The first day, included
+        :param p_end_day: The last day, included
+
+        :return: A list of DailyLEARollup ordered by day
+        """
+        return self.session.query(sr_tables.DailyLEARollup).filter(
+            sr_tables.DailyLEARollup.user_in_role_id == p_user_in_role_id,
+            sr_tables.DailyLEARollup.day.between(p_start_day, p_end_day)).order_by(sr_tables.DailyLEARollup.day).all()
@@ -13,12 +13,14 @@ from datetime import timedelta
 from functools import wraps
 from json import dumps, loads
 from flask import Flask, request, make_response, Response, abort, redirect, url_for, session, flash, jsonify, \
-    request_finished, render_template
+    request_finished, render_template, g
 from flask_httpauth import HTTPBasicAuth
 from sqlalchemy.orm import class_mapper
 from src.packUtils.utilities import Utilities
+from src.packUtils import request_timing, statement_counter
 from itsdangerous import Signer, BadSignature
 from src.packControllers import ar_post_orm, sr_post_orm
+from src.packORM import database_generator
 
 __author__ = 'Rubén Mulero'
 __copyright__ = "Copyright 2017, City4Age project"
@@ -111,8 +113,29 @@ def required_roles(*roles):
 ###################################################################################################
 
 
+@app.before_first_request
+def check_database():
+    """
+    Checks the schema version marker of the database before serving the first request. The database is not reflected
+    nor created here, it is created and filled with its base data by manage_database.py
+
+    :return: None
+    """
+    ar_database = ar_post_orm.ARPostORM()
+    sr_database = sr_post_orm.SRPostORM()
+    try:
+        if not database_generator.check_database(ar_database, sr_database):
+            app.logger.error("The database is not created or its version is outdated. Run manage_database.py")
+    finally:
+        ar_database.close()
+        sr_database.close()
+
+
 @app.before_request
 def before_request():
+    # Timing of the request phases and counting of its SQL statements
+    request_timing.start_request()
+    g.statements = statement_counter.begin(request.endpoint or "no_route")
     # Connection
     global AR_DATABASE
     if not AR_DATABASE:
@@ -128,6 +151,8 @@ def before_request():
 
 @app.teardown_request
 def teardown_request(exception):
+    # Closing the statement counting of a request that didn't finish normally
+    statement_counter.end(g.pop('statements', None))
     global AR_DATABASE
     if AR_DATABASE is not None:
         # Close database active session
@@ -183,8 +208,9 @@ def when_request_finished(sender, response, **extra):
         data = "User entered an JSON with length of: %s" % request.content_length or "No data found"
         status_code = response.status_code or "No status code. Check estrange behavior"
         # Inserting data into database
-        res_ar = AR_DATABASE.add_user_action(USER.id, route, ip, agent, data, status_code)
-        res_sr = SR_DATABASE.add_user_action(USER.id, route, ip, agent, data, status_code)
+        with request_timing.phase('audit'):
+            res_ar = AR_DATABASE.add_user_action(USER.id, route, ip, agent, data, status_code)
+            res_sr = SR_DATABASE.add_user_action(USER.id, route, ip, agent, data, status_code)
         if not res_ar or not res_sr:
             logging.error("Historical data is not storing well into DB. The sent data is the following:"
                           "\n User id: %s"
@@ -193,6 +219,11 @@ def when_request_finished(sender, response, **extra):
                           "\n User Agent: %s"
                           "\n Data: %s"
                           "\n Status code?: %s", USER.id, route, ip, agent, data, status_code)
+    # Closing the timing of the request
+    statements = statement_counter.end(g.pop('statements', None))
+    phases = request_timing.finish_request(request.url_rule and request.url_rule.endpoint or "no_route", statements)
+    if phases and request_timing.TIMING['server_timing']:
+        response.headers['Server-Timing'] = request_timing.server_timing_header(phases, statements)
 
 
 ###################################################################################################
@@ -218,20 +249,21 @@ def verify_password(username_or_token, password):
     """
 
     global USER
-    if session and session.get('token', False):
-        # Validating user using the encrypted cookie.
-        user = AR_DATABASE.verify_auth_token(session['token'], app)
-    else:
-        # Validating user using the auth Token.
-        user = AR_DATABASE.verify_auth_token(username_or_token, app)
-    if not user:
-        # Validating user with username/password.
-        user = AR_DATABASE.verify_user_login(username_or_token, password, app)
+    with request_timing.phase('auth'):
+        if session and session.get('token', False):
+            # Validating user using the encrypted cookie.
+            user = AR_DATABASE.verify_auth_token(session['token'], app)
+        else:
+            # Validating user using the auth Token.
+            user = AR_DATABASE.verify_auth_token(username_or_token, app)
         if not user:
-            # If there are some user session, the system will clear all data to force user to make a successful login.
-            session.pop('token', None)
-            USER = None
-            return False
+            # Validating user with username/password.
+            user = AR_DATABASE.verify_user_login(username_or_token, password, app)
+    if not user:
+        # If there are some user session, the system will clear all data to force user to make a successful login.
+        session.pop('token', None)
+        USER = None
+        return False
     # Put the user id in a global stage
     USER = user
     return True
@@ -387,6 +419,25 @@ def get_my_info(version=app.config['ACTUAL_API']):
         return Response("Some estrange error happened in the server, contact with administrator", 500)
 
 
+@app.route("/metrics", methods=["GET"])
+@limit_content_length(MAX_LENGHT)
+@auth.login_required
+@required_roles('administrator', 'system')
+def metrics():
+    """
+    Gives the histograms of the request phases in the Prometheus text format, to be scraped by the monitoring system
+    with the credentials of an administrator or system user.
+
+    The endpoint is disabled by default. It is enabled with the 'metrics' option of the 'request_timing' section of the
+    config file.
+
+    :return: The histograms of the phase durations by endpoint
+    """
+    if not request_timing.TIMING['metrics']:
+        return "The metrics are disabled", 404
+    return Response(request_timing.render_metrics(), 200, mimetype='text/plain; version=0.0.4')
+
+
 ###################################################################################################
 ###################################################################################################
 ######                              POST functions
@@ -513,13 +564,17 @@ def add_action(version=app.config['ACTUAL_API']):
 
     if Utilities.check_connection(app, version):
         # We created a list of Python dict.
-        data = _convert_to_dict(request.json)
-        msg = Utilities.check_add_action_data(AR_DATABASE, data)
+        with request_timing.phase('parse'):
+            data = _convert_to_dict(request.json)
+        with request_timing.phase('validate'):
+            msg = Utilities.check_add_action_data(AR_DATABASE, data)
         # TODO review in the future
         if data and not msg and USER:
             # User and data are OK. save data into DB
-            res_ar = AR_DATABASE.add_action(data)
-            res_sr = SR_DATABASE.add_action(data)
+            with request_timing.phase('ar_write'):
+                res_ar = AR_DATABASE.add_action(data)
+            with request_timing.phase('sr_write'):
+                res_sr = SR_DATABASE.add_action(data)
             if res_ar and res_sr:
                 logging.info("add_action: the username: %s adds new action into database" % USER.username)
                 return Response('Data stored in database OK\n'), 200
@@ -1038,8 +1093,8 @@ def add_factor(version=app.config['ACTUAL_API']):
 @required_roles('Pilot source system')
 def commit_measure(version=app.config['ACTUAL_API']):
     """
-    This method executes and external program that makes the needed calculations in SR schema and
-    updates some tables
+    This method marks the end of the data submission of the Pilot and computes the NUIs of its last months from the
+    submitted measures
 
 
     :param basestring version: API version
@@ -1047,7 +1102,7 @@ def commit_measure(version=app.config['ACTUAL_API']):
     :return: Response of the request
     """
     if Utilities.check_version(app=app, p_ver=version) and USER:
-        # Calling to external java jar file to update database data
+        # Computing the NUIs of the pilot from its measures
         res = SR_DATABASE.commit_measure(USER)
         if res:
             logging.info("commit_measure: data commit successfully")
@@ -17,7 +17,7 @@ from sqlalchemy_utils import ArrowType
 from itsdangerous import (TimedJSONWebSignatureSerializer
                           as Serializer, BadSignature, SignatureExpired)
 from sqlalchemy import Column, Integer, String, Boolean, Sequence, Float, BigInteger, ForeignKey, Numeric, \
-    Text, TypeDecorator, event, MetaData, DateTime, UniqueConstraint
+    Text, TypeDecorator, event, MetaData, DateTime, UniqueConstraint, Index
 
 from sqlalchemy.sql import expression
 from sqlalchemy.ext.compiler import compiles
@@ -296,6 +296,10 @@ class ExecutedTransformedAction(Base):
     """
 
     __tablename__ = 'executed_transformed_action'
+    # Index of the LEA extraction of each user by time range
+    __table_args__ = (Index('executed_transformed_action_user_datetime_idx', 'user_in_role_id',
+                            'transformed_execution_datetime'),
+                      )
 
     # Generating the Sequence
     executed_activity_id_seq = Sequence('executed_activity_id_seq', metadata=Base.metadata)
@@ -327,6 +331,9 @@ class UserInEAM(Base):
     """
 
     __tablename__ = 'user_in_eam'
+    # The primary key doesn't start with the user, so the EAMs of a user need their own index
+    __table_args__ = (Index('user_in_eam_user_in_role_idx', 'user_in_role_id'),
+                      )
 
     cd_activity_id = Column(Integer, ForeignKey('cd_activity.id'), primary_key=True)
     user_in_role_id = Column(Integer, ForeignKey('user_in_role.id'), primary_key=True)
@@ -834,3 +841,18 @@ class CDTransformedAction(Base):
     furniture_type = Column(String(50), nullable=True)
     state_type = Column(String(50), nullable=True)
     calling_number = Column(String(50), nullable=True)
+
+
+class SchemaVersion(Base):
+    """
+    The schema version table stores a marker row written when the schema is created and its base data is inserted.
+    The API checks this row at startup instead of reflecting the whole schema.
+    """
+
+    __tablename__ = 'schema_version'
+
+    version = Column(String(20), primary_key=True)
+    installed = Column(ArrowType(timezone=True), server_default=utcnow(), nullable=False)
+
+    def __repr__(self):
+        return "<SchemaVersion(version='%s', installed='%s')>" % (self.version, self.installed)
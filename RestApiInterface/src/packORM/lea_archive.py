@@ -0,0 +1,357 @@
+# -*- coding: utf-8 -*-
+
+"""
+Archival of the old LEAs into compressed columnar files.
+
+The LEAs older than the horizon of their pilot are moved, one month at a time, from the LEA tables into compressed
+numpy files stored in the archive directory. Each file keeps a segment (the rows of a table, pilot and month) with an
+array for each column. The manifest file of the archive directory lists the stored segments, so the range queries can
+read back the archived months without scanning the directory.
+
+The LEAs referenced by a discovered activity are not archived. Only the LEAs of the Activity Recognition schema are
+archived, because the Shared Repository doesn't read back the archived months.
+
+"""
+
+import os
+import io
+import json
+import inspect
+import logging
+import ConfigParser
+from datetime import datetime, timedelta
+
+import arrow
+import numpy as np
+from sqlalchemy import and_, exists, select, func, Integer, BigInteger, Numeric, Boolean, String
+from sqlalchemy_utils import ArrowType
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+# Archived tables and the time column used to select their segments
+ARCHIVED_TABLES = {
+    'executed_action': 'execution_datetime',
+    'executed_transformed_action': 'transformed_execution_datetime',
+    'payload_value': 'execution_datetime',
+}
+
+# Schema of the archived LEAs
+ARCHIVED_SCHEMA = 'city4age_ar'
+
+MANIFEST_NAME = 'manifest.json'
+
+EPOCH = datetime(1970, 1, 1)
+
+# Default configuration values. The horizon of a pilot can be changed with a 'horizon_days_<pilot code>' option
+ARCHIVE = {
+    'directory': os.path.abspath(os.path.join(os.path.dirname(os.path.abspath(__file__)), '../../archive')),
+    'horizon_days': 365,    # Age of the LEAs to be archived
+}
+PILOT_HORIZON_DAYS = {}
+
+config = ConfigParser.ConfigParser()
+# Checks actual path of the file and sets config file.
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+config_dir = os.path.abspath(current_dir + '../../../conf/rest_api.cfg')
+config.read(config_dir)
+
+if 'lea_archive' in config.sections():
+    # We have config file with data
+    if config.has_option('lea_archive', 'directory') and config.get('lea_archive', 'directory'):
+        ARCHIVE['directory'] = os.path.abspath(os.path.join(os.path.dirname(config_dir), '..',
+                                                            config.get('lea_archive', 'directory')))
+    if config.has_option('lea_archive', 'horizon_days') and config.get('lea_archive', 'horizon_days'):
+        ARCHIVE['horizon_days'] = config.getint('lea_archive', 'horizon_days')
+    for option in config.options('lea_archive'):
+        if option.startswith('horizon_days_') and config.get('lea_archive', option):
+            PILOT_HORIZON_DAYS[option[len('horizon_days_'):]] = config.getint('lea_archive', option)
+
+
+class ArchivedRow(dict):
+    """
+    A row read from the archive. Its values can be accessed as attributes, like in the rows of the ORM
+    """
+
+    def __getattr__(self, p_name):
+        try:
+            return self[p_name]
+        except KeyError:
+            raise AttributeError(p_name)
+
+
+def archive_leas(p_orm, p_now=None):
+    """
+    Archives the LEAs of each pilot older than its horizon. Only whole months are archived: the months before the
+    month of the horizon.
+
+    :param p_orm: The orm connection to the Activity Recognition schema
+    :param p_now: The current time, used to compute the horizon. Defaults to the current UTC time
+
+    :return: A list with the segments added to the manifest
+    """
+    now = p_now or datetime.utcnow()
+    tables = p_orm.tables
+    if tables.Base.metadata.schema != ARCHIVED_SCHEMA:
+        logging.warning("archive_leas: the LEAs of %s are not archived", tables.Base.metadata.schema)
+        return []
+    res = []
+    for pilot_code, in p_orm.session.query(tables.Pilot.pilot_code).all():
+        horizon = now - timedelta(days=PILOT_HORIZON_DAYS.get(pilot_code, ARCHIVE['horizon_days']))
+        cutoff = datetime(horizon.year, horizon.month, 1)
+        user_ids = [user_id for user_id, in p_orm.session.query(tables.UserInRole.id).filter_by(pilot_code=pilot_code)]
+        if not user_ids:
+            continue
+        executed_action = tables.ExecutedAction.__table__
+        month = func.date_trunc('month', func.timezone('UTC', executed_action.c.execution_datetime))
+        months = p_orm.session.execute(select([month]).distinct().where(and_(
+            executed_action.c.user_in_role_id.in_(user_ids),
+            executed_action.c.execution_datetime < arrow.get(cutoff)))).fetchall()
+        for month_start, in sorted(months):
+            res.extend(archive_month(p_orm, pilot_code, user_ids, month_start))
+    return res
+
+
+def archive_month(p_orm, p_pilot_code, p_user_ids, p_month):
+    """
+    Moves the LEAs of a pilot and month into the archive. The rows are deleted in the same transaction that is
+    committed after writing the segments and the manifest.
+
+    :param p_orm: The orm connection to the schema with the LEA tables
+    :param p_pilot_code: The code of the pilot
+    :param p_user_ids: The ids of the users in role of the pilot
+    :param p_month: A datetime with the first day of the month
+
+    :return: A list with the segments added to the manifest
+    """
+    tables = p_orm.tables
+    start = arrow.get(datetime(p_month.year, p_month.month, 1))
+    end = start.replace(months=+1)
+    executed_action = tables.ExecutedAction.__table__
+    payload_value = tables.PayloadValue.__table__
+    relation = tables.ExecutedActivityExecutedActionRel.__table__
+    # The LEAs of the month that are not part of a discovered activity
+    action_filter = and_(executed_action.c.user_in_role_id.in_(p_user_ids),
+                         executed_action.c.execution_datetime >= start,
+                         executed_action.c.execution_datetime < end,
+                         ~exists().where(relation.c.executed_action_id == executed_action.c.id))
+    payload_filter = exists().where(and_(executed_action.c.cd_action_id == payload_value.c.cd_action_id,
+                                         executed_action.c.acquisition_datetime == payload_value.c.acquisition_datetime,
+                                         action_filter)).correlate(payload_value)
+    # The children are deleted before the executed actions
+    selections = [(payload_value, payload_filter)]
+    if hasattr(tables, 'ExecutedTransformedAction'):
+        transformed_action = tables.ExecutedTransformedAction.__table__
+        selections.append((transformed_action, and_(
+            transformed_action.c.user_in_role_id.in_(p_user_ids),
+            transformed_action.c.transformed_execution_datetime >= start,
+            transformed_action.c.transformed_execution_datetime < end,
+            ~exists().where(relation.c.executed_action_id == transformed_action.c.executed_action_id))))
+    selections.append((executed_action, action_filter))
+
+    segments = []
+    try:
+        for table, where in selections:
+            rows = p_orm.session.execute(select([table]).where(where)).fetchall()
+            if not rows:
+                continue
+            segments.append(write_segment(table, p_pilot_code, start, end, rows))
+            p_orm.session.execute(table.delete().where(where))
+        add_to_manifest(segments)
+    except Exception:
+        p_orm.rollback()
+        _remove_segments(segments)
+        raise
+    if not p_orm.commit():
+        remove_from_manifest(segments)
+        _remove_segments(segments)
+        return []
+    logging.info("archive_month: archived %s rows of %s for the pilot %s",
+                 sum(segment['rows'] for segment in segments), start.format('YYYY-MM'), p_pilot_code)
+    return segments
+
+
+def write_segment(p_table, p_pilot_code, p_start, p_end, p_rows):
+    """
+    Writes the rows of a table into a new compressed columnar file
+
+    :param p_table: The sqlalchemy Table of the rows
+    :param p_pilot_code: The code of the pilot of the rows
+    :param p_start: An arrow with the first instant of the segment
+    :param p_end: An arrow with the end of the segment, not included
+    :param p_rows: A list with the rows to be archived
+
+    :return: A dict describing the segment, to be stored in the manifest
+    """
+    directory = os.path.join(p_table.schema, p_table.name, p_pilot_code)
+    if not os.path.isdir(os.path.join(ARCHIVE['directory'], directory)):
+        os.makedirs(os.path.join(ARCHIVE['directory'], directory))
+    # A month can have several segments if it receives new LEAs after being archived
+    name = p_start.format('YYYY_MM')
+    number = 0
+    while os.path.exists(os.path.join(ARCHIVE['directory'], directory, name + '.npz')):
+        number += 1
+        name = '%s_%s' % (p_start.format('YYYY_MM'), number)
+    arrays = {}
+    for column in p_table.columns:
+        values = [row[column.name] for row in p_rows]
+        arrays[column.name], arrays[column.name + '__null'] = _encode(column, values)
+    path = os.path.join(directory, name + '.npz')
+    np.savez_compressed(os.path.join(ARCHIVE['directory'], path), **arrays)
+    return {
+        'schema': p_table.schema,
+        'table': p_table.name,
+        'pilot_code': p_pilot_code,
+        'start': p_start.isoformat(),
+        'end': p_end.isoformat(),
+        'rows': len(p_rows),
+        'file': path,
+        'archived': arrow.utcnow().isoformat(),
+    }
+
+
+def read_segment(p_table, p_segment):
+    """
+    Reads the rows of a segment
+
+    :param p_table: The sqlalchemy Table of the segment
+    :param p_segment: The segment as stored in the manifest
+
+    :return: A list of ArchivedRow
+    """
+    arrays = np.load(os.path.join(ARCHIVE['directory'], p_segment['file']))
+    columns = {}
+    for column in p_table.columns:
+        columns[column.name] = _decode(column, arrays[column.name], arrays[column.name + '__null'])
+    return [ArchivedRow(zip(columns.keys(), values)) for values in zip(*columns.values())]
+
+
+def read_rows(p_table, p_start_time, p_end_time, p_user_in_role_id=None):
+    """
+    Reads the archived rows of a table in a time range. It is used by the range queries to merge the archived months
+    with the rows of the database.
+
+    :param p_table: The sqlalchemy Table
+    :param p_start_time: The start of the range, included
+    :param p_end_time: The end of the range, included
+    :param p_user_in_role_id: If given, only the rows of this user are returned
+
+    :return: A list of ArchivedRow
+    """
+    start, end = arrow.get(p_start_time), arrow.get(p_end_time)
+    time_column = ARCHIVED_TABLES[p_table.name]
+    res = []
+    for segment in read_manifest():
+        if segment['schema'] != p_table.schema or segment['table'] != p_table.name or \
+                arrow.get(segment['end']) <= start or arrow.get(segment['start']) > end:
+            continue
+        for row in read_segment(p_table, segment):
+            if row[time_column] is not None and start <= row[time_column] <= end and \
+                    (p_user_in_role_id is None or row.get('user_in_role_id') == p_user_in_role_id):
+                res.append(row)
+    return res
+
+
+def read_manifest():
+    """
+    Reads the segments listed in the manifest of the archive directory
+
+    :return: A list of segments
+    """
+    path = os.path.join(ARCHIVE['directory'], MANIFEST_NAME)
+    if not os.path.exists(path):
+        return []
+    with io.open(path, encoding='utf-8') as manifest_file:
+        return json.load(manifest_file)['segments']
+
+
+def add_to_manifest(p_segments):
+    """
+    Adds segments to the manifest
+    """
+    if p_segments:
+        _write_manifest(read_manifest() + p_segments)
+
+
+def remove_from_manifest(p_segments):
+    """
+    Removes segments from the manifest
+    """
+    files = set(segment['file'] for segment in p_segments)
+    if files:
+        _write_manifest([segment for segment in read_manifest() if segment['file'] not in files])
+
+
+def _write_manifest(p_segments):
+    """
+    Replaces the manifest. The new manifest is written in a temporary file and renamed, so the readers never see
+    a partial manifest.
+    """
+    if not os.path.isdir(ARCHIVE['directory']):
+        os.makedirs(ARCHIVE['directory'])
+    path = os.path.join(ARCHIVE['directory'], MANIFEST_NAME)
+    with io.open(path + '.tmp', 'w', encoding='utf-8') as manifest_file:
+        manifest_file.write(unicode(json.dumps({'segments': p_segments}, indent=1)))
+    os.rename(path + '.tmp', path)
+
+
+def _remove_segments(p_segments):
+    """
+    Deletes the files of segments that couldn't be archived
+    """
+    for segment in p_segments:
+        path = os.path.join(ARCHIVE['directory'], segment['file'])
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _encode(p_column, p_values):
+    """
+    Converts the values of a column into a numpy array and its mask of null values. The times are stored as UTC
+    microseconds since the epoch.
+    """
+    nulls = np.array([value is None for value in p_values], dtype=bool)
+    if isinstance(p_column.type, ArrowType):
+        values = [0 if value is None else _microseconds(value) for value in p_values]
+        return np.array(values, dtype=np.int64), nulls
+    elif isinstance(p_column.type, (Integer, BigInteger)):
+        return np.array([0 if value is None else value for value in p_values], dtype=np.int64), nulls
+    elif isinstance(p_column.type, Numeric):
+        return np.array([0.0 if value is None else float(value) for value in p_values], dtype=np.float64), nulls
+    elif isinstance(p_column.type, Boolean):
+        return np.array([bool(value) for value in p_values], dtype=bool), nulls
+    elif isinstance(p_column.type, String):
+        return np.array([u'' if value is None else unicode(value) for value in p_values], dtype=np.unicode_), nulls
+    raise TypeError("The column %s can't be archived" % p_column.name)
+
+
+def _decode(p_column, p_array, p_nulls):
+    """
+    Converts back a numpy array and its mask of null values into the values of a column
+    """
+    if isinstance(p_column.type, ArrowType):
+        values = [arrow.get(EPOCH + timedelta(microseconds=int(value))) for value in p_array]
+    elif isinstance(p_column.type, (Integer, BigInteger)):
+        values = [int(value) for value in p_array]
+    elif isinstance(p_column.type, Numeric):
+        values = [float(value) for value in p_array]
+    elif isinstance(p_column.type, Boolean):
+        values = [bool(value) for value in p_array]
+    else:
+        values = [unicode(value) for value in p_array]
+    return [None if null else value for value, null in zip(values, p_nulls)]
+
+
+def _microseconds(p_value):
+    """
+    Gives the UTC microseconds since the epoch of a time
+    """
+    delta = arrow.get(p_value).to('UTC').naive - EPOCH
+    return (delta.days * 86400 + delta.seconds) * 1000000 + delta.microseconds
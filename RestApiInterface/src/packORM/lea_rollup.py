@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+
+"""
+Incremental maintenance of the daily LEA rollups of the Shared Repository.
+
+The rollup job reads the executed actions inserted after its watermark, finds the users and days having new LEAs and
+computes again the aggregates of these days from the executed actions. Computing whole days makes the job idempotent,
+so the executed actions of the last minutes can be read again in the next execution without counting them twice.
+
+The watermark is the id of the last executed action older than the configured lag. The transactions of the API are
+much shorter than the lag, so an action with a lower id can't be committed after the watermark moves past it.
+
+The LEAs of the Shared Repository are never archived (only the Activity Recognition schema is), so the executed
+actions of the database are all the LEAs of the computed days.
+
+"""
+
+import os
+import inspect
+import logging
+import ConfigParser
+from datetime import datetime, timedelta
+
+import arrow
+from sqlalchemy import and_, select, func, tuple_
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+ROLLUP_NAME = 'daily_lea_rollup'
+
+# Number of (user, day) groups computed by each statement
+GROUP_CHUNK_SIZE = 500
+
+# Default configuration values
+LEA_ROLLUP = {
+    'lag_minutes': 10       # Minutes before the watermark can move past an executed action
+}
+
+config = ConfigParser.ConfigParser()
+# Checks actual path of the file and sets config file.
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+config_dir = os.path.abspath(current_dir + '../../../conf/rest_api.cfg')
+config.read(config_dir)
+
+if 'lea_rollup' in config.sections():
+    # We have config file with data
+    for option in LEA_ROLLUP:
+        if config.has_option('lea_rollup', option) and config.get('lea_rollup', option):
+            LEA_ROLLUP[option] = config.getint('lea_rollup', option)
+
+
+def update_rollups(p_orm, p_now=None):
+    """
+    Updates the daily rollups with the executed actions inserted after the watermark and moves the watermark.
+
+    :param p_orm: The orm connection to the Shared Repository
+    :param p_now: The current time, used to compute the lag. Defaults to the current UTC time
+
+    :return: The number of (user, day) groups computed
+    """
+    tables = p_orm.tables
+    executed_action = tables.ExecutedAction.__table__
+    now = p_now or datetime.utcnow()
+    # Locking the watermark, so two jobs can't update the same days at the same time
+    watermark = p_orm.session.query(tables.RollupWatermark).with_for_update() \
+        .filter_by(rollup_name=ROLLUP_NAME).first()
+    last_id = watermark.last_executed_action_id if watermark else 0
+    day = _day(executed_action)
+    groups = p_orm.session.execute(select([executed_action.c.user_in_role_id, day]).distinct().where(and_(
+        executed_action.c.id > last_id,
+        executed_action.c.user_in_role_id.isnot(None),
+        executed_action.c.execution_datetime.isnot(None)))).fetchall()
+    new_last_id = p_orm.session.execute(select([func.max(executed_action.c.id)]).where(and_(
+        executed_action.c.id > last_id,
+        executed_action.c.acquisition_datetime < arrow.get(now - timedelta(minutes=LEA_ROLLUP['lag_minutes']))))) \
+        .scalar() or last_id
+    groups = [tuple(group) for group in groups]
+    for start in xrange(0, len(groups), GROUP_CHUNK_SIZE):
+        compute_days(p_orm, groups[start:start + GROUP_CHUNK_SIZE])
+    if watermark:
+        watermark.last_executed_action_id = new_last_id
+        watermark.updated = arrow.utcnow()
+    else:
+        p_orm.insert_one(tables.RollupWatermark(rollup_name=ROLLUP_NAME, last_executed_action_id=new_last_id))
+    p_orm.commit()
+    logging.info("update_rollups: computed %s days of users, watermark moved from %s to %s", len(groups), last_id,
+                 new_last_id)
+    return len(groups)
+
+
+def compute_days(p_orm, p_groups):
+    """
+    Computes again the rollups of the given users and days from the executed actions
+
+    :param p_orm: The orm connection to the Shared Repository
+    :param p_groups: A list of tuples (user_in_role_id, day)
+
+    :return: None
+    """
+    tables = p_orm.tables
+    executed_action = tables.ExecutedAction.__table__
+    rollup = tables.DailyLEARollup.__table__
+    day = _day(executed_action)
+    days = [group[1] for group in p_groups]
+    # The time range of the days limits the search to their partitions
+    start = arrow.get(datetime(min(days).year, min(days).month, min(days).day))
+    end = arrow.get(datetime(max(days).year, max(days).month, max(days).day)).replace(days=+1)
+    p_orm.session.execute(rollup.delete().where(tuple_(rollup.c.user_in_role_id, rollup.c.day).in_(p_groups)))
+    aggregates = select([executed_action.c.user_in_role_id, day, executed_action.c.cd_action_id,
+                         executed_action.c.location_id, func.count(),
+                         func.min(executed_action.c.execution_datetime),
+                         func.max(executed_action.c.execution_datetime)]) \
+        .where(and_(executed_action.c.execution_datetime >= start,
+                    executed_action.c.execution_datetime < end,
+                    executed_action.c.cd_action_id.isnot(None),
+                    executed_action.c.location_id.isnot(None),
+                    tuple_(executed_action.c.user_in_role_id, day).in_(p_groups))) \
+        .group_by(executed_action.c.user_in_role_id, day, executed_action.c.cd_action_id,
+                  executed_action.c.location_id)
+    p_orm.session.execute(rollup.insert().from_select(
+        ['user_in_role_id', 'day', 'cd_action_id', 'location_id', 'lea_count', 'first_execution_datetime',
+         'last_execution_datetime'], aggregates))
+
+
+def _day(p_executed_action):
+    """
+    Gives the expression of the UTC day of the executed actions
+    """
+    return func.date(func.timezone('UTC', p_executed_action.c.execution_datetime))
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+
+"""
+Computation of the Numeric Indicators (NUI) of a pilot from its variation measures.
+
+The NUIs of each pilot are defined in the Shared Repository by the 'nui' detection variables. A measure is aggregated
+into a NUI through a row of md_pilot_detection_variable of the pilot, or through the derived detection variable of the
+measure. The aggregate is read from the derivation function formula of the pilot row and, when there isn't any, from
+the suffix of the NUI name (e.g. 'walk_steps_avg'). The available aggregates are:
+
+    avg, std, min, max, sum, count, median and pNN (the NN percentile, e.g. p25 or p90)
+
+Each NUI is computed for every user and calendar month (UTC) having measures. The measures of the computed months are
+loaded as NumPy arrays and all the aggregates are computed in a vectorized way over the groups of user, measure and
+month. Only the NUI values that change are written in numeric_indicator_value.
+
+"""
+
+import os
+import inspect
+import logging
+import ConfigParser
+from datetime import datetime
+
+import arrow
+import numpy as np
+from sqlalchemy import and_, or_, select, bindparam
+from sqlalchemy.orm import aliased
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+# Typical period of the time intervals of the NUIs
+NUI_PERIOD = 'mon'
+
+# Default configuration values
+NUI = {
+    'months_back': 1        # Previous months computed again in each commit, besides the current one
+}
+
+config = ConfigParser.ConfigParser()
+# Checks actual path of the file and sets config file.
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+config_dir = os.path.abspath(current_dir + '../../../conf/rest_api.cfg')
+config.read(config_dir)
+
+if 'nui' in config.sections():
+    # We have config file with data
+    for option in NUI:
+        if config.has_option('nui', option) and config.get('nui', option):
+            NUI[option] = config.getint('nui', option)
+
+
+def compute_nuis(p_orm, p_pilot_code, p_start=None, p_end=None):
+    """
+    Computes the NUIs of a pilot for the months of the given range and writes the values that changed.
+
+    :param p_orm: The orm connection to the Shared Repository
+    :param p_pilot_code: The code of the pilot
+    :param p_start: The first instant of the range. Defaults to the start of the month 'months_back' months ago
+    :param p_end: The end of the range (excluded). Defaults to the current time
+
+    :return: A tuple with the number of inserted and updated NUI values
+    """
+    end = arrow.get(p_end) if p_end else arrow.utcnow()
+    if p_start:
+        start = arrow.get(p_start)
+    else:
+        start = end.to('UTC').floor('month').replace(months=-NUI['months_back'])
+    definitions = get_definitions(p_orm, p_pilot_code)
+    if not definitions:
+        logging.info("compute_nuis: the pilot %s hasn't any NUI defined", p_pilot_code)
+        return 0, 0
+    users, measures, months, values = load_measures(p_orm, p_pilot_code, definitions.keys(), start, end)
+    nuis = aggregate_measures(users, measures, months, values, definitions)
+    inserted, updated = store_nuis(p_orm, p_pilot_code, nuis)
+    pilot = p_orm.session.query(p_orm.tables.Pilot).filter_by(pilot_code=p_pilot_code).first()
+    if pilot:
+        pilot.latest_derived_detection_variables_computed = arrow.utcnow()
+    logging.info("compute_nuis: %s measures of the pilot %s gave %s NUI values, %s inserted and %s updated",
+                 len(values), p_pilot_code, len(nuis), inserted, updated)
+    return inserted, updated
+
+
+def get_definitions(p_orm, p_pilot_code):
+    """
+    Gives the NUIs computed from each measure of a pilot
+
+    :param p_orm: The orm connection to the Shared Repository
+    :param p_pilot_code: The code of the pilot
+
+    :return: A dict with the id of each measure and a list of tuples (nui_id, aggregate)
+    """
+    tables = p_orm.tables
+    measure = aliased(tables.CDDetectionVariable)
+    nui = aliased(tables.CDDetectionVariable)
+    now = arrow.utcnow()
+    formulas = {}
+    # Global definitions of the detection variables
+    for measure_id, nui_id, nui_name in p_orm.session.query(measure.id, nui.id, nui.detection_variable_name) \
+            .join(nui, nui.id == measure.derived_detection_variable_id) \
+            .filter(measure.detection_variable_type == 'mea', nui.detection_variable_type == 'nui'):
+        formulas[(measure_id, nui_id)] = nui_name
+    # Definitions of the pilot, replacing the global ones
+    pilot_variable = tables.MDPilotDetectionVariable
+    for measure_id, nui_id, nui_name, formula in p_orm.session.query(
+            measure.id, nui.id, nui.detection_variable_name, pilot_variable.derivation_function_formula) \
+            .join(pilot_variable, pilot_variable.detection_variable_id == measure.id) \
+            .join(nui, nui.id == pilot_variable.derived_detection_variable_id) \
+            .filter(pilot_variable.pilot_code == p_pilot_code,
+                    measure.detection_variable_type == 'mea', nui.detection_variable_type == 'nui',
+                    or_(pilot_variable.valid_to.is_(None), pilot_variable.valid_to > now)):
+        formulas[(measure_id, nui_id)] = formula if formula and formula.strip() else nui_name
+    definitions = {}
+    for (measure_id, nui_id), formula in formulas.items():
+        aggregate = formula.strip().lower().split('_')[-1]
+        if not is_aggregate(aggregate):
+            logging.warning("get_definitions: unknown aggregate '%s' of the NUI %s", formula, nui_id)
+            continue
+        definitions.setdefault(measure_id, []).append((nui_id, aggregate))
+    return definitions
+
+
+def load_measures(p_orm, p_pilot_code, p_measure_ids, p_start, p_end):
+    """
+    Loads the measures of the users of a pilot, for the whole months of the given range.
+
+    :param p_orm: The orm connection to the Shared Repository
+    :param p_pilot_code: The code of the pilot
+    :param p_measure_ids: The ids of the loaded measures
+    :param p_start: The first instant of the range
+    :param p_end: The end of the range (excluded)
+
+    :return: The arrays of the users, measures, months (since 1970) and values
+    """
+    tables = p_orm.tables
+    measure_value = tables.VariationMeasureValue.__table__
+    time_interval = tables.TimeInterval.__table__
+    user_in_role = tables.UserInRole.__table__
+    start = _month_start(arrow.get(p_start))
+    end = arrow.get(p_end)
+    if end != _month_start(end):
+        end = _month_start(end).replace(months=+1)
+    rows = p_orm.session.execute(
+        select([measure_value.c.user_in_role_id, measure_value.c.measure_type_id, time_interval.c.interval_start,
+                measure_value.c.measure_value])
+        .select_from(measure_value.join(time_interval, time_interval.c.id == measure_value.c.time_interval_id)
+                     .join(user_in_role, user_in_role.c.id == measure_value.c.user_in_role_id))
+        .where(and_(user_in_role.c.pilot_code == p_pilot_code,
+                    measure_value.c.measure_type_id.in_(list(p_measure_ids)),
+                    time_interval.c.interval_start >= start,
+                    time_interval.c.interval_start < end))).fetchall()
+    if not rows:
+        empty = np.array([], dtype=np.int64)
+        return empty, empty, empty, np.array([], dtype=np.float64)
+    users, measures, starts, values = zip(*rows)
+    months = np.array([arrow.get(interval_start).to('UTC').naive for interval_start in starts],
+                      dtype='datetime64[M]').astype(np.int64)
+    return (np.array(users, dtype=np.int64), np.array(measures, dtype=np.int64), months,
+            np.array(values, dtype=np.float64))
+
+
+def aggregate_measures(p_users, p_measures, p_months, p_values, p_definitions):
+    """
+    Computes the NUIs of each user and month from the values of the measures.
+
+    :param p_users: The array of the user of each value
+    :param p_measures: The array of the measure of each value
+    :param p_months: The array of the month of each value
+    :param p_values: The array of values
+    :param p_definitions: A dict with the id of each measure and a list of tuples (nui_id, aggregate)
+
+    :return: A dict with the value of each (user_in_role_id, nui_id, month)
+    """
+    users, measures, months, values = [np.asarray(array) for array in (p_users, p_measures, p_months, p_values)]
+    known = np.in1d(measures, list(p_definitions.keys()))
+    users, measures, months, values = users[known], measures[known], months[known], values[known].astype(np.float64)
+    if not len(values):
+        return {}
+    # The values of each group are sorted, so the percentiles are read by position
+    order = np.lexsort((values, months, measures, users))
+    users, measures, months, values = users[order], measures[order], months[order], values[order]
+    change = np.ones(len(values), dtype=bool)
+    change[1:] = (users[1:] != users[:-1]) | (measures[1:] != measures[:-1]) | (months[1:] != months[:-1])
+    starts = np.flatnonzero(change)
+    counts = np.diff(np.append(starts, len(values)))
+    groups = np.cumsum(change) - 1
+    sums = np.add.reduceat(values, starts)
+    means = sums / counts
+    deviations = values - means[groups]
+    results = {
+        'avg': means,
+        'std': np.sqrt(np.add.reduceat(deviations * deviations, starts) / counts),
+        'sum': sums,
+        'count': counts.astype(np.float64),
+    }
+    nuis = {}
+    for aggregate in set(aggregate for definition in p_definitions.values() for nui_id, aggregate in definition):
+        if aggregate not in results:
+            results[aggregate] = _percentile(values, starts, counts, _quantile(aggregate))
+    group_users, group_measures, group_months = users[starts], measures[starts], months[starts]
+    for measure_id, definition in p_definitions.items():
+        selected = np.flatnonzero(group_measures == measure_id)
+        for nui_id, aggregate in definition:
+            for user, month, value in zip(group_users[selected], group_months[selected],
+                                          results[aggregate][selected]):
+                nuis[(int(user), nui_id, int(month))] = round(float(value), 2)
+    return nuis
+
+
+def store_nuis(p_orm, p_pilot_code, p_nuis):
+    """
+    Writes the NUI values that aren't stored yet or that changed
+
+    :param p_orm: The orm connection to the Shared Repository
+    :param p_pilot_code: The code of the pilot
+    :param p_nuis: A dict with the value of each (user_in_role_id, nui_id, month)
+
+    :return: A tuple with the number of inserted and updated NUI values
+    """
+    if not p_nuis:
+        return 0, 0
+    tables = p_orm.tables
+    nui_value = tables.NumericIndicatorValue.__table__
+    time_interval = tables.TimeInterval.__table__
+    user_in_role = tables.UserInRole.__table__
+    # Monthly time intervals of the NUIs
+    intervals = {}
+    for month in set(key[2] for key in p_nuis):
+        intervals[month] = p_orm._get_or_create(tables.TimeInterval, interval_start=_month_bound(month),
+                                                typical_period=NUI_PERIOD)[0].id
+    stored = {}
+    for value_id, user_id, nui_id, interval_id, value in p_orm.session.execute(
+            select([nui_value.c.id, nui_value.c.user_in_role_id, nui_value.c.nui_type_id,
+                    nui_value.c.time_interval_id, nui_value.c.nui_value])
+            .select_from(nui_value.join(user_in_role, user_in_role.c.id == nui_value.c.user_in_role_id))
+            .where(and_(user_in_role.c.pilot_code == p_pilot_code,
+                        nui_value.c.time_interval_id.in_(intervals.values())))):
+        stored[(user_id, nui_id, interval_id)] = (value_id, value)
+    inserts = []
+    updates = []
+    for (user_id, nui_id, month), value in p_nuis.items():
+        key = (user_id, nui_id, intervals[month])
+        if key not in stored:
+            inserts.append({'user_in_role_id': user_id, 'nui_type_id': nui_id, 'time_interval_id': intervals[month],
+                            'nui_value': value})
+        elif stored[key][1] is None or round(float(stored[key][1]), 2) != value:
+            updates.append({'value_id': stored[key][0], 'new_value': value})
+    if inserts:
+        p_orm.session.execute(nui_value.insert(), inserts)
+    if updates:
+        p_orm.session.execute(nui_value.update().where(nui_value.c.id == bindparam('value_id'))
+                              .values(nui_value=bindparam('new_value')), updates)
+    return len(inserts), len(updates)
+
+
+def is_aggregate(p_aggregate):
+    """
+    Checks if the given name is an available aggregate
+
+    :param p_aggregate: The name of the aggregate
+
+    :return: True if the aggregate can be computed
+    """
+    try:
+        _quantile(p_aggregate)
+    except ValueError:
+        return p_aggregate in ('avg', 'std', 'sum', 'count')
+    return True
+
+
+def _quantile(p_aggregate):
+    """
+    Gives the quantile of the aggregates read by position
+    """
+    quantiles = {'min': 0.0, 'median': 0.5, 'max': 1.0}
+    if p_aggregate in quantiles:
+        return quantiles[p_aggregate]
+    if p_aggregate.startswith('p') and p_aggregate[1:].isdigit() and 0 <= int(p_aggregate[1:]) <= 100:
+        return int(p_aggregate[1:]) / 100.0
+    raise ValueError("Unknown aggregate %s" % p_aggregate)
+
+
+def _percentile(p_values, p_starts, p_counts, p_quantile):
+    """
+    Gives the quantile of each group of sorted values, interpolating linearly between the closest values
+    """
+    position = (p_counts - 1) * p_quantile
+    lower = np.floor(position).astype(np.int64)
+    upper = np.minimum(lower + 1, p_counts - 1)
+    fraction = position - lower
+    return p_values[p_starts + lower] * (1 - fraction) + p_values[p_starts + upper] * fraction
+
+
+def _month_start(p_time):
+    """
+    Gives the start of the UTC month of the given time
+    """
+    return p_time.to('UTC').floor('month')
+
+
+def _month_bound(p_month):
+    """
+    Gives the start of a month counted since 1970
+    """
+    return arrow.get(datetime(1970 + p_month // 12, p_month % 12 + 1, 1))
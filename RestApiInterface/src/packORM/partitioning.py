@@ -0,0 +1,288 @@
+# -*- coding: utf-8 -*-
+
+"""
+Monthly range partitioning of the LEA tables.
+
+The LEA tables are partitioned by the time of their rows, so the time bounded queries only read the partitions of the
+requested months and the old months can be detached without rewriting the table. Each partitioned table has a default
+partition keeping the rows outside of the created months, so the inserts never fail if the future partitions are not
+created in time.
+
+The partitioned tables need PostgreSQL 11 or newer. With older servers the tables are kept unpartitioned.
+
+"""
+
+import os
+import inspect
+import logging
+import ConfigParser
+from datetime import datetime
+
+from sqlalchemy import text
+from sqlalchemy.schema import AddConstraint, CreateIndex
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+# Partitioned tables: table name -> (partition column, primary key columns). The primary key of a partitioned table
+# must contain the partition column
+PARTITIONED_TABLES = {
+    'executed_action': ('execution_datetime', ('id', 'execution_datetime')),
+    'executed_transformed_action': ('transformed_execution_datetime', ('id', 'transformed_execution_datetime')),
+    'payload_value': ('acquisition_datetime', ('cd_metric_id', 'cd_action_id', 'acquisition_datetime')),
+}
+
+# Default configuration values
+PARTITIONING = {
+    'months_ahead': 3       # Number of monthly partitions created after the current month
+}
+
+config = ConfigParser.ConfigParser()
+# Checks actual path of the file and sets config file.
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+config_dir = os.path.abspath(current_dir + '../../../conf/rest_api.cfg')
+config.read(config_dir)
+
+if 'partitioning' in config.sections():
+    # We have config file with data
+    for option in PARTITIONING:
+        if config.has_option('partitioning', option) and config.get('partitioning', option):
+            PARTITIONING[option] = config.getint('partitioning', option)
+
+
+def get_partitioned_tables(p_tables):
+    """
+    Gives the tables of a schema that are partitioned by month
+
+    :param p_tables: The tables instance containing available tables
+
+    :return: A list of sqlalchemy Table
+    """
+    return [table for table in p_tables.Base.metadata.sorted_tables if table.name in PARTITIONED_TABLES]
+
+
+def supports_partitioning(p_connection):
+    """
+    Checks if the database server can partition the tables
+
+    :param p_connection: A sqlalchemy connection to the database
+
+    :return: True if the server is PostgreSQL 11 or newer
+    """
+    version = p_connection.dialect.server_version_info or (0,)
+    return p_connection.dialect.name == 'postgresql' and version >= (11,)
+
+
+def is_partitioned(p_connection, p_table):
+    """
+    Checks if a table is already partitioned in the database
+
+    :param p_connection: A sqlalchemy connection to the database
+    :param p_table: The sqlalchemy Table
+
+    :return: True if the table is partitioned
+    """
+    res = p_connection.execute(text("SELECT count(*) FROM pg_partitioned_table p "
+                                    "JOIN pg_class c ON c.oid = p.partrelid "
+                                    "JOIN pg_namespace n ON n.oid = c.relnamespace "
+                                    "WHERE n.nspname = :schema AND c.relname = :name"),
+                               schema=p_table.schema, name=p_table.name).scalar()
+    return res > 0
+
+
+def partition_tables(p_connection, p_tables):
+    """
+    Converts the LEA tables of a schema into monthly partitioned tables, keeping their rows. The tables already
+    partitioned are skipped.
+
+    :param p_connection: A sqlalchemy connection to the database
+    :param p_tables: The tables instance containing available tables
+
+    :return: A list with the names of the converted tables
+    """
+    if not supports_partitioning(p_connection):
+        logging.warning("partition_tables: the database server doesn't support partitioned tables with primary "
+                        "keys, the LEA tables are not partitioned")
+        return []
+    res = []
+    for table in get_partitioned_tables(p_tables):
+        if not is_partitioned(p_connection, table):
+            _rebuild_table(p_connection, table, True)
+            res.append(table.name)
+    return res
+
+
+def unpartition_tables(p_connection, p_tables):
+    """
+    Converts back the partitioned LEA tables of a schema into plain tables, keeping their rows.
+
+    :param p_connection: A sqlalchemy connection to the database
+    :param p_tables: The tables instance containing available tables
+
+    :return: A list with the names of the converted tables
+    """
+    if not supports_partitioning(p_connection):
+        return []
+    res = []
+    for table in get_partitioned_tables(p_tables):
+        if is_partitioned(p_connection, table):
+            _rebuild_table(p_connection, table, False)
+            res.append(table.name)
+    return res
+
+
+def create_future_partitions(p_connection, p_tables, p_months_ahead=None):
+    """
+    Creates the partitions of the current month and of the following months for every partitioned table of a schema.
+    It must be executed periodically, before the last created month is reached.
+
+    :param p_connection: A sqlalchemy connection to the database
+    :param p_tables: The tables instance containing available tables
+    :param p_months_ahead: The number of months created after the current one. Defaults to the configured value
+
+    :return: A list with the names of the created partitions
+    """
+    if not supports_partitioning(p_connection):
+        return []
+    months_ahead = PARTITIONING['months_ahead'] if p_months_ahead is None else p_months_ahead
+    first_month = _month_start(datetime.utcnow())
+    last_month = _add_months(first_month, months_ahead)
+    res = []
+    for table in get_partitioned_tables(p_tables):
+        if is_partitioned(p_connection, table):
+            res.extend(create_partitions(p_connection, table, table.name, first_month, last_month))
+    return res
+
+
+def create_partitions(p_connection, p_table, p_parent_name, p_first_month, p_last_month):
+    """
+    Creates the missing monthly partitions of a table between two months, both included.
+
+    A month is skipped if the default partition already has rows of that month, because PostgreSQL refuses to create
+    it. These rows must be moved by hand.
+
+    :param p_connection: A sqlalchemy connection to the database
+    :param p_table: The sqlalchemy Table of the partitioned table
+    :param p_parent_name: The current name of the partitioned table in the database
+    :param p_first_month: A datetime with the first month
+    :param p_last_month: A datetime with the last month
+
+    :return: A list with the names of the created partitions
+    """
+    column = PARTITIONED_TABLES[p_table.name][0]
+    default_partition = '%s.%s_default' % (p_table.schema, p_table.name)
+    res = []
+    month = _month_start(p_first_month)
+    while month <= p_last_month:
+        next_month = _add_months(month, 1)
+        name = '%s_p%s' % (p_table.name, month.strftime('%Y_%m'))
+        exists = p_connection.execute(text("SELECT to_regclass(:name) IS NOT NULL"),
+                                      name='%s.%s' % (p_table.schema, name)).scalar()
+        if not exists:
+            in_default = p_connection.execute(text("SELECT count(*) FROM %s WHERE %s >= :start AND %s < :end" %
+                                                   (default_partition, column, column)),
+                                              start=_bound(month), end=_bound(next_month)).scalar()
+            if in_default:
+                logging.error("create_partitions: the default partition of %s has %s rows of %s, the partition %s "
+                              "is not created", p_table.name, in_default, month.strftime('%Y-%m'), name)
+            else:
+                p_connection.execute("CREATE TABLE %s.%s PARTITION OF %s.%s FOR VALUES FROM ('%s') TO ('%s')" %
+                                     (p_table.schema, name, p_table.schema, p_parent_name, _bound(month),
+                                      _bound(next_month)))
+                res.append(name)
+        month = next_month
+    if res:
+        logging.info("create_partitions: created %s partitions of %s", len(res), p_table.name)
+    return res
+
+
+def _rebuild_table(p_connection, p_table, p_partitioned):
+    """
+    Creates a copy of a table, partitioned or not, moves its rows and replaces the original table.
+
+    The constraints and indexes of the table are created again from its definition. The foreign keys can't reference
+    the partitioned tables, because their id isn't unique by itself, so the foreign keys of other tables to a
+    partitioned table are dropped.
+
+    :param p_connection: A sqlalchemy connection to the database
+    :param p_table: The sqlalchemy Table to be rebuilt
+    :param p_partitioned: True to create a partitioned table, False to create a plain one
+
+    :return: None
+    """
+    schema, name = p_table.schema, p_table.name
+    new_name = name + '_rebuilt'
+    column, primary_key = PARTITIONED_TABLES[name]
+    if p_partitioned:
+        p_connection.execute("CREATE TABLE %s.%s (LIKE %s.%s INCLUDING DEFAULTS) PARTITION BY RANGE (%s)" %
+                             (schema, new_name, schema, name, column))
+        p_connection.execute("CREATE TABLE %s.%s_default PARTITION OF %s.%s DEFAULT" % (schema, name, schema, new_name))
+        # Creating the months of the existing rows and the following ones
+        first_month = p_connection.execute("SELECT min(%s) AT TIME ZONE 'UTC' FROM %s.%s" %
+                                           (column, schema, name)).scalar()
+        first_month = min(first_month, datetime.utcnow()) if first_month else datetime.utcnow()
+        last_month = _add_months(_month_start(datetime.utcnow()), PARTITIONING['months_ahead'])
+        create_partitions(p_connection, p_table, new_name, first_month, last_month)
+    else:
+        p_connection.execute("CREATE TABLE %s.%s (LIKE %s.%s INCLUDING DEFAULTS)" % (schema, new_name, schema, name))
+        primary_key = [primary_column.name for primary_column in p_table.primary_key.columns]
+    p_connection.execute("INSERT INTO %s.%s SELECT * FROM %s.%s" % (schema, new_name, schema, name))
+    # The foreign keys of other tables referencing this one and the old partitions are dropped too
+    p_connection.execute("DROP TABLE %s.%s CASCADE" % (schema, name))
+    p_connection.execute("ALTER TABLE %s.%s RENAME TO %s" % (schema, new_name, name))
+    # Creating again the constraints and the indexes of the table
+    p_connection.execute("ALTER TABLE %s.%s ADD CONSTRAINT %s_pkey PRIMARY KEY (%s)" %
+                         (schema, name, name, ', '.join(primary_key)))
+    for constraint in p_table.constraints:
+        if constraint is p_table.primary_key or getattr(constraint, 'referred_table', None) is not None:
+            continue
+        if p_partitioned and column not in constraint.columns:
+            logging.warning("_rebuild_table: the constraint %s of %s doesn't contain the partition column, it is "
+                            "not created", constraint.name, name)
+            continue
+        p_connection.execute(AddConstraint(constraint))
+    for foreign_key in p_table.foreign_key_constraints:
+        if foreign_key.referred_table.name not in PARTITIONED_TABLES or \
+                not is_partitioned(p_connection, foreign_key.referred_table):
+            p_connection.execute(AddConstraint(foreign_key))
+    if not p_partitioned:
+        # Restoring the foreign keys of the plain tables referencing this one
+        for table in p_table.metadata.sorted_tables:
+            if table.name in PARTITIONED_TABLES:
+                continue
+            for foreign_key in table.foreign_key_constraints:
+                if foreign_key.referred_table is p_table:
+                    p_connection.execute(AddConstraint(foreign_key))
+    for index in p_table.indexes:
+        p_connection.execute(CreateIndex(index))
+    logging.info("_rebuild_table: %s.%s rebuilt as a %s table", schema, name,
+                 'partitioned' if p_partitioned else 'plain')
+
+
+def _month_start(p_date):
+    """
+    Gives the first instant of the month of a date
+    """
+    return datetime(p_date.year, p_date.month, 1)
+
+
+def _bound(p_month):
+    """
+    Gives the UTC timestamp literal of the first instant of a month
+    """
+    return p_month.strftime('%Y-%m-%d 00:00:00+00')
+
+
+def _add_months(p_date, p_months):
+    """
+    Gives the first instant of the month placed the given number of months after the month of a date
+    """
+    month = p_date.month - 1 + p_months
+    return datetime(p_date.year + month // 12, month % 12 + 1, 1)
@@ -16,7 +16,7 @@ import arrow
 from itsdangerous import (TimedJSONWebSignatureSerializer
                           as Serializer, BadSignature, SignatureExpired)
 from sqlalchemy import Column, Integer, String, Boolean, Sequence, Numeric, Float, BigInteger, ForeignKey, \
-    LargeBinary, TIMESTAMP, Text, DateTime, TypeDecorator, event, MetaData, UniqueConstraint, Index
+    LargeBinary, TIMESTAMP, Text, DateTime, Date, TypeDecorator, event, MetaData, UniqueConstraint, Index
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship, validates
 from sqlalchemy.schema import CreateSchema
@@ -1287,3 +1287,56 @@ class ValueEvidenceNotice(Base):
     source_evidence_id = Column(Integer, ForeignKey('source_evidence.id'), nullable=True)
     author_id = Column(Integer, ForeignKey('user_in_role.id'))
     value_id = Column(Integer, ForeignKey('variation_measure_value.id'))
+
+
+class DailyLEARollup(Base):
+    """
+    Daily aggregates of the LEAs of each user, action and location. They are updated from the new executed actions
+    by the rollup job, so the measures can be derived without scanning the LEAs.
+    """
+
+    __tablename__ = 'daily_lea_rollup'
+
+    user_in_role_id = Column(Integer, ForeignKey('user_in_role.id'), primary_key=True)
+    day = Column(Date, primary_key=True)            # UTC day of the executed actions
+    cd_action_id = Column(Integer, ForeignKey('cd_action.id'), primary_key=True)
+    location_id = Column(Integer, ForeignKey('location.id'), primary_key=True)
+    lea_count = Column(Integer, nullable=False)
+    first_execution_datetime = Column(ArrowType(timezone=True), nullable=False)
+    last_execution_datetime = Column(ArrowType(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return "<DailyLEARollup(user_in_role_id='%s', day='%s', cd_action_id='%s', location_id='%s', " \
+               "lea_count='%s')>" % (self.user_in_role_id, self.day, self.cd_action_id, self.location_id,
+                                     self.lea_count)
+
+
+class RollupWatermark(Base):
+    """
+    The last executed action aggregated by each rollup job
+    """
+
+    __tablename__ = 'rollup_watermark'
+
+    rollup_name = Column(String(50), primary_key=True)
+    last_executed_action_id = Column(Integer, nullable=False)
+    updated = Column(ArrowType(timezone=True), server_default=utcnow(), nullable=False)
+
+    def __repr__(self):
+        return "<RollupWatermark(rollup_name='%s', last_executed_action_id='%s')>" % \
+               (self.rollup_name, self.last_executed_action_id)
+
+
+class SchemaVersion(Base):
+    """
+    The schema version table stores a marker row written when the schema is created and its base data is inserted.
+    The API checks this row at startup instead of reflecting the whole schema.
+    """
+
+    __tablename__ = 'schema_version'
+
+    version = Column(String(20), primary_key=True)
+    installed = Column(ArrowType(timezone=True), server_default=utcnow(), nullable=False)
+
+    def __repr__(self):
+        return "<SchemaVersion(version='%s', installed='%s')>" % (self.version, self.installed)
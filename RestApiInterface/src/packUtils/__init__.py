@@ -1,4 +1,5 @@
 # -*- coding: utf-8 -*-
 import utilities
+import request_timing
 
-__author__ = 'Rubén Mulero'
\ No newline at end of file
+__author__ = 'Rubén Mulero'
@@ -0,0 +1,238 @@
+# -*- coding: utf-8 -*-
+
+"""
+Per-request timing of the phases of the API.
+
+Each request measures the time spent in its phases (JSON parsing, data validation, user authentication, database
+writes, audit insert...). The durations are aggregated into histograms, by endpoint and phase, that can be scraped in
+the Prometheus text format. When it is enabled, the phases of each request are also returned in its Server-Timing
+header, so they can be read in the developer tools of the browser or with any HTTP client.
+
+The SQL statements of the request, counted by the statement_counter module, are added as the 'db' phase, and their
+number is aggregated into a second histogram.
+
+The behaviour is defined in the 'request_timing' section of the config file:
+
+    [request_timing]
+    server_timing=false
+    metrics=false
+
+"""
+
+import os
+import inspect
+import logging
+import threading
+import ConfigParser
+from collections import OrderedDict
+from contextlib import contextmanager
+from timeit import default_timer
+from flask import g, has_request_context
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+# Default behaviour of the timing, overridden by the config file
+TIMING = {
+    'server_timing': False,             # Returns the phases of each request in the Server-Timing header
+    'metrics': False                    # Exposes the histograms of the phases in the metrics endpoint
+}
+# Upper bounds of the histogram buckets in seconds
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Upper bounds of the histogram buckets of the number of SQL statements
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+METRIC_NAME = 'c4a_api_phase_duration_seconds'
+STATEMENT_METRIC_NAME = 'c4a_api_sql_statements'
+TOTAL_PHASE = 'total'
+DB_PHASE = 'db'
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+config = ConfigParser.ConfigParser()
+config.read(os.path.abspath(current_dir + '../../../conf/rest_api.cfg'))
+
+if 'request_timing' in config.sections():
+    for option in TIMING:
+        if config.has_option('request_timing', option) and config.get('request_timing', option):
+            TIMING[option] = config.getboolean('request_timing', option)
+
+
+class PhaseHistograms(object):
+
+    def __init__(self, p_buckets=BUCKETS, p_name=METRIC_NAME, p_help='Duration of the phases of the API requests.',
+                 p_label='phase'):
+        """
+        Thread safe histograms of the phase durations, indexed by endpoint and phase
+
+
+        :param p_buckets: The upper bounds of the buckets in seconds
+        :param p_name: The name of the metric
+        :param p_help: The description of the metric
+        :param p_label: The name of the label of the second index
+
+        :return: Instance of the class
+        """
+        self.buckets = tuple(sorted(p_buckets))
+        self.name = p_name
+        self.help = p_help
+        self.label = p_label
+        self.lock = threading.Lock()
+        self.histograms = OrderedDict()
+
+    def observe(self, p_endpoint, p_phase, p_duration):
+        """
+        Adds a duration to the histogram of the given endpoint and phase
+
+        :param p_endpoint: The name of the endpoint
+        :param p_phase: The name of the phase
+        :param p_duration: The duration in seconds
+
+        :return: None
+        """
+        with self.lock:
+            histogram = self.histograms.get((p_endpoint, p_phase))
+            if histogram is None:
+                histogram = self.histograms[(p_endpoint, p_phase)] = {
+                    'buckets': [0] * len(self.buckets),
+                    'count': 0,
+                    'sum': 0.0
+                }
+            for index, bound in enumerate(self.buckets):
+                if p_duration <= bound:
+                    histogram['buckets'][index] += 1
+                    break
+            histogram['count'] += 1
+            histogram['sum'] += p_duration
+
+    def snapshot(self):
+        """
+        Gives a copy of the histograms, with cumulative buckets
+
+        :return: An OrderedDict with (endpoint, phase) keys and dicts with 'buckets' (a list of (bound, count)
+                tuples), 'count' and 'sum' values
+        """
+        with self.lock:
+            histograms = [(key, list(value['buckets']), value['count'], value['sum'])
+                          for key, value in self.histograms.items()]
+        snapshot = OrderedDict()
+        for key, buckets, count, total in histograms:
+            cumulative, accumulated = [], 0
+            for bound, observations in zip(self.buckets, buckets):
+                accumulated += observations
+                cumulative.append((bound, accumulated))
+            snapshot[key] = {'buckets': cumulative, 'count': count, 'sum': total}
+        return snapshot
+
+    def render(self):
+        """
+        Writes the histograms in the Prometheus text exposition format
+
+        :return: A string with the metrics
+        """
+        lines = ['# HELP %s %s' % (self.name, self.help),
+                 '# TYPE %s histogram' % self.name]
+        for (endpoint, phase), histogram in self.snapshot().items():
+            labels = 'endpoint="%s",%s="%s"' % (endpoint, self.label, phase)
+            for bound, count in histogram['buckets']:
+                lines.append('%s_bucket{%s,le="%r"} %d' % (self.name, labels, bound, count))
+            lines.append('%s_bucket{%s,le="+Inf"} %d' % (self.name, labels, histogram['count']))
+            lines.append('%s_sum{%s} %r' % (self.name, labels, histogram['sum']))
+            lines.append('%s_count{%s} %d' % (self.name, labels, histogram['count']))
+        return '\n'.join(lines) + '\n'
+
+    def reset(self):
+        with self.lock:
+            self.histograms.clear()
+
+
+HISTOGRAMS = PhaseHistograms()
+STATEMENT_HISTOGRAMS = PhaseHistograms(STATEMENT_BUCKETS, STATEMENT_METRIC_NAME,
+                                       'Number of SQL statements of the API requests.', 'kind')
+
+
+def render_metrics():
+    """
+    Writes all the histograms in the Prometheus text exposition format
+
+    :return: A string with the metrics
+    """
+    return HISTOGRAMS.render() + STATEMENT_HISTOGRAMS.render()
+
+
+def start_request():
+    """
+    Starts the timing of the current request. Called before the request is dispatched
+
+    :return: None
+    """
+    g.timing_start = default_timer()
+    g.timing_phases = OrderedDict()
+
+
+@contextmanager
+def phase(p_name):
+    """
+    Measures the enclosed block as a phase of the current request. The durations of a phase measured several times
+    in the same request are added. Outside a timed request the block is only executed.
+
+    :param p_name: The name of the phase
+
+    :return: None
+    """
+    if not has_request_context() or getattr(g, 'timing_phases', None) is None:
+        yield
+        return
+    start = default_timer()
+    try:
+        yield
+    finally:
+        g.timing_phases[p_name] = g.timing_phases.get(p_name, 0.0) + default_timer() - start
+
+
+def finish_request(p_endpoint, p_statements=None):
+    """
+    Finishes the timing of the current request and adds its phases to the histograms
+
+    :param p_endpoint: The name of the requested endpoint
+    :param p_statements: The StatementStats instance with the SQL statements of the request, if they were counted
+
+    :return: An OrderedDict with the durations in seconds of the phases and the total duration of the request, or
+            None if the request was not timed
+    """
+    phases = getattr(g, 'timing_phases', None)
+    if phases is None:
+        return None
+    g.timing_phases = None
+    if p_statements is not None:
+        phases[DB_PHASE] = p_statements.duration
+        STATEMENT_HISTOGRAMS.observe(p_endpoint, 'statements', p_statements.statements)
+        STATEMENT_HISTOGRAMS.observe(p_endpoint, 'repeated', sum(count - 1 for _, count in p_statements.repeated()))
+    phases[TOTAL_PHASE] = default_timer() - g.timing_start
+    for name, duration in phases.items():
+        HISTOGRAMS.observe(p_endpoint, name, duration)
+    return phases
+
+
+def server_timing_header(p_phases, p_statements=None):
+    """
+    Builds the Server-Timing header value of the given phases
+
+    :param p_phases: An OrderedDict with the durations in seconds of the phases
+    :param p_statements: The StatementStats instance of the request, described in the 'db' phase
+
+    :return: The header value, with the durations in milliseconds. E.g. 'parse;dur=0.12, total;dur=3.40'
+    """
+    values = []
+    for name, duration in p_phases.items():
+        value = '%s;dur=%.2f' % (name, duration * 1000)
+        if name == DB_PHASE and p_statements is not None:
+            value += ';desc="%d statements, %d repeated shapes"' % (p_statements.statements,
+                                                                     len(p_statements.repeated()))
+        values.append(value)
+    return ', '.join(values)
@@ -0,0 +1,207 @@
+# -*- coding: utf-8 -*-
+
+"""
+Counter of the SQL statements executed by the application.
+
+The statements executed by every SQLAlchemy engine are counted, with their total database time and their shape (the
+SQL text with the bound parameters removed), in the tracking scopes active in the current thread. A scope can be a
+request of the API or an activity discovery run. When a scope finishes, a warning is logged if it ran too many
+statements or if the same shape was repeated too many times, which usually means a N+1 query pattern.
+
+The thresholds are defined in the 'statement_counter' section of the config file:
+
+    [statement_counter]
+    max_statements=100
+    max_repeated=20
+
+"""
+
+import os
+import re
+import inspect
+import logging
+import threading
+import ConfigParser
+from collections import Counter
+from contextlib import contextmanager
+from timeit import default_timer
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+# Default thresholds of a scope, overridden by the config file. 0 disables the threshold
+THRESHOLDS = {
+    'max_statements': 100,              # Statements executed by a scope
+    'max_repeated': 20                  # Executions of the same statement shape in a scope
+}
+
+current_dir = os.path.dirname(os.path.abspath(inspect.getfile(inspect.currentframe())))
+config = ConfigParser.ConfigParser()
+config.read(os.path.abspath(current_dir + '../../../conf/rest_api.cfg'))
+
+if 'statement_counter' in config.sections():
+    for option in THRESHOLDS:
+        if config.has_option('statement_counter', option) and config.get('statement_counter', option):
+            THRESHOLDS[option] = config.getint('statement_counter', option)
+
+# Bound parameters in the psycopg2 (%(name)s, %s) and qmark (?) styles
+PARAMETER = re.compile(r'%\(\w+\)s|%s|\?')
+# Lists of parameters, as in the IN clauses or the multi-row inserts
+PARAMETER_LIST = re.compile(r'\?(?:\s*,\s*\?)+')
+WHITESPACE = re.compile(r'\s+')
+
+_local = threading.local()
+
+
+class StatementStats(object):
+
+    __slots__ = ('name', 'statements', 'duration', 'shapes')
+
+    def __init__(self, p_name):
+        """
+        The statements executed in a tracking scope
+
+
+        :param p_name: The name of the scope (the endpoint of a request, the discovery run of a user...)
+
+        :return: Instance of the class
+        """
+        self.name = p_name
+        self.statements = 0
+        self.duration = 0.0
+        self.shapes = Counter()
+
+    def add(self, p_shape, p_duration):
+        self.statements += 1
+        self.duration += p_duration
+        self.shapes[p_shape] += 1
+
+    def repeated(self):
+        """
+        Gives the statement shapes executed more than once
+
+        :return: A list of (shape, executions) tuples, the most repeated first
+        """
+        return [(shape, count) for shape, count in self.shapes.most_common() if count > 1]
+
+    def check_thresholds(self, p_thresholds=None):
+        """
+        Logs a warning for each exceeded threshold
+
+        :param p_thresholds: A dict with the 'max_statements' and 'max_repeated' thresholds. By default, the ones of
+                the config file
+
+        :return: True if any threshold was exceeded
+        """
+        thresholds = p_thresholds or THRESHOLDS
+        exceeded = False
+        if thresholds['max_statements'] and self.statements > thresholds['max_statements']:
+            logging.warning("statement_counter: %s executed %d SQL statements in %.2f ms (threshold %d)",
+                            self.name, self.statements, self.duration * 1000, thresholds['max_statements'])
+            exceeded = True
+        if thresholds['max_repeated']:
+            for shape, count in self.repeated():
+                if count <= thresholds['max_repeated']:
+                    break
+                logging.warning("statement_counter: %s executed %d times the same SQL statement (threshold %d), "
+                                "possible N+1 queries: %s", self.name, count, thresholds['max_repeated'], shape[:300])
+                exceeded = True
+        return exceeded
+
+
+def statement_shape(p_statement):
+    """
+    Normalizes a SQL statement, so the statements that only differ in their parameters have the same shape
+
+    :param p_statement: The SQL text of the statement
+
+    :return: The shape of the statement
+    """
+    shape = PARAMETER.sub('?', p_statement)
+    shape = PARAMETER_LIST.sub('?, ...', shape)
+    return WHITESPACE.sub(' ', shape).strip()
+
+
+def begin(p_name):
+    """
+    Starts a tracking scope in the current thread. The scopes can be nested: a statement is counted in all the
+    active scopes.
+
+    :param p_name: The name of the scope
+
+    :return: The StatementStats instance of the scope
+    """
+    stats = StatementStats(p_name)
+    if not hasattr(_local, 'scopes'):
+        _local.scopes = []
+    _local.scopes.append(stats)
+    return stats
+
+
+def end(p_stats, p_thresholds=None):
+    """
+    Finishes a tracking scope and checks its thresholds
+
+    :param p_stats: The StatementStats instance returned by begin
+    :param p_thresholds: A dict with the thresholds. By default, the ones of the config file
+
+    :return: The given StatementStats instance
+    """
+    if p_stats is None:
+        return None
+    scopes = getattr(_local, 'scopes', [])
+    if p_stats in scopes:
+        scopes.remove(p_stats)
+    p_stats.check_thresholds(p_thresholds)
+    return p_stats
+
+
+@contextmanager
+def track(p_name, p_thresholds=None):
+    """
+    Tracks the statements executed in the enclosed block
+
+    :param p_name: The name of the scope
+    :param p_thresholds: A dict with the thresholds. By default, the ones of the config file
+
+    :return: The StatementStats instance of the scope
+    """
+    stats = begin(p_name)
+    try:
+        yield stats
+    finally:
+        end(stats, p_thresholds)
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if getattr(_local, 'scopes', None):
+        conn.info.setdefault('statement_counter_start', []).append(default_timer())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    scopes = getattr(_local, 'scopes', None)
+    starts = conn.info.get('statement_counter_start')
+    if scopes and starts:
+        duration = default_timer() - starts.pop()
+        shape = statement_shape(statement)
+        for stats in scopes:
+            stats.add(shape, duration)
+
+
+@event.listens_for(Engine, 'handle_error')
+def _handle_error(exception_context):
+    # The failed statement doesn't reach after_cursor_execute
+    connection = exception_context.connection
+    if connection is not None and connection.info.get('statement_counter_start'):
+        connection.info['statement_counter_start'].pop()
@@ -3,3 +3,11 @@
 import test_api
 import test_post_orm
 import test_harss
+import test_kasteren_data_transformer
+import test_statement_counter
+import test_database_generator
+import test_query_plans
+import test_partitioning
+import test_lea_archive
+import test_nui_engine
+import test_casas_executor
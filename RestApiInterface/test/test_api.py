@@ -17,7 +17,9 @@ from base64 import b64encode
 
 from packControllers import post_orm, ar_post_orm, sr_post_orm
 from packFlask.api import app
+from packORM import database_generator
 from packUtils.utilities import Utilities
+from packUtils import request_timing
 
 __author__ = 'Rubén Mulero'
 __copyright__ = "Copyright 2016, City4Age project"
@@ -75,6 +77,14 @@ class FlaskTestCase(unittest.TestCase):
         response = self.app.get('/api/0.1/get_my_info')
         assert "ip" in response.data             # If response data cotnains the IP string, it is working well
 
+    def test_lazy_database(self):
+        """ Test if the session is opened on its first use and if the database has the current schema version"""
+        ar_database = ar_post_orm.ARPostORM()
+        self.assertIsNone(ar_database._session)
+        self.assertTrue(database_generator.check_database(ar_database, self.sr_database))
+        self.assertIsNotNone(ar_database._session)
+        ar_database.close()
+
     ###################################################
     ########   POST Tests
     ###################################################
@@ -112,6 +122,23 @@ class FlaskTestCase(unittest.TestCase):
                                 headers=self.headers_good)
         self.assertEqual(response.status_code, 200)
 
+    def test_server_timing(self):
+        """ Test if the phases of the request are returned in the Server-Timing header and in the metrics"""
+        request_timing.TIMING['server_timing'] = True
+        request_timing.TIMING['metrics'] = True
+        try:
+            response = self.app.post('/api/0.1/add_action', data="Not a json data format",
+                                     content_type='application/json', headers=self.headers_good)
+            phases = [value.split(';')[0] for value in response.headers['Server-Timing'].split(', ')]
+            self.assertEqual(phases, ['auth', 'parse', 'audit', 'db', 'total'])
+            # The metrics are only given to authenticated administrators
+            self.assertEqual(self.app.get('/metrics').status_code, 401)
+            response = self.app.get('/metrics', headers=self.headers_good)
+            assert 'endpoint="add_action",phase="parse",le="+Inf"' in response.data
+        finally:
+            request_timing.TIMING['server_timing'] = False
+            request_timing.TIMING['metrics'] = False
+
     ### Add_action
 
     # TODO add action related tests
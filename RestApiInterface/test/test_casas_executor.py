@@ -0,0 +1,85 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file tests the bounded executor of the CASAS AL binary with a fake binary, so it doesn't need a database.
+
+This file is divided into the following TESTS:
+
+-> Run Test:            Checks the output log, the exit status and the session of each run.
+-> Timeout Test:        Checks that the runs exceeding the wall-clock timeout are killed.
+
+"""
+
+import os
+import shutil
+import stat
+import tempfile
+import unittest
+
+from packActivityRecognition.casas_executor import CasasExecutor
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+# Fake AL binary: prints its arguments, its session and its CPU limit, then sleeps the seconds given in its config file
+FAKE_AL = """#!/bin/sh
+echo "args $*"
+echo "session $(ps -o sid= -p $$ | tr -d ' ') $$"
+echo "cpu $(ulimit -t)"
+sleep $(cat "$2")
+"""
+
+
+class CasasExecutorTestCase(unittest.TestCase):
+    def setUp(self):
+        self.working_dir = tempfile.mkdtemp()
+        self.binary = os.path.join(self.working_dir, 'fake_al')
+        with open(self.binary, 'w') as fake_al:
+            fake_al.write(FAKE_AL)
+        os.chmod(self.binary, stat.S_IRWXU)
+
+    def tearDown(self):
+        shutil.rmtree(self.working_dir)
+
+    def _job(self, p_user, p_sleep):
+        config_file = 'config_%s' % p_user
+        with open(os.path.join(self.working_dir, config_file), 'w') as config:
+            config.write(str(p_sleep))
+        return p_user, self.working_dir, config_file, 'log_%s' % p_user
+
+    def test_run(self):
+        """ Test if every run writes its output, runs in its own session and gets the CPU limit"""
+        executor = CasasExecutor(self.binary, p_max_processes=2, p_timeout=30, p_cpu_limit=60)
+        results = executor.run([self._job(1, 0), self._job(2, 0), self._job(3, 0)])
+        self.assertEqual([result['user_in_role'] for result in results], [1, 2, 3])
+        for result in results:
+            self.assertEqual(result['returncode'], 0)
+            self.assertFalse(result['timed_out'])
+            with open(os.path.join(self.working_dir, 'log_%s' % result['user_in_role'])) as log:
+                lines = log.read().splitlines()
+            self.assertEqual(lines[0], 'args -d config_%s' % result['user_in_role'])
+            session, pid = lines[1].split()[1:]
+            self.assertEqual(session, pid)
+            self.assertEqual(lines[2], 'cpu 60')
+        self.assertEqual(executor.run([]), [])
+
+    def test_timeout(self):
+        """ Test if a run exceeding the timeout is killed without blocking the other runs"""
+        executor = CasasExecutor(self.binary, p_max_processes=2, p_timeout=1)
+        results = executor.run([self._job(1, 30), self._job(2, 0)])
+        self.assertTrue(results[0]['timed_out'])
+        self.assertNotEqual(results[0]['returncode'], 0)
+        self.assertLess(results[0]['runtime'], 10)
+        self.assertFalse(results[1]['timed_out'])
+        self.assertEqual(results[1]['returncode'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
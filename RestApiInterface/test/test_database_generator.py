@@ -0,0 +1,61 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file tests the base data files of the database generator. It doesn't need a database.
+
+This file is divided into the following TESTS:
+
+-> Seed Data Test:      Checks that the data files of each schema match the columns of their tables.
+-> Accounts Test:       Checks the accounts data file and the parallel hashing of their passwords.
+
+"""
+
+import unittest
+
+from packORM import database_generator, ar_tables, sr_tables
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+class DatabaseGeneratorTestCase(unittest.TestCase):
+    def test_seed_data(self):
+        """ Test if the data files of both schemas can be inserted into their tables"""
+        for tables, table_names in ((ar_tables, database_generator.AR_SEED_TABLES),
+                                    (sr_tables, database_generator.SR_SEED_TABLES)):
+            for table_name in table_names:
+                table = getattr(tables, table_name).__table__
+                rows = database_generator.read_seed_data(table.name)
+                self.assertGreater(len(rows), 0)
+                for row in rows:
+                    self.assertTrue(set(row).issubset(table.c.keys()), row)
+                # The unique columns must not have repeated values
+                for column in table.c:
+                    if column.unique:
+                        values = [row[column.name] for row in rows if column.name in row]
+                        self.assertEqual(len(values), len(set(values)), column)
+
+    def test_accounts(self):
+        """ Test if every account has an existing role and pilot and if the passwords are hashed in order"""
+        accounts = database_generator.read_seed_data('user_in_system')
+        roles = set(row['role_name'] for row in database_generator.read_seed_data('cd_role'))
+        pilots = set(row['pilot_code'] for row in database_generator.read_seed_data('pilot'))
+        for account in accounts:
+            self.assertIn(account['role_name'], roles)
+            self.assertTrue(account['pilot_code'] is None or account['pilot_code'] in pilots)
+        passwords = [account['password'] for account in accounts[:3]]
+        hashes = database_generator.hash_passwords(passwords, 4)
+        self.assertEqual(len(hashes), 3)
+        for password, password_hash in zip(passwords, hashes):
+            self.assertTrue(password_hash == password)
+        self.assertEqual(database_generator.hash_passwords([], 4), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
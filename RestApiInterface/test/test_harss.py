@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file tests the HARS pattern model matching used to discover activities from the patterns found by CASAS.
+
+This file is divided into the following TESTS:
+
+-> Log Test:            Checks the parsing of the patterns and clusters of the log generated by CASAS AD.
+-> Combination Test:    Checks the generation of the combinations of EAMs.
+-> Score Test:          Checks the score functions of the EAMs.
+-> Search Test:         Checks that the pruned search of EAM combinations returns the same result as the exhaustive one.
+-> Cache Test:          Checks the reuse of the scores of the repeated instances of a pattern.
+-> Segmentation Test:   Checks the split of the annotated data into patterns and the annotation of the detected EAMs.
+
+"""
+
+import os
+import random
+import unittest
+
+import pandas as pd
+
+from packActivityRecognition.ad_pattern_filter import ADPatternFilter
+from packActivityRecognition.expert_activity_model import ExpertActivityModel
+from packActivityRecognition.LogReader import LogReader
+from packActivityRecognition.pattern_model_matching import PatternModelMatching
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+KASTEREN_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), '../al/datasets/kasteren_log.txt')
+
+ACTIONS = ['fridge', 'microwave', 'cupscupboard', 'platescupboard', 'toiletflush', 'halltoiletdoor', 'frontdoor',
+           'dishwasher', 'freezer', 'pansdoor']
+LOCATIONS = ['kitchen', 'bathroom', 'hall', 'bedroom', 'livingroom']
+
+
+def random_eamlist(p_random, p_size, p_midnight=False):
+    """
+    Builds a list of random EAMs
+
+    :param p_random: A random.Random instance
+    :param p_size: The number of EAMs
+    :param p_midnight: If True, the start range of every EAM crosses midnight (e.g. 22:00 - 07:00)
+    :return: A list of ExpertActivityModel instances
+    """
+    eamlist = []
+    for i in xrange(p_size):
+        start_hour = p_random.randint(0, 20)
+        if p_midnight:
+            start = [['%02d:00' % p_random.randint(18, 23), '%02d:30' % p_random.randint(0, 8)]]
+        else:
+            start = [['%02d:00' % start_hour, '%02d:30' % (start_hour + p_random.randint(0, 3))]]
+        eamlist.append(ExpertActivityModel('activity%s' % i, {
+            'locations': p_random.sample(LOCATIONS, p_random.randint(1, 2)),
+            'actions': p_random.sample(ACTIONS, p_random.randint(1, 4)),
+            'duration': p_random.choice([30, 60, 300, 900, 1800]),
+            'start': start
+        }))
+    return eamlist
+
+
+def random_pattern(p_random):
+    """
+    Builds a random pattern
+
+    :param p_random: A random.Random instance
+    :return: A tuple with the locations, actions, start and end of the pattern
+    """
+    actions = [p_random.choice(ACTIONS) for _ in xrange(p_random.randint(1, 6))]
+    locations = [p_random.choice(LOCATIONS) for _ in actions]
+    start = pd.Timestamp('2018-01-01 %02d:%02d:00' % (p_random.randint(0, 23), p_random.randint(0, 59)))
+    end = start + pd.Timedelta(seconds=p_random.randint(0, 2000))
+    return locations, actions, start, end
+
+
+class HarssTestCase(unittest.TestCase):
+    def setUp(self):
+        self.random = random.Random(4)
+
+    ###################################################################################################
+    ###################################################################################################
+    ######                              Log Test
+    ###################################################################################################
+    ###################################################################################################
+
+    def test_parse_log(self):
+        """ Test the parsing of the patterns and clusters from a file and from a text in memory"""
+        logreader = LogReader(KASTEREN_LOG)
+        logreader.parse_log()
+        self.assertEqual(107, len(logreader.patternlist))
+        self.assertEqual(52, len(logreader.clusterlist))
+        self.assertEqual(['HallBathroomDoor', 'ToiletFlush', 'HallBathroomDoor'], logreader.patternlist[0].actions)
+        self.assertEqual(64, logreader.patternlist[0].instances)
+        self.assertEqual([0, 17, 45, 57, 69, 79, 84], [p.number for p in logreader.clusterlist[0].patterns])
+        with open(KASTEREN_LOG) as logfile:
+            textreader = LogReader.from_text(logfile.read())
+        textreader.parse_log()
+        self.assertEqual([p.actions for p in logreader.patternlist], [p.actions for p in textreader.patternlist])
+        self.assertEqual(logreader.maxInstances, textreader.maxInstances)
+        self.assertEqual(logreader.minPatternValue, textreader.minPatternValue)
+
+    def test_compact_patterns(self):
+        """ Test that patterns and clusters share the parsed data instead of copying it"""
+        logreader = LogReader(KASTEREN_LOG)
+        logreader.parse_log()
+        first, second = logreader.patternlist[0], logreader.patternlist[17]
+        self.assertFalse(hasattr(first, '__dict__'))
+        self.assertIs(first.actions[0], second.actions[0])
+        self.assertIs(first, logreader.clusterlist[0].patterns[0])
+        self.assertEqual(len(first.actions), len(first.actionids))
+
+    def test_pattern_filter_reuses_log(self):
+        """ Test that the pattern filter uses an already parsed log without parsing it again"""
+        logreader = LogReader(KASTEREN_LOG)
+        logreader.parse_log()
+        prefilter = ADPatternFilter(logreader)
+        prefilter.filter_patterns()
+        self.assertEqual(107, len(logreader.patternlist))
+        self.assertEqual(107, len(prefilter.removedPatterns) + len(prefilter.defPatternlist))
+
+    ###################################################################################################
+    ###################################################################################################
+    ######                              Combination Test
+    ###################################################################################################
+    ###################################################################################################
+
+    def test_eam_combinations(self):
+        """ Test that the combinations of EAMs are generated lazily by size and in lexicographic order"""
+        pmd = PatternModelMatching(random_eamlist(self.random, 3), None, None)
+        combinations = pmd.eam_combinations()
+        self.assertFalse(isinstance(combinations, list))
+        self.assertEqual([(0,), (1,), (2,), (0, 1), (0, 2), (1, 2), (0, 1, 2)], list(combinations))
+        pmd = PatternModelMatching(random_eamlist(self.random, 20), None, None, maxcombsize=2)
+        self.assertEqual(20 + 190, sum(1 for _ in pmd.eam_combinations()))
+
+    ###################################################################################################
+    ###################################################################################################
+    ######                              Score Test
+    ###################################################################################################
+    ###################################################################################################
+
+    def test_start_time_scores(self):
+        """ Test the start time score of the EAMs, keeping the best score of their time ranges"""
+        eamlist = [ExpertActivityModel('breakfast', {'locations': ['kitchen'], 'actions': ['fridge'], 'duration': 600,
+                                                     'start': [['08:00', '09:00']]}),
+                   ExpertActivityModel('toilet', {'locations': ['bathroom'], 'actions': ['toiletflush'],
+                                                  'duration': 60, 'start': [['07:00', '07:30'], ['09:00', '10:00']]})]
+        pmd = PatternModelMatching(eamlist, None, None)
+        self.assertEqual([1.0, 1.0 / 1800 - 0.1], pmd.start_time_scores(pd.Timestamp('2018-01-01 08:30:00')).tolist())
+        self.assertEqual([0.0, 1.0 / 1790 - 0.1], pmd.start_time_scores(pd.Timestamp('2018-01-01 07:59:50')).tolist())
+        self.assertEqual([1.0 / 20 - 0.1, 1.0], pmd.start_time_scores(pd.Timestamp('2018-01-01 09:00:20')).tolist())
+        self.assertEqual((1.0 / 20 - 0.1 + 1.0) / 2, pmd.func_start_time(pd.Timestamp('2018-01-01 09:00:20'), (0, 1)))
+
+    def test_start_time_scores_midnight(self):
+        """ Test the start time score of the ranges crossing midnight, which never contain the pattern and are
+        measured to their start when the pattern starts before it and to their end otherwise"""
+        eamlist = [ExpertActivityModel('sleep', {'locations': ['bedroom'], 'actions': ['toiletflush'], 'duration': 600,
+                                                 'start': [['22:00', '07:00']]})]
+        pmd = PatternModelMatching(eamlist, None, None)
+        self.assertEqual([1.0 / 7200 - 0.1], pmd.start_time_scores(pd.Timestamp('2018-01-01 20:00:00')).tolist())
+        self.assertEqual([1.0 / 57600 - 0.1], pmd.start_time_scores(pd.Timestamp('2018-01-01 23:00:00')).tolist())
+        self.assertEqual([1.0 / 57600 - 0.1], pmd.start_time_scores(pd.Timestamp('2018-01-01 06:00:00')).tolist())
+
+    def test_duration_score(self):
+        """ Test the duration score of a combination of EAMs"""
+        pmd = PatternModelMatching(random_eamlist(self.random, 3), None, None)
+        start = pd.Timestamp('2018-01-01 10:00:00')
+        end = start + pd.Timedelta(seconds=pmd.eamlist[0].duration + pmd.eamlist[2].duration + 100)
+        self.assertAlmostEqual(0.9, pmd.func_duration(start, end, (0, 2)))
+
+    ###################################################################################################
+    ###################################################################################################
+    ######                              Search Test
+    ###################################################################################################
+    ###################################################################################################
+
+    def test_pruned_search_equals_exhaustive(self):
+        """ Test that the branch and bound search returns the same combination as the exhaustive one"""
+        for _ in xrange(10):
+            pmd = PatternModelMatching(random_eamlist(self.random, 8), None, None)
+            for _ in xrange(20):
+                locations, actions, start, end = random_pattern(self.random)
+                expected = pmd.find_models_for_pattern_exhaustive(locations, actions, start, end)
+                res = pmd.find_models_for_pattern(locations, actions, start, end)
+                self.assertEqual(expected[0], res[0])
+                self.assertEqual(expected[1], res[1])
+                self.assertEqual(expected[2], res[2])
+
+    def test_pruned_search_midnight_ranges(self):
+        """ Test that the pruned search equals the exhaustive one with start ranges crossing midnight"""
+        for _ in xrange(5):
+            pmd = PatternModelMatching(random_eamlist(self.random, 8, p_midnight=True), None, None)
+            for _ in xrange(20):
+                locations, actions, start, end = random_pattern(self.random)
+                expected = pmd.find_models_for_pattern_exhaustive(locations, actions, start, end)
+                self.assertEqual(expected, pmd.find_models_for_pattern(locations, actions, start, end))
+
+    def test_search_without_shared_actions(self):
+        """ Test the search result when no EAM shares actions with the pattern"""
+        pmd = PatternModelMatching(random_eamlist(self.random, 4), None, None)
+        start = pd.Timestamp('2018-01-01 10:00:00')
+        res = pmd.find_models_for_pattern(['kitchen'], ['unknownaction'], start, start)
+        self.assertEqual(['None'], res[1])
+        self.assertEqual([-1, -1, -1, -1], res[2])
+
+    def test_search_max_combination_size(self):
+        """ Test that the size limit of the combinations is respected"""
+        pmd = PatternModelMatching(random_eamlist(self.random, 8), None, None, maxcombsize=1)
+        for _ in xrange(20):
+            locations, actions, start, end = random_pattern(self.random)
+            expected = pmd.find_models_for_pattern_exhaustive(locations, actions, start, end)
+            res = pmd.find_models_for_pattern(locations, actions, start, end)
+            self.assertLessEqual(len(res[1]), 1)
+            self.assertEqual(expected[1], res[1])
+
+    ###################################################################################################
+    ###################################################################################################
+    ######                              Cache Test
+    ###################################################################################################
+    ###################################################################################################
+
+    def test_cached_search(self):
+        """ Test that the repeated instances of a pattern reuse the cached result"""
+        pmd = PatternModelMatching(random_eamlist(self.random, 8), None, None, startbucket=600, durationbucket=60)
+        start = pd.Timestamp('2018-01-01 10:00:00')
+        end = start + pd.Timedelta(seconds=100)
+        expected = pmd.find_models_for_pattern(['kitchen', 'hall'], ['fridge', 'frontdoor'], start, end)
+        res = pmd.find_models_for_pattern_cached(['kitchen', 'hall'], ['fridge', 'frontdoor'], start, end)
+        self.assertEqual(expected, res)
+        # Same sets, a start time in the same bucket of another day and a duration in the same bucket
+        start = pd.Timestamp('2018-01-02 10:05:00')
+        end = start + pd.Timedelta(seconds=110)
+        res = pmd.find_models_for_pattern_cached(['hall', 'kitchen', 'hall'], ['frontdoor', 'fridge'], start, end)
+        self.assertEqual(expected, res)
+        self.assertEqual({'hits': 1, 'misses': 1, 'hit_rate': 0.5, 'entries': 1}, pmd.cache_statistics())
+
+    def test_cache_eviction(self):
+        """ Test that the least recently used entries are evicted from the cache"""
+        pmd = PatternModelMatching(random_eamlist(self.random, 4), None, None, cachesize=2)
+        start = pd.Timestamp('2018-01-01 10:00:00')
+        for actions in [['fridge'], ['microwave'], ['fridge'], ['freezer'], ['fridge'], ['microwave']]:
+            pmd.find_models_for_pattern_cached(['kitchen'], actions, start, start)
+        self.assertEqual(2, pmd.cache_statistics()['hits'])
+        self.assertEqual(4, pmd.cache_statistics()['misses'])
+        self.assertEqual(2, len(pmd.scorecache))
+
+    ###################################################################################################
+    ###################################################################################################
+    ######                              Segmentation Test
+    ###################################################################################################
+    ###################################################################################################
+
+    def test_process_patterns(self):
+        """ Test that every run of a pattern is annotated with its best EAMs, except the last one"""
+        eamlist = [ExpertActivityModel('breakfast', {'locations': ['kitchen'], 'actions': ['fridge', 'microwave'],
+                                                     'duration': 600, 'start': [['08:00', '09:00']]}),
+                   ExpertActivityModel('toilet', {'locations': ['bathroom'], 'actions': ['toiletflush'],
+                                                  'duration': 60, 'start': [['00:00', '23:59']]})]
+        pmd = PatternModelMatching(eamlist, None, None)
+        pmd.df = pd.DataFrame({
+            'timestamp': pd.date_range('2018-01-01 08:10:00', periods=7, freq='min'),
+            'location': ['kitchen', 'kitchen', 'hall', 'kitchen', 'bathroom', 'bathroom', 'kitchen'],
+            'action': ['fridge', 'microwave', 'frontdoor', 'fridge', 'toiletflush', 'toiletflush', 'fridge'],
+            'pattern': ['Pat_1', 'Pat_1', 'Other_Activity', 'Pat_1', 'Pat_2', 'Pat_2', 'Pat_1']
+        })
+        pmd.prefilter_patterns = lambda: None
+        pmd.process_patterns()
+        self.assertEqual([['breakfast']] * 4 + [['toilet']] * 2 + [['None']],
+                         pmd.df['detected_activities'].tolist())
+
+    def test_discovered_segments(self):
+        """ Test the split of the annotated dataframe into the segments stored in the database"""
+        pmd = PatternModelMatching([], None, None)
+        pmd.df = pd.DataFrame({
+            'timestamp': pd.date_range('2018-01-01 08:10:00', periods=6, freq='min'),
+            'executed_action': [10, 11, 12, 13, 14, 15],
+            'detected_activities': [['breakfast'], ['breakfast'], ['None'], ['toilet'], ['breakfast', 'toilet'],
+                                    ['breakfast', 'toilet']]
+        })
+        segments = pmd.discovered_segments()
+        self.assertEqual([['breakfast'], ['toilet'], ['breakfast', 'toilet']], [s['activities'] for s in segments])
+        self.assertEqual([[10, 11], [13], [14, 15]], [s['executed_actions'] for s in segments])
+        self.assertEqual(pd.Timestamp('2018-01-01 08:14:00'), segments[2]['start_time'])
+        self.assertEqual(pd.Timestamp('2018-01-01 08:15:00'), segments[2]['end_time'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file tests the transformation of the Kasteren datasets to the CSV format used by CASAS.
+
+This file is divided into the following TESTS:
+
+-> Overlapping Test:    Checks the removal of the activities containing other activities.
+-> Labeling Test:       Checks the labeling of the sensor activations with the activities.
+-> Streaming Test:      Checks that the streaming mode writes the same dataset as the in-memory one.
+-> Command Line Test:   Runs the streaming mode of the script end-to-end.
+
+"""
+
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import subprocess
+
+import pandas as pd
+
+from packActivityRecognition import kasteren_data_transformer
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+def activity_frame(p_intervals):
+    """
+    Builds an activity dataset from a list of intervals in minutes
+
+    :param p_intervals: A list of tuples (start minute, end minute, activity id)
+    :return: A pandas DataFrame with the columns start, end and activity
+    """
+    base = pd.Timestamp('2008-02-25 00:00:00')
+    return pd.DataFrame({
+        'start': [base + pd.Timedelta(minutes=start) for start, _, _ in p_intervals],
+        'end': [base + pd.Timedelta(minutes=end) for _, end, _ in p_intervals],
+        'activity': [activity for _, _, activity in p_intervals]
+    }, columns=['start', 'end', 'activity'])
+
+
+def sense_frame(p_events):
+    """
+    Builds a sensor dataset from a list of activations in minutes
+
+    :param p_events: A list of tuples (minute, sensor id)
+    :return: A pandas DataFrame with the columns start, end, sensor and value
+    """
+    base = pd.Timestamp('2008-02-25 00:00:00')
+    return pd.DataFrame({
+        'start': [base + pd.Timedelta(minutes=minute) for minute, _ in p_events],
+        'end': [base + pd.Timedelta(minutes=minute + 1) for minute, _ in p_events],
+        'sensor': [sensor for _, sensor in p_events],
+        'value': 1
+    }, columns=['start', 'end', 'sensor', 'value'])
+
+
+class KasterenDataTransformerTestCase(unittest.TestCase):
+
+    ###################################################################################################
+    ###################################################################################################
+    ######                              Overlapping Test
+    ###################################################################################################
+    ###################################################################################################
+
+    def test_detect_overlapping_activities(self):
+        """ Test that only the activities containing a later and shorter activity are removed"""
+        # Index 53 is always removed by the function
+        intervals = [(1000 + i * 10, 1005 + i * 10, 4) for i in xrange(54)]
+        intervals[0:4] = [(0, 100, 10), (10, 20, 4), (10, 110, 13), (50, 100, 1)]
+        act_df = kasteren_data_transformer.detectOverlappingActivities(activity_frame(intervals), {})
+        self.assertNotIn(0, act_df.index)
+        self.assertNotIn(2, act_df.index)
+        self.assertNotIn(53, act_df.index)
+        self.assertEqual([1, 3, 4], act_df.index[0:3].tolist())
+        self.assertEqual(51, len(act_df))
+
+    ###################################################################################################
+    ###################################################################################################
+    ######                              Labeling Test
+    ###################################################################################################
+    ###################################################################################################
+
+    def test_label_sensor_events(self):
+        """ Test the activity names and start/end markers of the sensor activations"""
+        sense_df = sense_frame([(0, 8), (5, 1), (6, 8), (6, 7), (9, 14), (20, 12), (30, 8)])
+        act_df = activity_frame([(4, 10, 13), (19, 21, 1), (29, 31, 15)])
+        trans_df = kasteren_data_transformer.labelSensorEvents(sense_df, act_df, {1: 'Microwave', 7: 'CupsCupboard',
+                                                                                   8: 'Fridge', 12: 'Frontdoor',
+                                                                                   14: 'ToiletFlush'},
+                                                               {1: 'LeaveHouse', 13: 'PrepareBreakfast',
+                                                                15: 'PrepareDinner'}, [13, 15])
+        self.assertEqual(['Fridge', 'Microwave', 'Fridge', 'CupsCupboard', 'ToiletFlush', 'Frontdoor', 'Fridge'],
+                         trans_df['sensor'].astype(str).tolist())
+        self.assertEqual(['None'] + ['PrepareBreakfast'] * 4 + ['None', 'PrepareDinner'],
+                         trans_df['activity'].tolist())
+        self.assertEqual(['', 'start', '', '', 'end', '', 'start'], trans_df['start/end'].tolist())
+
+    ###################################################################################################
+    ###################################################################################################
+    ######                              Streaming Test
+    ###################################################################################################
+    ###################################################################################################
+
+    def test_streaming_transformation(self):
+        """ Test that the chunked transformation gives the same output for any chunk size"""
+        directory = tempfile.mkdtemp()
+        try:
+            sense_file = os.path.join(directory, 'sense.csv')
+            act_file = os.path.join(directory, 'act.csv')
+            # Activities spanning several chunks, activations sharing timestamps and overlapping activities
+            sense_frame([(0, 8), (5, 1), (6, 8), (6, 7), (6, 9), (9, 14), (12, 8), (20, 12), (25, 13), (25, 1),
+                         (30, 8), (31, 18), (40, 5)]).to_csv(sense_file, header=False, index=False)
+            activity_frame([(4, 6, 5), (4, 12, 13), (6, 9, 15), (19, 21, 1), (25, 25, 13), (29, 40, 15)]) \
+                .to_csv(act_file, header=False, index=False)
+            kasteren_data_transformer.transformDataset(sense_file, act_file).to_csv(os.path.join(directory, 'mem'))
+            with open(os.path.join(directory, 'mem')) as output:
+                expected = output.read()
+            for chunksize in [1, 2, 3, 5, 100]:
+                kasteren_data_transformer.transformDatasetStreaming(sense_file, act_file,
+                                                                    os.path.join(directory, 'stream'), chunksize)
+                with open(os.path.join(directory, 'stream')) as output:
+                    self.assertEqual(expected, output.read())
+        finally:
+            shutil.rmtree(directory)
+
+    ###################################################################################################
+    ###################################################################################################
+    ######                              Command Line Test
+    ###################################################################################################
+    ###################################################################################################
+
+    def test_streaming_command_line(self):
+        """ Test that the script writes the labeled dataset in streaming mode when a chunk size is given"""
+        directory = tempfile.mkdtemp()
+        try:
+            sense_file = os.path.join(directory, 'sense.csv')
+            act_file = os.path.join(directory, 'act.csv')
+            output = os.path.join(directory, 'out.csv')
+            sense_frame([(0, 8), (5, 1), (6, 8), (9, 14), (20, 12)]).to_csv(sense_file, header=False, index=False)
+            activity_frame([(4, 10, 13), (19, 21, 1)]).to_csv(act_file, header=False, index=False)
+            script = os.path.abspath(kasteren_data_transformer.__file__).replace('.pyc', '.py')
+            subprocess.check_output([sys.executable, script, '-s', sense_file, '-a', act_file, '-o', output,
+                                     '-c', '2'], stderr=subprocess.STDOUT)
+            trans_df = pd.read_csv(output, index_col=0)
+            self.assertEqual(['Microwave', 'Fridge', 'ToiletFlush'], trans_df['sensor'].astype(str).tolist())
+            self.assertEqual(['PrepareBreakfast'] * 3, trans_df['activity'].tolist())
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file tests the archive files of the LEAs, using a temporary archive directory. It doesn't need a database.
+
+This file is divided into the following TESTS:
+
+-> Segment Test:        Checks that the archived rows are read back with the same values.
+-> Range Test:          Checks the selection of the archived rows of a time range through the manifest.
+-> Schema Test:         Checks that the LEAs of the Shared Repository are not archived.
+
+"""
+
+import shutil
+import tempfile
+import unittest
+from decimal import Decimal
+
+import arrow
+
+from packORM import lea_archive, ar_tables, sr_tables
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+class LeaArchiveTestCase(unittest.TestCase):
+    def setUp(self):
+        self.directory = lea_archive.ARCHIVE['directory']
+        lea_archive.ARCHIVE['directory'] = tempfile.mkdtemp()
+        self.table = ar_tables.ExecutedAction.__table__
+        self.start = arrow.get('2017-03-01T00:00:00+00:00')
+        self.end = arrow.get('2017-04-01T00:00:00+00:00')
+        self.rows = []
+        for number in range(4):
+            self.rows.append({
+                'id': number + 1,
+                'acquisition_datetime': arrow.get('2017-03-0%sT10:00:00.123456+02:00' % (number + 1)),
+                'execution_datetime': arrow.get('2017-03-0%sT08:30:00+00:00' % (number + 1)),
+                'rating': Decimal('0.75') if number else None,
+                'sensor_id': None,
+                'position': u'38.2 -0.5',
+                'data_source_type': u'sensors' if number % 2 else None,
+                'extra_information': u'señal:fuerte',
+                'user_in_role_id': 10 + number % 2,
+                'cd_action_id': 3,
+                'location_id': 7,
+            })
+
+    def tearDown(self):
+        shutil.rmtree(lea_archive.ARCHIVE['directory'])
+        lea_archive.ARCHIVE['directory'] = self.directory
+
+    def test_segment(self):
+        """ Test if the archived rows keep their values, their times and their null values"""
+        segment = lea_archive.write_segment(self.table, 'mad', self.start, self.end, self.rows)
+        self.assertEqual(segment['rows'], 4)
+        rows = lea_archive.read_segment(self.table, segment)
+        self.assertEqual(len(rows), 4)
+        for original, archived in zip(self.rows, rows):
+            self.assertEqual(archived.id, original['id'])
+            self.assertEqual(archived.acquisition_datetime, original['acquisition_datetime'])
+            self.assertEqual(archived.execution_datetime, original['execution_datetime'])
+            self.assertIsNone(archived.sensor_id)
+            self.assertEqual(archived.data_source_type, original['data_source_type'])
+            self.assertEqual(archived.extra_information, u'señal:fuerte')
+        self.assertIsNone(rows[0].rating)
+        self.assertEqual(rows[1].rating, 0.75)
+        # A second segment of the same month doesn't replace the first one
+        other = lea_archive.write_segment(self.table, 'mad', self.start, self.end, self.rows[:1])
+        self.assertNotEqual(segment['file'], other['file'])
+
+    def test_range(self):
+        """ Test if only the archived rows of the time range and user are read"""
+        segment = lea_archive.write_segment(self.table, 'mad', self.start, self.end, self.rows)
+        self.assertEqual(lea_archive.read_rows(self.table, self.start, self.end), [])
+        lea_archive.add_to_manifest([segment])
+        rows = lea_archive.read_rows(self.table, '2017-03-02T00:00:00+00:00', '2017-03-03T08:30:00+00:00')
+        self.assertEqual(sorted(row.id for row in rows), [2, 3])
+        rows = lea_archive.read_rows(self.table, self.start, self.end, 11)
+        self.assertEqual(sorted(row.id for row in rows), [2, 4])
+        self.assertEqual(lea_archive.read_rows(self.table, self.end, self.end.replace(months=+1)), [])
+        lea_archive.remove_from_manifest([segment])
+        self.assertEqual(lea_archive.read_manifest(), [])
+
+    def test_schema(self):
+        """ Test if the Shared Repository is left untouched, because it doesn't read back the archived LEAs"""
+
+        class SharedRepository(object):
+            tables = sr_tables
+
+        self.assertEqual(lea_archive.archive_leas(SharedRepository()), [])
+        self.assertEqual(lea_archive.read_manifest(), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
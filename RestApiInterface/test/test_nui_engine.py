@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file tests the vectorized computation of the NUIs that doesn't need a database.
+
+This file is divided into the following TESTS:
+
+-> Aggregates Test:     Checks the value of each aggregate for every user, measure and month.
+-> Names Test:          Checks the available aggregate names.
+
+"""
+
+import unittest
+
+import numpy as np
+
+from packORM import nui_engine
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+class NuiEngineTestCase(unittest.TestCase):
+    def test_aggregates(self):
+        """ Test if the NUIs of each user and month are computed from its own measure values"""
+        users = [1, 1, 1, 1, 2, 2, 1, 1]
+        measures = [10, 10, 10, 10, 10, 10, 20, 30]
+        months = [570, 570, 570, 571, 570, 570, 570, 570]
+        values = [4.0, 1.0, 3.0, 7.0, 2.0, 2.0, 5.0, 9.0]
+        definitions = {10: [(100, 'avg'), (101, 'std'), (102, 'max'), (103, 'median'), (104, 'p25'),
+                            (105, 'count')],
+                       20: [(200, 'sum')]}
+        nuis = nui_engine.aggregate_measures(np.array(users), np.array(measures), np.array(months), np.array(values),
+                                             definitions)
+        self.assertEqual(nuis[(1, 100, 570)], 2.67)
+        self.assertEqual(nuis[(1, 101, 570)], 1.25)
+        self.assertEqual(nuis[(1, 102, 570)], 4.0)
+        self.assertEqual(nuis[(1, 103, 570)], 3.0)
+        self.assertEqual(nuis[(1, 104, 570)], 2.0)
+        self.assertEqual(nuis[(1, 105, 570)], 3.0)
+        self.assertEqual(nuis[(1, 100, 571)], 7.0)
+        self.assertEqual(nuis[(1, 101, 571)], 0.0)
+        self.assertEqual(nuis[(2, 100, 570)], 2.0)
+        self.assertEqual(nuis[(1, 200, 570)], 5.0)
+        # The measures without NUIs are ignored
+        self.assertEqual(len(nuis), 6 * 3 + 1)
+        self.assertEqual(nui_engine.aggregate_measures([], [], [], [], definitions), {})
+
+    def test_names(self):
+        """ Test if only the known aggregates and valid percentiles are accepted"""
+        for name in ('avg', 'std', 'min', 'max', 'sum', 'count', 'median', 'p0', 'p90', 'p100'):
+            self.assertTrue(nui_engine.is_aggregate(name))
+        for name in ('mean', 'p101', 'px', 'delta'):
+            self.assertFalse(nui_engine.is_aggregate(name))
+        self.assertEqual(nui_engine._month_bound(570).naive.isoformat(), '2017-07-01T00:00:00')
+
+
+if __name__ == '__main__':
+    unittest.main()
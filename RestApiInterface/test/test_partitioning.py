@@ -0,0 +1,64 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file tests the monthly partitioning of the LEA tables that doesn't need a PostgreSQL database.
+
+This file is divided into the following TESTS:
+
+-> Tables Test:         Checks the partitioned tables of each schema and their primary keys.
+-> Months Test:         Checks the computation of the monthly bounds.
+-> Unsupported Test:    Checks that nothing is done with servers without partitioned tables.
+
+"""
+
+import unittest
+from datetime import datetime
+
+from sqlalchemy import create_engine
+
+from packORM import partitioning, ar_tables, sr_tables
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+class PartitioningTestCase(unittest.TestCase):
+    def test_tables(self):
+        """ Test if the LEA tables of both schemas are partitioned by a column of their primary key"""
+        ar_names = [table.name for table in partitioning.get_partitioned_tables(ar_tables)]
+        sr_names = [table.name for table in partitioning.get_partitioned_tables(sr_tables)]
+        self.assertEqual(sorted(ar_names), ['executed_action', 'executed_transformed_action', 'payload_value'])
+        self.assertEqual(sorted(sr_names), ['executed_action', 'payload_value'])
+        # executed_action is converted before the tables referencing it
+        self.assertLess(ar_names.index('executed_action'), ar_names.index('executed_transformed_action'))
+        for table in partitioning.get_partitioned_tables(ar_tables) + partitioning.get_partitioned_tables(sr_tables):
+            column, primary_key = partitioning.PARTITIONED_TABLES[table.name]
+            self.assertIn(column, primary_key)
+            for name in primary_key:
+                self.assertIn(name, table.c)
+
+    def test_months(self):
+        """ Test if the months and their bounds are computed in UTC across the years"""
+        self.assertEqual(partitioning._month_start(datetime(2017, 11, 23, 17, 5)), datetime(2017, 11, 1))
+        self.assertEqual(partitioning._add_months(datetime(2017, 11, 23), 2), datetime(2018, 1, 1))
+        self.assertEqual(partitioning._add_months(datetime(2017, 1, 23), -1), datetime(2016, 12, 1))
+        self.assertEqual(partitioning._add_months(datetime(2017, 12, 1), 12), datetime(2018, 12, 1))
+        self.assertEqual(partitioning._bound(datetime(2018, 2, 1)), '2018-02-01 00:00:00+00')
+
+    def test_unsupported(self):
+        """ Test if the servers without partitioned tables are left untouched"""
+        connection = create_engine('sqlite://').connect()
+        self.assertFalse(partitioning.supports_partitioning(connection))
+        self.assertEqual(partitioning.partition_tables(connection, ar_tables), [])
+        self.assertEqual(partitioning.create_future_partitions(connection, ar_tables), [])
+        connection.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
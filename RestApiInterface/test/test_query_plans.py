@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file checks the query plans of the hot queries of the activity discovery and the search endpoints. It needs the
+PostgreSQL database configured for the tests, created with 'python manage_database.py -g'.
+
+The sequential scans are disabled in the session of the tests, so the planner only uses them when there isn't any
+usable index, even with the small tables of a freshly seeded database. The LEA tables are partitioned by month, so
+their scans are reported under the names of their partitions.
+
+This file is divided into the following TESTS:
+
+-> Transformed Action Test:     The LEAs of a user by time range.
+-> Action Test:                 The LEAs of every user by time range.
+-> EAM Test:                    The EAMs of a user.
+-> User Role Test:              The roles of a user in the system.
+-> Partition Pruning Test:      The LEAs of a week are read only from the partitions of its months.
+
+"""
+
+import re
+import unittest
+
+import arrow
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import ClauseElement, Executable
+
+from packControllers import ar_post_orm
+from packORM import ar_tables, partitioning
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+class Explain(Executable, ClauseElement):
+    """
+    EXPLAIN statement of a query, with its parameters bound as in the original query
+    """
+
+    def __init__(self, p_statement):
+        self.statement = p_statement
+
+
+@compiles(Explain, 'postgresql')
+def pg_explain(element, compiler, **kw):
+    return 'EXPLAIN (FORMAT JSON) ' + compiler.process(element.statement, **kw)
+
+
+class QueryPlanTestCase(unittest.TestCase):
+    def setUp(self):
+        self.ar_database = ar_post_orm.ARPostORM()
+        self.ar_database.session.execute('SET enable_seqscan = off')
+        self.end_time = arrow.utcnow()
+        self.start_time = self.end_time.replace(days=-7)
+
+    def tearDown(self):
+        # The rollback restores the sequential scans
+        self.ar_database.rollback()
+        self.ar_database.close()
+
+    def _relations(self, p_query, p_table_name):
+        """
+        Returns the relation names and scan types used by the plan of the query to read the given table or its
+        partitions
+        """
+        plan = self.ar_database.session.execute(Explain(p_query.statement)).scalar()
+        table_name = re.compile(r'^%s(_default|_p\d{4}_\d{2})?$' % p_table_name)
+        relations = []
+        nodes = [plan[0]['Plan']]
+        while nodes:
+            node = nodes.pop()
+            if table_name.match(node.get('Relation Name', '')):
+                relations.append((node['Relation Name'], node['Node Type']))
+            nodes.extend(node.get('Plans', []))
+        return relations
+
+    def _scans(self, p_query, p_table_name):
+        """
+        Returns the scan types used by the plan of the query to read the given table or its partitions
+        """
+        return [scan for _, scan in self._relations(p_query, p_table_name)]
+
+    def _assert_index_scan(self, p_query, p_table_name):
+        scans = self._scans(p_query, p_table_name)
+        self.assertGreater(len(scans), 0)
+        self.assertNotIn('Seq Scan', scans)
+
+    def test_transformed_action(self):
+        """ Test if the LEAs of a user are extracted with an index scan"""
+        query = self.ar_database.session.query(ar_tables.ExecutedTransformedAction).filter(
+            ar_tables.ExecutedTransformedAction.transformed_execution_datetime.between(self.start_time, self.end_time),
+            ar_tables.ExecutedTransformedAction.user_in_role_id == 1)
+        self._assert_index_scan(query, 'executed_transformed_action')
+
+    def test_action(self):
+        """ Test if the LEAs of a time range are extracted with an index scan"""
+        query = self.ar_database.session.query(ar_tables.ExecutedAction).filter(
+            ar_tables.ExecutedAction.execution_datetime.between(self.start_time, self.end_time))
+        self._assert_index_scan(query, 'executed_action')
+
+    def test_eam(self):
+        """ Test if the EAMs of a user are extracted with an index scan"""
+        query = self.ar_database.session.query(ar_tables.UserInEAM).filter_by(user_in_role_id=1)
+        self._assert_index_scan(query, 'user_in_eam')
+
+    def test_user_role(self):
+        """ Test if the roles of a user are extracted with an index scan"""
+        query = self.ar_database.session.query(ar_tables.UserInRole).filter_by(user_in_system_id=1)
+        self._assert_index_scan(query, 'user_in_role')
+
+    def test_partition_pruning(self):
+        """ Test if the LEAs of a week are only read from the partitions of the months of the week"""
+        if not partitioning.is_partitioned(self.ar_database.session.connection(), ar_tables.ExecutedAction.__table__):
+            self.skipTest('executed_action is not partitioned in this database')
+        query = self.ar_database.session.query(ar_tables.ExecutedAction).filter(
+            ar_tables.ExecutedAction.execution_datetime.between(self.start_time, self.end_time))
+        relations = set(relation for relation, _ in self._relations(query, 'executed_action'))
+        months = set(time.to('UTC').strftime('executed_action_p%Y_%m') for time in (self.start_time, self.end_time))
+        self.assertEqual(relations, months)
+
+
+if __name__ == '__main__':
+    unittest.main()
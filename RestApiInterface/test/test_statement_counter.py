@@ -0,0 +1,63 @@
+# -*- coding: utf-8 -*-
+
+"""
+This file tests the counting of the SQL statements executed by the application, using an in-memory SQLite engine.
+
+This file is divided into the following TESTS:
+
+-> Counting Test:       Checks the statements, their shapes and the nested scopes.
+-> Thresholds Test:     Checks the detection of the scopes exceeding the thresholds.
+
+"""
+
+import unittest
+
+from sqlalchemy import create_engine, text
+
+from packUtils import statement_counter
+
+__author__ = 'Rubén Mulero'
+__copyright__ = "Copyright 2017, City4Age project"
+__credits__ = ["Rubén Mulero", "Aitor Almeida", "Gorka Azkune", "David Buján"]
+__license__ = "GPL"
+__version__ = "0.2"
+__maintainer__ = "Rubén Mulero"
+__email__ = "ruben.mulero@deusto.es"
+__status__ = "Prototype"
+
+
+class StatementCounterTestCase(unittest.TestCase):
+    def setUp(self):
+        self.engine = create_engine('sqlite://')
+        self.engine.execute('CREATE TABLE executed_action (id INTEGER)')
+        self.thresholds = {'max_statements': 5, 'max_repeated': 3}
+
+    def test_counting(self):
+        """ Test if the statements are counted in every active scope with their shapes"""
+        with statement_counter.track('outer', self.thresholds) as outer:
+            with statement_counter.track('inner', self.thresholds) as inner:
+                for value in range(3):
+                    self.engine.execute(text('SELECT id FROM executed_action WHERE id = :id'), id=value)
+            self.engine.execute(text('SELECT id FROM executed_action WHERE id IN (:a, :b)'), a=1, b=2)
+        # Statements outside any scope are not counted
+        self.engine.execute('SELECT id FROM executed_action')
+        self.assertEqual(inner.statements, 3)
+        self.assertEqual(outer.statements, 4)
+        self.assertEqual(outer.repeated(), [('SELECT id FROM executed_action WHERE id = ?', 3)])
+        self.assertIn('SELECT id FROM executed_action WHERE id IN (?, ...)', outer.shapes)
+        self.assertGreater(outer.duration, 0)
+
+    def test_thresholds(self):
+        """ Test if the N+1 queries and the scopes with too many statements are detected"""
+        with statement_counter.track('one query', self.thresholds) as stats:
+            self.engine.execute('SELECT id FROM executed_action')
+        self.assertFalse(stats.check_thresholds(self.thresholds))
+        with statement_counter.track('n+1 queries', self.thresholds) as stats:
+            for value in range(4):
+                self.engine.execute(text('SELECT id FROM executed_action WHERE id = :id'), id=value)
+        self.assertTrue(stats.check_thresholds(self.thresholds))
+        self.assertTrue(stats.check_thresholds({'max_statements': 3, 'max_repeated': 0}))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -99,6 +99,17 @@ def _install_rest_api():
     with cd('/opt/c4a_data_repository/RestApiInterface/scripts'):
         run('/bin/bash ./install.sh')
 
+    # Creating the database schemas and their base data
+    with cd('/opt/c4a_data_repository/RestApiInterface'):
+        with prefix('source ./bin/activate'):
+            run('python manage_database.py -g')
+        # Creating the monthly partitions of the LEA tables every week
+        sudo('cp scripts/create_partitions.sh /etc/cron.weekly/c4a_create_partitions')
+        sudo('chmod +x /etc/cron.weekly/c4a_create_partitions')
+        # Updating the daily LEA rollups every hour
+        sudo('cp scripts/update_rollups.sh /etc/cron.hourly/c4a_update_rollups')
+        sudo('chmod +x /etc/cron.hourly/c4a_update_rollups')
+
     with cd('/opt/c4a_data_repository/Database'):
         sudo('cp db_backup.sh /etc/cron.daily')
         sudo('chmod +x /etc/cron.daily/db_backup.sh')